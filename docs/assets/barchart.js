@@ -0,0 +1,470 @@
+// Bar chart app (barchart.html): one page for every dataset with a bar chart in
+// the dataset manifest. Needs common.js.
+const {createApp} = Vue;
+
+function loadYieldData(barData, dataset) {
+    const fetchYieldJson = () => fetch(dataset.yield_data_path).then(response => response.json());
+    if (!barData.yield_versions_path || !window.indexedDB) return fetchYieldJson();
+    return loadVersionedData(barData.yield_versions_path).catch(error => {
+        console.warn('Versioned yields unavailable:', error);
+        return fetchYieldJson();
+    });
+}
+
+function loadSimilarCompounds(headerPath) {
+    // Header JSON, then the int32 neighbour indices and float32 distances in one buffer
+    const headerUrl = new URL(headerPath, document.baseURI);
+    return fetch(headerUrl)
+        .then(response => response.json())
+        .then(header => fetch(new URL(header.data_path, headerUrl))
+            .then(response => response.arrayBuffer())
+            .then(buffer => {
+                const count = header.shape[0] * header.shape[1];
+                let indices, distances;
+                if (new Uint8Array(new Uint16Array([1]).buffer)[0] === 1) {
+                    // Little-endian platform: zero-copy views
+                    indices = new Int32Array(buffer, 0, count);
+                    distances = new Float32Array(buffer, header.distance_offset, count);
+                } else {
+                    const view = new DataView(buffer);
+                    indices = new Int32Array(count);
+                    distances = new Float32Array(count);
+                    for (let i = 0; i < count; i++) {
+                        indices[i] = view.getInt32(i * 4, true);
+                        distances[i] = view.getFloat32(header.distance_offset + i * 4, true);
+                    }
+                }
+                return {
+                    k: header.shape[1],
+                    compounds: header.compounds,
+                    compoundIndex: new Map(header.compounds.map((compound, i) => [compound, i])),
+                    indices,
+                    distances,
+                };
+            }));
+}
+
+// Per-property sorted series, built on first use (kept outside Vue reactivity)
+const seriesCache = new Map();
+// In-flight or completed shard requests, keyed by property
+const shardRequests = new Map();
+let barDataUrl = null;
+// Similar compounds index (see generate_similar_compounds.py), kept outside Vue reactivity
+let similarIndex = null;
+// Incremented per dataset load, so responses for a previous dataset are dropped
+let loadToken = 0;
+
+createApp({
+    data() {
+        return {
+            chartData: null,
+            compounds: null,
+            propertyList: [],
+            shards: null,
+            yieldData: null,
+            selectedProperty: null,
+            imageData: null,
+            selectedBatchIndex: 0,
+            compoundChunks: [],
+            batchLabels: [],
+            showText: true,
+            stats: null,
+            datasets: [],
+            datasetName: null,
+        };
+    },
+    computed: {
+        propertyStats() {
+            // One row per method, strongest correlation first
+            const stats = this.stats;
+            const index = stats ? stats.properties.indexOf(this.selectedProperty) : -1;
+            if (index === -1) return null;
+            const summaries = stats.summaries;
+            return stats.methods
+                .map((method, j) => ({
+                    method,
+                    pearson: stats.pearson[index][j],
+                    spearman: stats.spearman[index][j],
+                    count: stats.pair_counts[index][j],
+                    mean: summaries.mean[j],
+                    median: summaries.median[j],
+                    q25: summaries.q25[j],
+                    q75: summaries.q75[j],
+                    top: stats.top_k.ids[j].slice(0, 3),
+                }))
+                .sort((a, b) => Math.abs(b.pearson ?? 0) - Math.abs(a.pearson ?? 0));
+        },
+    },
+    watch: {
+        datasetName(name) {
+            if (name) {
+                this.loadDataset(name);
+            }
+        },
+        selectedProperty(newProperty) {
+            if (newProperty) {
+                this.showProperty(newProperty);
+            }
+        },
+        selectedBatchIndex(newIndex) {
+            this.renderBarChart(this.selectedProperty, newIndex);
+        },
+        showText() {
+            this.renderBarChart(this.selectedProperty, this.selectedBatchIndex);
+        }
+    },
+    mounted() {
+        loadDatasetManifest()
+            .then(manifest => {
+                this.datasets = chartDatasets(manifest, 'barchart');
+                const dataset = requestedDataset(this.datasets);
+                if (!dataset) throw new Error('No bar chart datasets in the manifest');
+                showDatasetInUrl(dataset.name, true);
+                this.datasetName = dataset.name;
+            })
+            .catch(error => console.error('Error loading datasets:', error));
+        // Back and Forward switch between the datasets viewed
+        window.addEventListener('popstate', () => {
+            const dataset = requestedDataset(this.datasets);
+            if (dataset) this.datasetName = dataset.name;
+        });
+    },
+    methods: {
+        loadDataset(name) {
+            // Drops the previous dataset's data and loads the selected one
+            const dataset = this.datasets.find(entry => entry.name === name);
+            const token = ++loadToken;
+            showDatasetInUrl(name, false);
+            seriesCache.clear();
+            shardRequests.clear();
+            resetImages();
+            similarIndex = null;
+            this.chartData = null;
+            this.shards = null;
+            this.yieldData = null;
+            this.stats = null;
+            this.compoundChunks = [];
+            this.batchLabels = [];
+            this.selectedBatchIndex = 0;
+            barDataUrl = new URL(dataset.data_path, document.baseURI);
+            fetch(barDataUrl)
+                .then(response => response.json())
+                .then(barData => Promise.all([barData, loadYieldData(barData, dataset)]))
+                .then(([barData, yieldData]) => {
+                    if (token !== loadToken) return; // Another dataset was selected
+                    document.title = barData.page_title;
+                    if (barData.format === 'sharded') {
+                        // Only the manifest is loaded up front; property shards are fetched on demand
+                        this.compounds = barData.compounds;
+                        this.shards = barData.properties.map(shard => ({
+                            ...shard,
+                            url: new URL(shard.url, barDataUrl).href,
+                        }));
+                        this.chartData = {};
+                        this.propertyList = barData.properties.map(shard => shard.name);
+                    } else {
+                        this.chartData = barData.data;
+                        // Columnar payloads store the compound list once
+                        this.compounds = barData.format === 'columnar' ? barData.compounds : null;
+                        this.propertyList = Object.keys(barData.data);
+                    }
+                    this.imageData = barData.images;
+                    if (barData.image_variants_path) loadImageVariants(barData.image_variants_path);
+                    if (barData.image_bundle_path) loadImageBundle(barData.image_bundle_path);
+                    if (barData.stats_path) this.loadStats(barData.stats_path);
+                    if (barData.similar_compounds_path) {
+                        loadSimilarCompounds(barData.similar_compounds_path)
+                            .then(index => {
+                                if (token === loadToken) similarIndex = index;
+                            })
+                            .catch(error => console.warn('Similar compounds unavailable:', error));
+                    }
+                    this.yieldData = yieldData;
+                    this.splitCompounds();
+                    const [firstProperty] = this.propertyList;
+                    if (this.selectedProperty === firstProperty) {
+                        this.showProperty(firstProperty); // The watcher does not fire
+                    } else {
+                        this.selectedProperty = firstProperty;
+                    }
+                })
+                .catch(error => console.error('Error loading data:', error));
+        },
+        loadStats(path) {
+            // Optional panel: the chart works without it
+            const token = loadToken;
+            fetch(path)
+                .then(response => response.json())
+                .then(stats => {
+                    if (token === loadToken) this.stats = Object.freeze(stats);
+                })
+                .catch(error => console.warn('Statistics unavailable:', error));
+        },
+        analogueYield(compound, method) {
+            // Yield in the hovered method, or the best yield over all methods
+            const yields = this.yieldData.yields[compound];
+            if (!yields) return 'N/A';
+            if (method) {
+                const value = yields[method];
+                return value === null || value === undefined ? 'N/A' : `${value.toFixed(2)}%`;
+            }
+            let best = null;
+            for (const name of this.yieldData.methods) {
+                const value = yields[name];
+                if (value !== null && value !== undefined && (best === null || value > yields[best])) best = name;
+            }
+            return best === null ? 'N/A' : `${yields[best].toFixed(2)}% (${best})`;
+        },
+        similarCompoundsHtml(compoundId, method) {
+            // Nearest compounds over the standardized DFT properties, looked up in the index
+            const row = similarIndex?.compoundIndex.get(compoundId);
+            if (row === undefined) return '';
+            const items = [];
+            for (let j = 0; j < similarIndex.k; j++) {
+                const offset = row * similarIndex.k + j;
+                const analogue = similarIndex.compounds[similarIndex.indices[offset]];
+                items.push(`<li>${analogue}: ${this.analogueYield(analogue, method)}
+                    <span class="text-gray-500">(distance ${similarIndex.distances[offset].toFixed(2)})</span></li>`);
+            }
+            return `<div class="text-sm mt-1"><b>Similar compounds (${method ? `${method} yield` : 'best yield'}):</b>
+                <ul class="list-disc pl-4">${items.join('')}</ul></div>`;
+        },
+        formatStat(value, digits) {
+            return value === null || value === undefined ? 'N/A' : value.toFixed(digits);
+        },
+        splitCompounds() {
+            const compounds = this.yieldData.compounds;
+            const chunkSize = 50;
+            for (let i = 0; i < compounds.length; i += chunkSize) {
+                let batch = compounds.slice(i, i + chunkSize);
+                this.compoundChunks.push(batch);
+                this.batchLabels.push(`${batch[0]} - ${batch[batch.length - 1]}`);
+            }
+        },
+        loadProperty(property) {
+            // Resolves once the property column is available in chartData
+            if (!this.shards || this.chartData[property]) return Promise.resolve();
+            if (!shardRequests.has(property)) {
+                const chartData = this.chartData; // Replaced when the dataset changes
+                const shard = this.shards.find(entry => entry.name === property);
+                const request = fetch(shard.url)
+                    .then(response => response.json())
+                    .then(shardData => {
+                        chartData[property] = shardData;
+                    })
+                    .catch(error => {
+                        shardRequests.delete(property); // Allow a retry
+                        throw error;
+                    });
+                shardRequests.set(property, request);
+            }
+            return shardRequests.get(property);
+        },
+        showProperty(property) {
+            this.loadProperty(property)
+                .then(() => {
+                    if (property === this.selectedProperty) {
+                        this.renderBarChart(property, this.selectedBatchIndex);
+                    }
+                    this.prefetchNeighbours(property);
+                })
+                .catch(error => console.error('Error loading property data:', error));
+        },
+        prefetchNeighbours(property) {
+            // Warm the shards of the adjacent properties in the select list
+            if (!this.shards) return;
+            const index = this.propertyList.indexOf(property);
+            [index - 1, index + 1]
+                .filter(i => i >= 0 && i < this.propertyList.length)
+                .forEach(i => this.loadProperty(this.propertyList[i]).catch(() => {}));
+        },
+        propertySeries(property) {
+            if (seriesCache.has(property)) return seriesCache.get(property);
+            const propertyData = this.chartData[property];
+            if (!propertyData) return null;
+            let xValues, yValues;
+            if (this.compounds) {
+                // Columnar layout: apply the sort permutation to the shared compound list
+                xValues = propertyData.order.map(i => this.compounds[i]);
+                yValues = propertyData.order.map(i => propertyData.values[i]);
+            } else {
+                xValues = propertyData.x_values;
+                yValues = propertyData.y_values;
+            }
+            if (propertyData.fixed_point != null) {
+                // Scaled integers: value = integer / 10 ** fixed_point
+                const divisor = 10 ** propertyData.fixed_point;
+                yValues = yValues.map(value => value === null ? null : value / divisor);
+            }
+            const series = {
+                x_values: xValues,
+                y_values: yValues,
+                lookup: new Map(xValues.map((compound, i) => [compound, yValues[i]])),
+            };
+            seriesCache.set(property, series);
+            return series;
+        },
+        renderBarChart(property, batchIndex) {
+            console.log("Entering renderHeatmap");
+            if (!this.chartData || !this.yieldData) return;
+            const propertyData = this.propertySeries(property);
+            if (!propertyData) return;
+
+            // compound and method lists
+            const compoundBatch = batchIndex === -1 ? propertyData.x_values : this.compoundChunks[batchIndex];
+            const x = compoundBatch;
+            const y = compoundBatch.map(compound => propertyData.lookup.get(compound) ?? null);
+
+            const fontDefault = {
+                color: 'black',
+                family: 'Courier New, monospace',
+                size: 16
+            };
+            const trace1 = {
+                type: 'bar',
+                name: property,
+                x: x,
+                y: y,
+                yaxis: 'y',
+                text: this.showText ? y.map(value => value?.toFixed(2) ?? "") : [],
+                textposition: 'auto',
+                texttemplate: this.showText ? '%{text:.1f}' : '',
+                textfont: {...fontDefault, size: 12},
+                hoverinfo: 'none',
+                marker: {color: 'LightSalmon'},
+            };
+            const yieldTraces = this.yieldData.methods.map(method => {
+                return {
+                    type: 'scatter',
+                    name: method,
+                    x: x,
+                    y: x.map(compound => this.yieldData.yields[compound]?.[method] ?? null),
+                    yaxis: 'y2',
+                    mode: 'lines+markers',
+                    visible: 'legendonly',
+                    line: {dash: 'dash'},
+                    hoverinfo: 'none',
+                };
+            });
+            const data = [trace1, ...yieldTraces];
+            // Missing values (null) would count as 0 in Math.min/Math.max
+            let yMin = Infinity, yMax = -Infinity;
+            for (const value of y) {
+                if (value === null || value === undefined) continue;
+                if (value < yMin) yMin = value;
+                if (value > yMax) yMax = value;
+            }
+            if (yMin > yMax) yMin = yMax = 0; // No values in this batch
+            const yrange = yMax - yMin;
+
+            const layout = {
+                xaxis: {
+                    title: {
+                        text: "<b>" + "Compounds" + "</b>",
+                        font: {...fontDefault, size: 24, family: 'Arial, sans-serif'},
+                        xref: 'paper',
+                        yref: 'paper',
+                        automargin: true,
+                    },
+                    scaleanchor: 'y', // Ensures 1:1 ratio
+                    scaleratio: 1,
+                    font: fontDefault,
+                    ticks: 'outside',
+                    tickangle: "auto",
+                },
+                yaxis: {
+                    title: {
+                        text: "<b>" + this.selectedProperty + "</b>",
+                        font: {...fontDefault, size: 24, family: 'Arial, sans-serif'},
+                        xref: 'paper',
+                        yref: 'paper',
+                        automargin: true,
+                    },
+                    font: fontDefault,
+                    // set the range to be +/- 10% of the data range
+                    range: [yMin - 0.1 * yrange, yMax + 0.1 * yrange],
+                    tickangle: "auto",
+                },
+                yaxis2: {
+                    title: {
+                        text: "<b>" + "Yield" + "</b>",
+                        font: {...fontDefault, size: 24, family: 'Arial, sans-serif'},
+                        xref: 'paper',
+                        yref: 'paper',
+                        automargin: true,
+                    },
+                    overlaying: 'y',
+                    side: 'right',
+                    font: fontDefault,
+                    range: [0, 100],
+                    tickangle: "auto",
+                },
+                margin: {
+                    l: 100, r: 100, t: 50, b: 100
+                },
+                legend: {
+                    orientation: 'v',
+                    xref: 'paper',
+                    yref: 'paper',
+                    x: 1.15,
+                    y: 0.5,
+                },
+                autosize: true,
+            };
+            const config = {responsive: true};
+
+            Plotly.react('bar-chart', data, layout, config);
+
+            this.setupTooltip();
+        },
+        setupTooltip() {
+            const tooltip = document.getElementById('tooltip');
+            const barChart = document.getElementById('bar-chart');
+            if (barChart.dataset.tooltipReady) return; // Plotly.react keeps the handlers
+            barChart.dataset.tooltipReady = 'true';
+
+            barChart.on('plotly_hover', event => {
+                const point = event.points[0];
+                console.log("Hover event:", point);
+                const compoundId = point.x;
+                const value = point.y;
+                // determine the cell width
+                var cellSizeWidth = Math.abs(point.bbox.width || (point.bbox.x1 - point.bbox.x0));
+                // Tooltip content
+                const imgSrc = this.imageData[compoundId];
+                if (point.data.type === 'bar') {
+                    tooltip.innerHTML = `
+                    ${hoverImageHtml(compoundId, imgSrc)}<br>
+                    <div class="text-sm"><b>Compound:</b> ${compoundId}</div>
+
+                    <div class="text-sm"><b>${point.data.name
+                        }:</b> ${value !== null ? value.toFixed(2) : "N/A"}</div>
+                    ${this.similarCompoundsHtml(compoundId, null)}
+                `;
+                }
+                if (point.data.type === "scatter") {
+                    tooltip.innerHTML = `
+                    ${hoverImageHtml(compoundId, imgSrc)}<br>
+                    <div class="text-sm"><b>Compound:</b> ${compoundId}</div>
+
+                    <div class="text-sm"><b>${point.data.name
+                        } Yield:</b> ${value !== null ? value.toFixed(2) + '%' : "N/A"}</div>
+                    ${this.similarCompoundsHtml(compoundId, point.data.name)}
+                `;
+                }
+
+                // Get the bounding box of the hovered cell
+                const bbox = point.bbox || {x0: event.event.clientX, y0: event.event.clientY};
+                const {clientX: mouseX, clientY: mouseY} = event.event;
+                // Position the tooltip relative to the hovered cell
+                tooltip.style.left = `${bbox.x0 + cellSizeWidth / 2}px`;
+                tooltip.style.top = `${mouseY + 20}px`;
+                tooltip.style.display = 'block';
+            });
+
+            barChart.on('plotly_unhover', () => {
+                tooltip.style.display = 'none';
+            });
+        }
+    }
+}).mount('#app');
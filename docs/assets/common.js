@@ -0,0 +1,228 @@
+// Code shared by the chart apps (barchart.html, heatmap.html): dataset selection,
+// hover images and the versioned data cache. Loaded before the app scripts.
+
+// Dataset manifest (see generate_dataset_manifest), selected by ?dataset=<name>
+const DATASET_PARAM = 'dataset';
+
+function loadDatasetManifest() {
+    const manifestUrl = new URL(document.body.dataset.manifest, document.baseURI);
+    return fetch(manifestUrl).then(response => response.json());
+}
+
+function chartDatasets(manifest, chart) {
+    // Datasets that have the given chart, each with that chart's entry
+    return manifest.datasets
+        .filter(dataset => dataset.charts[chart])
+        .map(dataset => ({name: dataset.name, ...dataset.charts[chart]}));
+}
+
+function requestedDataset(datasets) {
+    const name = new URLSearchParams(location.search).get(DATASET_PARAM);
+    return datasets.find(dataset => dataset.name === name) ?? datasets[0] ?? null;
+}
+
+function showDatasetInUrl(name, replace) {
+    // Switching datasets adds a history entry, so Back returns to the previous one
+    const url = new URL(location.href);
+    if (url.searchParams.get(DATASET_PARAM) === name) return;
+    url.searchParams.set(DATASET_PARAM, name);
+    history[replace ? 'replaceState' : 'pushState'](null, '', url);
+}
+
+// Image variants per compound (smallest first), loaded in the background
+let imageVariants = null;
+let imageGeneration = 0; // Incremented by resetImages, so late responses are ignored
+const HOVER_IMAGE_SIZE = 150; // Matches the .hover-tooltip img max size
+
+function loadImageVariants(path) {
+    const generation = imageGeneration;
+    fetch(path)
+        .then(response => response.json())
+        .then(manifest => {
+            if (generation === imageGeneration) imageVariants = manifest.compounds;
+        })
+        .catch(error => console.warn('Image variants unavailable:', error));
+}
+
+// Packed thumbnail bundles (one binary file per format and size), read with Range requests
+let imageBundle = null;
+const bundleImageUrls = new Map(); // Byte offset -> object URL, or a Promise while fetching
+let bundleImageCount = 0;
+const WHOLE_BUNDLE_BYTES = 512 * 1024; // Smaller bundles are fetched in one transfer
+const WHOLE_BUNDLE_AFTER = 16; // Range requests before fetching the whole bundle instead
+// 1x1 images of each bundle format, decoded once to tell whether the browser supports it
+const IMAGE_PROBES = {
+    webp: 'data:image/webp;base64,UklGRhoAAABXRUJQVlA4TA0AAAAvAAAAEAcQERGIiP4HAA==',
+    avif: 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIQAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAKW1kYXQSAAoIGAAGiAhoNCAyExlHh4Yhh5555oAAAJBAyRxgimo=',
+};
+
+function canDecode(format) {
+    if (format === 'png') return Promise.resolve(true);
+    if (!IMAGE_PROBES[format]) return Promise.resolve(false);
+    return new Promise(resolve => {
+        const probe = new Image();
+        probe.onload = () => resolve(probe.width > 0);
+        probe.onerror = () => resolve(false);
+        probe.src = IMAGE_PROBES[format];
+    });
+}
+
+async function loadImageBundle(path) {
+    // Smallest decodable bundle that fills the hover panel (bundles are listed smallest first)
+    const generation = imageGeneration;
+    try {
+        const index = await fetch(path).then(response => response.json());
+        const decodable = await Promise.all(index.packs.map(pack => canDecode(pack.format)));
+        const packs = index.packs.filter((pack, i) => decodable[i]);
+        const target = HOVER_IMAGE_SIZE * (window.devicePixelRatio || 1);
+        const pack = packs.find(pack => pack.size >= target) ?? packs[packs.length - 1];
+        if (!pack || generation !== imageGeneration) return;
+        imageBundle = {pack, compounds: index.compounds, buffer: null, rangeRequests: 0};
+        if (pack.bytes <= WHOLE_BUNDLE_BYTES) fetchWholeBundle(imageBundle);
+    } catch (error) {
+        console.warn('Image bundle unavailable:', error);
+    }
+}
+
+function fetchWholeBundle(bundle) {
+    bundle.buffer ??= fetch(bundle.pack.url).then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.arrayBuffer();
+    });
+    return bundle.buffer;
+}
+
+async function fetchBundleBytes(bundle, offset, length) {
+    // Single images by range until the user has swept across enough compounds
+    if (!bundle.buffer && bundle.rangeRequests < WHOLE_BUNDLE_AFTER) {
+        bundle.rangeRequests++;
+        const response = await fetch(bundle.pack.url, {
+            headers: {Range: `bytes=${offset}-${offset + length - 1}`},
+        });
+        if (response.status === 206) return response.arrayBuffer();
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        // The server ignored the range and sent the whole bundle: keep it
+        bundle.buffer ??= response.arrayBuffer();
+    }
+    return (await fetchWholeBundle(bundle)).slice(offset, offset + length);
+}
+
+function bundleImageUrl(compoundId) {
+    // Object URL of a compound's bundled thumbnail, a Promise of it, or null if not bundled
+    const range = imageBundle?.compounds[compoundId]?.[imageBundle.pack.name];
+    if (!range) return null;
+    const [offset, length] = range;
+    if (!bundleImageUrls.has(offset)) {
+        const bundle = imageBundle;
+        const request = fetchBundleBytes(bundle, offset, length)
+            .then(bytes => {
+                const url = URL.createObjectURL(new Blob([bytes], {type: `image/${bundle.pack.format}`}));
+                if (imageBundle === bundle) bundleImageUrls.set(offset, url);
+                return url;
+            })
+            .catch(error => {
+                if (imageBundle === bundle) bundleImageUrls.delete(offset); // Retried on the next hover
+                throw error;
+            });
+        bundleImageUrls.set(offset, request);
+    }
+    return bundleImageUrls.get(offset);
+}
+
+function hoverImageHtml(compoundId, fallbackSrc) {
+    // Bundled thumbnail if any, else the smallest variant per format that fills
+    // the hover panel, with the original as fallback
+    const alt = `Image for ${compoundId}`;
+    const bundled = bundleImageUrl(compoundId);
+    if (typeof bundled === 'string') return `<img src="${bundled}" alt="${alt}">`;
+    if (bundled) {
+        // Filled in when the bytes arrive, if the tooltip still shows this compound
+        const id = `bundle-image-${++bundleImageCount}`;
+        bundled
+            .then(url => document.getElementById(id)?.setAttribute('src', url))
+            .catch(() => document.getElementById(id)?.setAttribute('src', fallbackSrc));
+        return `<img id="${id}" alt="${alt}">`;
+    }
+    const variants = imageVariants?.[compoundId];
+    if (!variants) return `<img src="${fallbackSrc}" alt="${alt}">`;
+    const target = HOVER_IMAGE_SIZE * (window.devicePixelRatio || 1);
+    const pick = format => {
+        const candidates = variants.filter(variant => variant.format === format);
+        return candidates.find(variant => Math.max(variant.width, variant.height) >= target)
+            ?? candidates[candidates.length - 1];
+    };
+    const sources = ['avif', 'webp']
+        .map(pick)
+        .filter(Boolean)
+        .map(variant => `<source type="image/${variant.format}" srcset="${variant.url}">`)
+        .join('');
+    return `<picture>${sources}<img src="${pick('png')?.url ?? fallbackSrc}" alt="${alt}"></picture>`;
+}
+
+function resetImages() {
+    // Drops the previous dataset's variants and bundle when switching datasets
+    imageGeneration++;
+    imageVariants = null;
+    imageBundle = null;
+    bundleImageUrls.forEach(url => typeof url === 'string' && URL.revokeObjectURL(url));
+    bundleImageUrls.clear();
+}
+
+// Versioned data is cached in IndexedDB, so repeat visits only fetch newer deltas
+const DATA_CACHE_DB = 'page-data-cache';
+const DATA_CACHE_STORE = 'versioned';
+
+function openDataCache() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(DATA_CACHE_DB, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(DATA_CACHE_STORE);
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function dataCacheRequest(db, mode, operation) {
+    return new Promise((resolve, reject) => {
+        const request = operation(db.transaction(DATA_CACHE_STORE, mode).objectStore(DATA_CACHE_STORE));
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+function applyDelta(data, delta) {
+    const deleted = new Set(delta.deletes);
+    delta.deletes.forEach(key => delete data.yields[key]);
+    Object.assign(data.yields, delta.upserts);
+    data.compounds = delta.compounds
+        ?? data.compounds.filter(key => !deleted.has(key)).concat(delta.appended);
+}
+
+async function loadVersionedData(manifestPath) {
+    // Cached base + deltas up to the cached version, then the newer deltas
+    const manifestUrl = new URL(manifestPath, document.baseURI);
+    const manifest = await fetch(manifestUrl).then(response => response.json());
+    const cacheKey = manifestUrl.pathname; // Stable across fingerprints
+    let db = null, cached = null;
+    try {
+        db = await openDataCache();
+        cached = await dataCacheRequest(db, 'readonly', store => store.get(cacheKey));
+    } catch (error) {
+        console.warn('Data cache unavailable:', error);
+    }
+    let data, version;
+    if (cached && cached.base === manifest.base.url && cached.version <= manifest.version) {
+        ({data, version} = cached);
+    } else {
+        data = await fetch(new URL(manifest.base.url, manifestUrl)).then(response => response.json());
+        version = manifest.base.version;
+    }
+    const deltas = await Promise.all(manifest.deltas
+        .filter(entry => entry.version > version)
+        .map(entry => fetch(new URL(entry.url, manifestUrl)).then(response => response.json())));
+    deltas.forEach(delta => applyDelta(data, delta));
+    if (db && !(cached && cached.base === manifest.base.url && cached.version === manifest.version)) {
+        dataCacheRequest(db, 'readwrite', store => store.put({base: manifest.base.url, version: manifest.version, data}, cacheKey))
+            .catch(error => console.warn('Data cache not updated:', error));
+    }
+    return data;
+}
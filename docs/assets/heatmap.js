@@ -0,0 +1,577 @@
+// Heatmap app (heatmap.html): one page for every dataset with a heatmap in the
+// dataset manifest. Needs common.js.
+const {createApp} = Vue;
+
+// Typed-array yield matrix, kept outside Vue reactivity
+let yieldMatrix = null;
+const littleEndian = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+
+function decodeYieldMatrix(header, buffer) {
+    // Row-major compounds x methods, little-endian float32 or quantized uint16
+    const count = header.shape[0] * header.shape[1];
+    const view = new DataView(buffer);
+    let values;
+    if (header.dtype === 'uint16') {
+        values = new Float32Array(count);
+        for (let i = 0; i < count; i++) {
+            const q = view.getUint16(i * 2, true);
+            values[i] = q === header.nan_sentinel ? NaN : header.offset + q * header.scale;
+        }
+    } else if (littleEndian) {
+        values = new Float32Array(buffer, 0, count); // Zero-copy view
+    } else {
+        values = new Float32Array(count);
+        for (let i = 0; i < count; i++) values[i] = view.getFloat32(i * 4, true);
+    }
+    return {
+        values,
+        nMethods: header.shape[1],
+        compoundIndex: new Map(header.compounds.map((compound, i) => [compound, i])),
+        methodIndex: new Map(header.methods.map((method, i) => [method, i])),
+    };
+}
+
+// Heatmap tile pyramid (see generate_heatmap_tiles), fetched per viewport
+let tileIndex = null;
+let tileIndexUrl = null;
+let tileView = null; // Level and first cell of the rendered tiles, for the tooltip
+let tileRenderToken = 0;
+const tileCache = new Map();
+const MIN_CELL_PIXELS = 4; // Coarser levels are used below this cell width
+const MAX_LABELLED_CELLS = 60;
+
+function loadTileIndex(path) {
+    const url = tileIndexUrl = new URL(path, document.baseURI);
+    return fetch(url)
+        .then(response => response.json())
+        .then(index => {
+            if (url === tileIndexUrl) tileIndex = index; // Unless the dataset changed
+        });
+}
+
+function fetchTile(level, row, col) {
+    // Planes x rows x columns float32 values, cached per tile
+    const key = `${level}/${row}_${col}`;
+    if (!tileCache.has(key)) {
+        const path = tileIndex.url_template
+            .replace('{level}', level)
+            .replace('{row}', row)
+            .replace('{col}', col);
+        const url = new URL(path, tileIndexUrl);
+        url.searchParams.set('v', tileIndex.data_hash);
+        const tile = fetch(url)
+            .then(response => {
+                if (!response.ok) throw new Error(`Tile ${key}: HTTP ${response.status}`);
+                return response.arrayBuffer();
+            })
+            .then(buffer => {
+                if (littleEndian) return new Float32Array(buffer);
+                const view = new DataView(buffer);
+                const values = new Float32Array(buffer.byteLength / 4);
+                for (let i = 0; i < values.length; i++) values[i] = view.getFloat32(i * 4, true);
+                return values;
+            });
+        tile.catch(() => tileCache.delete(key)); // Retry failed tiles on the next render
+        tileCache.set(key, tile);
+    }
+    return tileCache.get(key);
+}
+
+function loadTileWindow(start, end, width) {
+    // Finest level whose cells for compounds [start, end) are still MIN_CELL_PIXELS wide
+    const levels = tileIndex.levels;
+    const level = levels.find(level => (end - start) / level.row_factor * MIN_CELL_PIXELS <= width)
+        ?? levels[levels.length - 1];
+    const size = tileIndex.tile_size;
+    const first = Math.floor(start / level.row_factor);
+    const last = Math.min(Math.ceil(end / level.row_factor), level.rows);
+    const requests = [];
+    for (let tileRow = Math.floor(first / size); tileRow * size < last; tileRow++) {
+        for (let tileCol = 0; tileCol < level.tile_cols; tileCol++) {
+            requests.push(fetchTile(level.level, tileRow, tileCol)
+                .then(values => ({tileRow, tileCol, values})));
+        }
+    }
+    return Promise.all(requests).then(tiles => {
+        // One methods x cells matrix per plane (mean, min, max)
+        const planes = level.planes.map(() =>
+            Array.from({length: level.cols}, () => new Array(last - first).fill(null)));
+        for (const {tileRow, tileCol, values} of tiles) {
+            const tileRows = Math.min(size, level.rows - tileRow * size);
+            const tileCols = Math.min(size, level.cols - tileCol * size);
+            for (let r = 0; r < tileRows; r++) {
+                const row = tileRow * size + r;
+                if (row < first || row >= last) continue;
+                for (let c = 0; c < tileCols; c++) {
+                    planes.forEach((plane, p) => {
+                        const value = values[(p * tileRows + r) * tileCols + c];
+                        plane[tileCol * size + c][row - first] = Number.isNaN(value) ? null : value;
+                    });
+                }
+            }
+        }
+        return {level, first, last, planes};
+    });
+}
+
+function loadYieldMatrix(headerPath) {
+    const headerUrl = new URL(headerPath, document.baseURI);
+    return fetch(headerUrl)
+        .then(response => response.json())
+        .then(header => fetch(new URL(header.data_path, headerUrl))
+            .then(response => response.arrayBuffer())
+            .then(buffer => decodeYieldMatrix(header, buffer)));
+}
+
+// Query server (see query_server.py): the yields of the batch in view are fetched on demand
+let queryUrl = null;
+let queryMethods = null;
+let queryBlock = null; // Compound range [start, end) held in yieldMatrix
+let queryToken = 0;
+
+function loadQueryInfo(serverUrl, name, compoundCount) {
+    const token = queryToken;
+    const base = new URL(serverUrl.endsWith('/') ? serverUrl : serverUrl + '/', document.baseURI);
+    const url = new URL(`datasets/${encodeURIComponent(name)}/`, base);
+    return fetch(url)
+        .then(response => {
+            if (!response.ok) throw new Error(`Query server: HTTP ${response.status}`);
+            return response.json();
+        })
+        .then(info => {
+            if (token !== queryToken) return; // The dataset changed
+            if (info.compound_count !== compoundCount) {
+                throw new Error('Query server compounds do not match the heatmap data');
+            }
+            queryUrl = url;
+            queryMethods = info.methods;
+        });
+}
+
+function fetchYieldBlock(compounds, start, end) {
+    // Yields of compounds [start, end), as a binary block decoded like the yield matrix
+    const url = new URL('heatmap', queryUrl);
+    url.searchParams.set('rows', `${start}:${end}`);
+    url.searchParams.set('format', 'binary');
+    return fetch(url)
+        .then(response => {
+            if (!response.ok) throw new Error(`Yield block: HTTP ${response.status}`);
+            return response.arrayBuffer();
+        })
+        .then(buffer => decodeYieldMatrix({
+            shape: [end - start, queryMethods.length],
+            dtype: 'float32',
+            compounds: compounds.slice(start, end),
+            methods: queryMethods,
+        }, buffer));
+}
+
+function resetYieldData() {
+    // Drops the previous dataset's yield matrix and tiles when switching datasets
+    yieldMatrix = null;
+    tileIndex = null;
+    tileIndexUrl = null;
+    tileView = null;
+    tileRenderToken++;
+    tileCache.clear();
+    queryUrl = null;
+    queryMethods = null;
+    queryBlock = null;
+    queryToken++;
+}
+
+// Incremented per dataset load, so responses for a previous dataset are dropped
+let loadToken = 0;
+
+createApp({
+    data() {
+        return {
+            pageTitle: "Loading...",
+            graphName: "Loading...",
+            heatmapData: null,
+            yieldData: null,
+            yieldsLoaded: false,
+            compoundChunks: [],
+            batchLabels: [],
+            selectedBatchIndex: 0,
+            showText: true,
+            datasets: [],
+            datasetName: null,
+            colorscale: 'Viridis',
+            marginBottom: 100,
+            clusters: null,
+            clustered: false,
+        };
+    },
+    watch: {
+        datasetName(name) {
+            if (name) {
+                this.loadDataset(name);
+            }
+        },
+        selectedBatchIndex(newIndex) {
+            this.renderHeatmap(newIndex);
+        },
+        showText() {
+            this.renderHeatmap(this.selectedBatchIndex);
+        },
+        clustered() {
+            // Same batch sizes, so the selected batch index stays valid
+            if (!this.yieldsLoaded) return;
+            this.compoundChunks = [];
+            this.batchLabels = [];
+            this.splitCompounds();
+            this.renderHeatmap(this.selectedBatchIndex);
+        }
+    },
+    mounted() {
+        loadDatasetManifest()
+            .then(manifest => {
+                this.datasets = chartDatasets(manifest, 'heatmap');
+                const dataset = requestedDataset(this.datasets);
+                if (!dataset) throw new Error('No heatmap datasets in the manifest');
+                showDatasetInUrl(dataset.name, true);
+                this.datasetName = dataset.name;
+            })
+            .catch(error => console.error('Error loading datasets:', error));
+        // Back and Forward switch between the datasets viewed
+        window.addEventListener('popstate', () => {
+            const dataset = requestedDataset(this.datasets);
+            if (dataset) this.datasetName = dataset.name;
+        });
+    },
+    methods: {
+        loadDataset(name) {
+            // Drops the previous dataset's data and loads the selected one
+            const dataset = this.datasets.find(entry => entry.name === name);
+            const token = ++loadToken;
+            showDatasetInUrl(name, false);
+            resetYieldData();
+            resetImages();
+            this.heatmapData = null;
+            this.yieldData = null;
+            this.yieldsLoaded = false;
+            this.compoundChunks = [];
+            this.batchLabels = [];
+            this.selectedBatchIndex = 0;
+            this.colorscale = dataset.colorscale;
+            this.marginBottom = dataset.margin_bottom;
+            this.clusters = null;
+            this.clustered = false;
+            fetch(dataset.data_path)
+                .then(response => response.json())
+                .then(data => {
+                    if (token !== loadToken) return null; // Another dataset was selected
+                    this.heatmapData = data;
+                    this.pageTitle = data.page_title;
+                    this.graphName = data.graph_name;
+                    document.title = this.pageTitle;
+                    if (data.image_variants_path) loadImageVariants(data.image_variants_path);
+                    if (data.image_bundle_path) loadImageBundle(data.image_bundle_path);
+                    if (data.cluster_path && !data.tile_index_path && !dataset.query_url) {
+                        // Tiles and query blocks follow the table order, so only full data is reordered
+                        this.loadClusters(data.cluster_path, token);
+                    }
+                    if (dataset.query_url) {
+                        // Too large to ship whole: the yields are queried per batch
+                        return loadQueryInfo(dataset.query_url, name, data.compounds.length);
+                    }
+                    if (data.tile_index_path) {
+                        // Large datasets: only the tiles in view are fetched
+                        return loadTileIndex(data.tile_index_path);
+                    }
+                    if (data.yield_matrix_path) {
+                        // Binary matrix straight into typed arrays
+                        return loadYieldMatrix(data.yield_matrix_path).then(matrix => {
+                            if (token === loadToken) yieldMatrix = matrix;
+                        });
+                    }
+                    return fetch(data.yield_data_path) // Load yield data dynamically
+                        .then(response => response.json())
+                        .then(yieldData => {
+                            if (token === loadToken) this.yieldData = yieldData.yields; // Store yield values
+                        });
+                })
+                .then(() => {
+                    if (token !== loadToken) return;
+                    this.yieldsLoaded = true;
+                    this.splitCompounds(); // Slice compounds into batches of 50
+                    this.renderHeatmap(0); // Load the first batch initially
+                })
+                .catch(error => console.error('Error loading heatmap data:', error));
+        },
+        loadClusters(path, token) {
+            fetch(path)
+                .then(response => response.json())
+                .then(clusters => {
+                    // Without SciPy the build writes the table order, not worth a toggle
+                    if (token === loadToken && clusters.clustered) this.clusters = clusters;
+                })
+                .catch(error => console.error('Error loading clusters:', error));
+        },
+        displayCompounds() {
+            return this.clustered ? this.clusters.rows.order : this.heatmapData.compounds;
+        },
+        displayMethods() {
+            return this.clustered ? this.clusters.columns.order : this.heatmapData.methods;
+        },
+        splitCompounds() {
+            const compounds = this.displayCompounds();
+            const chunkSize = 50;
+            for (let i = 0; i < compounds.length; i += chunkSize) {
+                let batch = compounds.slice(i, i + chunkSize);
+                this.compoundChunks.push(batch);
+                this.batchLabels.push(`${batch[0]} - ${batch[batch.length - 1]}`);
+            }
+        },
+        yieldValue(compound, method) {
+            if (yieldMatrix) {
+                const row = yieldMatrix.compoundIndex.get(compound);
+                const col = yieldMatrix.methodIndex.get(method);
+                if (row === undefined || col === undefined) return null;
+                const value = yieldMatrix.values[row * yieldMatrix.nMethods + col];
+                return Number.isNaN(value) ? null : value;
+            }
+            return this.yieldData[compound]?.[method] ?? null;
+        },
+        batchRange(batchIndex) {
+            // Compound index range [start, end) of a batch
+            const total = this.heatmapData.compounds.length;
+            if (batchIndex === -1) return [0, total];
+            const start = this.compoundChunks.slice(0, batchIndex).reduce((sum, batch) => sum + batch.length, 0);
+            return [start, start + this.compoundChunks[batchIndex].length];
+        },
+        renderHeatmap(batchIndex) {
+            console.log("Entering renderHeatmap");
+            if (!this.heatmapData || !this.yieldsLoaded) return;
+            if (tileIndex) {
+                this.renderTiles(...this.batchRange(batchIndex));
+                return;
+            }
+            if (queryUrl) {
+                const [start, end] = this.batchRange(batchIndex);
+                if (!queryBlock || queryBlock[0] !== start || queryBlock[1] !== end) {
+                    const token = ++queryToken;
+                    fetchYieldBlock(this.heatmapData.compounds, start, end)
+                        .then(matrix => {
+                            if (token !== queryToken) return; // Another batch or dataset was selected
+                            yieldMatrix = matrix;
+                            queryBlock = [start, end];
+                            this.renderHeatmap(batchIndex);
+                        })
+                        .catch(error => console.error('Error querying yields:', error));
+                    return;
+                }
+            }
+
+            // compound and method lists
+            const methods = this.displayMethods();
+            const compoundBatch = batchIndex === -1 ? this.displayCompounds() : this.compoundChunks[batchIndex];
+            // Dynamically map yield values
+            const z_values = methods.map(method =>
+                compoundBatch.map(compound => this.yieldValue(compound, method))
+            );
+            console.log(methods, compoundBatch, z_values);
+
+            const trace1 = {
+                type: 'heatmap',
+                z: z_values,
+                x: compoundBatch,
+                y: methods,
+                colorscale: this.colorscale,
+                text: this.showText ? z_values : [],
+                texttemplate: this.showText ? '%{text:.1f}' : '',
+                hoverinfo: 'none',
+                colorbar: {
+                    title: 'Yield (%)',
+                    titleside: 'right',
+                    borderwidth: 0,
+                    dtick: 10,
+                    len: 1,
+                    orientation: 'v',
+                    thickness: 20,
+                },
+            };
+            this.plotHeatmap(trace1, {});
+        },
+        renderTiles(start, end) {
+            // Plots compounds [start, end) from the coarsest tiles that still fill the plot width
+            const width = document.getElementById('heatmap').clientWidth || window.innerWidth;
+            const token = ++tileRenderToken;
+            loadTileWindow(start, end, width)
+                .then(({level, first, last, planes}) => {
+                    if (token !== tileRenderToken) return; // A newer view was requested
+                    tileView = {level, first};
+                    const methods = tileIndex.methods;
+                    const compounds = tileIndex.compounds;
+                    // Each cell sits at the centre of the compound indices it aggregates
+                    const x = Array.from({length: last - first}, (_, i) => {
+                        const cell = first + i;
+                        const lastCompound = Math.min((cell + 1) * level.row_factor, compounds.length) - 1;
+                        return (cell * level.row_factor + lastCompound) / 2;
+                    });
+                    const y = Array.from({length: level.cols}, (_, c) => {
+                        if (level.col_factor === 1) return methods[c];
+                        const lastMethod = Math.min((c + 1) * level.col_factor, methods.length) - 1;
+                        return `${methods[c * level.col_factor]} – ${methods[lastMethod]}`;
+                    });
+                    const labelled = level.row_factor === 1 && last - first <= MAX_LABELLED_CELLS;
+                    const trace = {
+                        type: 'heatmap',
+                        z: planes[0],
+                        x,
+                        y,
+                        customdata: level.planes.length > 1
+                            ? planes[0].map((row, c) => row.map((_, i) => [planes[1][c][i], planes[2][c][i]]))
+                            : undefined,
+                        colorscale: this.colorscale,
+                        text: this.showText && labelled ? planes[0] : [],
+                        texttemplate: this.showText && labelled ? '%{text:.1f}' : '',
+                        hoverinfo: 'none',
+                        colorbar: {
+                            title: 'Yield (%)',
+                            titleside: 'right',
+                            borderwidth: 0,
+                            dtick: 10,
+                            len: 1,
+                            orientation: 'v',
+                            thickness: 20,
+                        },
+                    };
+                    this.plotHeatmap(trace, {
+                        type: 'linear',
+                        range: [start - 0.5, end - 0.5],
+                        tickvals: labelled ? x : undefined,
+                        ticktext: labelled ? x.map(i => compounds[i]) : undefined,
+                        scaleanchor: labelled ? 'y' : undefined,
+                    });
+                })
+                .catch(error => console.error('Error loading heatmap tiles:', error));
+        },
+        plotHeatmap(trace1, xaxisOverrides) {
+            const data = [trace1];
+            const fontDefault = {
+                color: 'black',
+                family: 'Courier New, monospace',
+                size: 16
+            };
+            const layout = {
+                title: {
+                    text: `<b>${this.graphName}</b>`,
+                    font: {...fontDefault, size: 32, family: 'Arial, sans-serif'},
+                    xref: 'paper',
+                    yref: 'paper',
+                    automargin: true,
+                },
+                xaxis: {
+                    title: {
+                        text: "<b>" + "Compounds" + "</b>",
+                        font: {...fontDefault, size: 24, family: 'Arial, sans-serif'},
+                        xref: 'paper',
+                        yref: 'paper',
+                        automargin: true,
+                    },
+                    scaleanchor: 'y', // Ensures 1:1 ratio
+                    scaleratio: 1,
+                    font: fontDefault,
+                    ticks: 'outside',
+                    tickangle: "auto",
+                    ...xaxisOverrides,
+                },
+                yaxis: {
+                    title: {
+                        text: "<b>" + "Methods" + "</b>",
+                        font: {...fontDefault, size: 24, family: 'Arial, sans-serif'},
+                        xref: 'paper',
+                        yref: 'paper',
+                        automargin: true,
+                    },
+                    font: fontDefault,
+                    ticks: 'outside',
+                    tickangle: "auto",
+                },
+                margin: {
+                    l: 150, r: 0, t: 50, b: this.marginBottom
+                },
+                autosize: true,
+            };
+            const config = {responsive: true};
+
+            Plotly.react('heatmap', data, layout, config);
+
+            this.setupTooltip();
+        },
+        setupTooltip() {
+            const tooltip = document.getElementById('tooltip');
+            const heatmap = document.getElementById('heatmap');
+            if (heatmap.dataset.tooltipReady) return; // Plotly.react keeps the handlers
+            heatmap.dataset.tooltipReady = 'true';
+            const formatYield = value => value !== null && value !== undefined ? value.toFixed(2) + "%" : "N/A";
+
+            heatmap.on('plotly_hover', (event) => {
+                const point = event.points[0];
+                let compoundId = point.x;
+                const method = point.y;
+                const yieldValue = point.z;
+                // determine the cell size
+                var cellSize = Math.abs(point.bbox.width || (point.bbox.x1 - point.bbox.x0));
+                if (tileIndex && tileView.level.row_factor > 1) {
+                    // Aggregated cell: compound range with mean, min and max
+                    const compounds = tileIndex.compounds;
+                    const rowFactor = tileView.level.row_factor;
+                    const cell = tileView.first + point.pointNumber[1];
+                    const firstCompound = compounds[cell * rowFactor];
+                    const lastCompound = compounds[Math.min((cell + 1) * rowFactor, compounds.length) - 1];
+                    const [minValue, maxValue] = point.customdata ?? [null, null];
+                    tooltip.innerHTML = `
+                        <div class="text-sm"><b>Compounds:</b> ${firstCompound} – ${lastCompound}</div>
+                        <div class="text-sm"><b>Method:</b> ${method}</div>
+                        <div class="text-sm"><b>Mean yield:</b> ${formatYield(yieldValue)}</div>
+                        <div class="text-sm"><b>Range:</b> ${formatYield(minValue)} – ${formatYield(maxValue)}</div>
+                    `;
+                } else {
+                    if (tileIndex) compoundId = tileIndex.compounds[point.x];
+                    // Tooltip content
+                    const imgSrc = this.heatmapData.images[compoundId];
+                    tooltip.innerHTML = `
+                        ${hoverImageHtml(compoundId, imgSrc)}
+                        <div class="text-sm"><b>Compound:</b> ${compoundId}</div>
+                        <div class="text-sm"><b>Method:</b> ${method}</div>
+                        <div class="text-sm"><b>Yield:</b> ${formatYield(yieldValue)}</div>
+                        ${tileIndex && point.customdata ? `<div class="text-sm"><b>Range:</b> ${formatYield(point.customdata[0])} – ${formatYield(point.customdata[1])}</div>` : ''}
+                    `;
+                }
+
+                // Get the bounding box of the hovered cell
+                const bbox = point.bbox || {x0: event.event.clientX, y0: event.event.clientY};
+                const cellWidth = Math.abs(bbox.x1 - bbox.x0);
+                const cellHeight = Math.abs(bbox.y1 - bbox.y0);
+                // Position the tooltip relative to the hovered cell
+                tooltip.style.left = `${bbox.x0 + cellWidth / 4 * 3}px`;
+                tooltip.style.top = `${bbox.y0 + cellHeight / 4 * 3}px`;
+                tooltip.style.display = 'block';
+            });
+
+            heatmap.on('plotly_unhover', () => {
+                tooltip.style.display = 'none';
+            });
+
+            // Tile mode: load the level matching the new zoom once zooming settles
+            let relayoutTimer = null;
+            heatmap.on('plotly_relayout', (event) => {
+                if (!tileIndex) return;
+                clearTimeout(relayoutTimer);
+                relayoutTimer = setTimeout(() => {
+                    if (event['xaxis.autorange']) {
+                        this.renderHeatmap(this.selectedBatchIndex);
+                    } else if (event['xaxis.range[0]'] !== undefined) {
+                        const total = tileIndex.compounds.length;
+                        const start = Math.max(0, Math.floor(event['xaxis.range[0]'] + 0.5));
+                        const end = Math.min(total, Math.ceil(event['xaxis.range[1]'] + 0.5));
+                        if (end > start) this.renderTiles(start, end);
+                    }
+                }, 150);
+            });
+        }
+    }
+}).mount('#app');
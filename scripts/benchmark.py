@@ -0,0 +1,569 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import statistics
+import subprocess
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+# Default benchmark sizes, as compounds x properties x methods
+DEFAULT_SIZES = ("1000x20x10", "5000x50x20")
+RESULTS_DIR = "benchmarks"
+# Relative growth of a metric that counts as a regression in --compare
+DEFAULT_THRESHOLD = 1.25
+# Wall times below this are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.05
+DATA_DIRNAME = "data_bench"
+# Same compounds, with MISSING_YIELD_FRACTION of the yields missing
+MISSING_YIELDS_DIRNAME = "data_bench_missing"
+MISSING_YIELD_FRACTION = 0.1
+# Precision used by the "_rounded" cases, as a dataset.json would set it
+ROUNDED_PRECISION = {
+    "properties": {"default": {"significant": 6}},
+    "yields": {"default": {"decimals": 1}},
+}
+
+
+def parse_size(size: str) -> dict:
+    """
+    Parses a benchmark size such as "1000x20x10".
+
+    Args:
+        size (str): Compounds x properties x methods.
+
+    Returns:
+        dict: "compounds", "properties" and "methods" counts.
+    """
+    try:
+        compounds, properties, methods = (int(part) for part in size.split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid benchmark size (expected NxMxK): {size}")
+    return {"compounds": compounds, "properties": properties, "methods": methods}
+
+
+def generate_synthetic_dataset(
+    data_dir: str,
+    image_dir: str | None,
+    n_compounds: int,
+    n_properties: int,
+    n_methods: int,
+    missing_fraction: float = 0.02,
+    missing_yield_fraction: float = 0.0,
+    seed: int = 0,
+):
+    """
+    Writes a synthetic dataset shaped like the real ones: Select_properties.pkl
+    (Compound_Name, a text column and numeric DFT-like properties), yields.pkl
+    (id plus one yield column per method), yield_data_df.pkl (the method columns)
+    and mol_image_paths_captioned.json, plus a small dummy PNG per compound.
+
+    The same arguments always produce the same data.
+
+    Args:
+        data_dir (str): Folder to write the data files to.
+        image_dir (str | None): Folder to write the dummy images to, or None to
+            skip the images and mol_image_paths_captioned.json.
+        n_compounds (int): Number of compounds.
+        n_properties (int): Number of numeric properties.
+        n_methods (int): Number of yield methods.
+        missing_fraction (float): Fraction of property values left missing.
+        missing_yield_fraction (float): Fraction of yields left missing (written
+            as null in the yield JSON and NaN in the yield matrix).
+        seed (int): Random seed.
+
+    Returns:
+        None
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    compounds = [f"Cmp{i:06d}" for i in range(1, n_compounds + 1)]
+
+    # Properties span several orders of magnitude, like the DFT descriptors
+    properties = pd.DataFrame(
+        {
+            "Compound_Name": compounds,
+            "Class": rng.choice(["pyridine", "pyrimidine", "pyrazine"], n_compounds),
+        }
+    )
+    scales = 10.0 ** rng.integers(-2, 4, n_properties)
+    values = rng.normal(size=(n_compounds, n_properties)) * scales
+    values[rng.random(values.shape) < missing_fraction] = np.nan
+    property_columns = [f"Property {j:03d} (a.u.)" for j in range(n_properties)]
+    properties = pd.concat(
+        [properties, pd.DataFrame(values, columns=property_columns)], axis=1
+    )
+    properties.to_pickle(os.path.join(data_dir, "Select_properties.pkl"))
+
+    methods = [f"Method {k:03d}" for k in range(n_methods)]
+    yields = np.round(rng.uniform(0, 100, size=(n_compounds, n_methods)), 2)
+    # Drawn after the yields, so the present yields match the complete dataset
+    yields[rng.random(yields.shape) < missing_yield_fraction] = np.nan
+    yield_data_df = pd.DataFrame(yields, columns=methods)
+    yield_data_df.to_pickle(os.path.join(data_dir, "yield_data_df.pkl"))
+    yield_data_df.insert(0, "id", compounds)
+    yield_data_df.to_pickle(os.path.join(data_dir, "yields.pkl"))
+
+    if image_dir is None:
+        return
+    os.makedirs(image_dir, exist_ok=True)
+    image_paths = {}
+    colors = rng.integers(0, 256, size=(n_compounds, 3))
+    for compound, color in zip(compounds, colors):
+        filename = f"{compound}_captioned.png"
+        Image.new("RGB", (96, 64), tuple(int(c) for c in color)).save(
+            os.path.join(image_dir, filename)
+        )
+        image_paths[compound] = f"images/{filename}"
+    with open(os.path.join(data_dir, "mol_image_paths_captioned.json"), "w") as f:
+        json.dump(image_paths, f)
+
+
+def _write_dummy_pages(folder: str, count: int):
+    # Pages for the index benchmark, spread over a few tabs
+    for i in range(count):
+        prefix = ("Barchart", "Yield Heatmap", "Report")[i % 3]
+        with open(os.path.join(folder, f"{prefix}_{i:04d}.html"), "w") as f:
+            f.write("<!DOCTYPE html><html><body></body></html>\n")
+
+
+def _benchmark_cases() -> dict:
+    """
+    Maps each case name to a function that runs one generator on the synthetic
+    dataset (from the work directory) and returns the paths it wrote.
+    """
+    from generate_barchart_json import generate_bar_chart_and_yield_json
+    from generate_cluster_json import generate_cluster_json
+    from generate_heatmap_json import (
+        generate_heatmap_json,
+        generate_heatmap_tiles,
+        generate_yield_binary,
+        generate_yield_json,
+    )
+    from generate_index_page import SEARCH_INDEX_PATH, generate_index_page
+    from generate_similar_compounds import generate_similar_compounds
+    from generate_stats_json import generate_stats_json
+
+    image_dir = os.path.join("docs", "images")
+
+    def bar_chart(output_format, precision=None):
+        output_path = os.path.join("docs", "data", "barchart", "bench.json")
+        generate_bar_chart_and_yield_json(
+            output_path,
+            os.path.join("docs", "data", "yields", "bench_barchart_yields.json"),
+            "Select_properties.pkl",
+            DATA_DIRNAME,
+            image_dir,
+            "Benchmark Bar Chart",
+            output_format=output_format,
+            write_yield_json=False,
+            property_precision=precision,
+        )
+        return [output_path, os.path.splitext(output_path)[0]]
+
+    def heatmap():
+        output_path = os.path.join("docs", "data", "heatmap", "bench.json")
+        generate_heatmap_json(
+            output_path,
+            "data/yields/bench_yields.json",
+            DATA_DIRNAME,
+            image_dir,
+            "Benchmark Heatmap",
+            "Yields Map",
+        )
+        return [output_path]
+
+    def yield_json(precision=None, data_dir=DATA_DIRNAME):
+        generate_yield_json("data/yields/bench_yields.json", data_dir, precision)
+        return [os.path.join("docs", "data", "yields", "bench_yields.json")]
+
+    def yield_binary(data_dir=DATA_DIRNAME):
+        generate_yield_binary("data/yields/bench_matrix.json", data_dir)
+        return [
+            os.path.join("docs", "data", "yields", "bench_matrix.json"),
+            os.path.join("docs", "data", "yields", "bench_matrix.bin"),
+        ]
+
+    def heatmap_tiles():
+        generate_heatmap_tiles("data/tiles/bench_tiles.json", DATA_DIRNAME)
+        return [
+            os.path.join("docs", "data", "tiles", "bench_tiles.json"),
+            os.path.join("docs", "data", "tiles", "bench_tiles"),
+        ]
+
+    def heatmap_clusters():
+        # A fresh cache, so the clustering itself is measured
+        cache_dir = "bench_cluster_cache"
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        output_path = os.path.join("docs", "data", "clusters", "bench_clusters.json")
+        generate_cluster_json(output_path, DATA_DIRNAME, cache_dir=cache_dir)
+        return [output_path]
+
+    def stats():
+        output_path = os.path.join("docs", "data", "stats", "bench_stats.json")
+        generate_stats_json(output_path, "Select_properties.pkl", DATA_DIRNAME)
+        return [output_path]
+
+    def similar_compounds():
+        generate_similar_compounds(
+            "data/similar/bench_similar.json", "Select_properties.pkl", DATA_DIRNAME
+        )
+        return [
+            os.path.join("docs", "data", "similar", "bench_similar.json"),
+            os.path.join("docs", "data", "similar", "bench_similar.bin"),
+        ]
+
+    def index_page():
+        generate_index_page("docs")
+        return [
+            os.path.join("docs", "index.html"),
+            os.path.join("docs", SEARCH_INDEX_PATH),
+        ]
+
+    return {
+        "barchart_columnar": lambda: bar_chart("columnar"),
+        "barchart_sharded": lambda: bar_chart("sharded"),
+        "barchart_sharded_rounded": lambda: bar_chart(
+            "sharded", ROUNDED_PRECISION["properties"]
+        ),
+        "heatmap_json": heatmap,
+        "yield_json": yield_json,
+        "yield_json_rounded": lambda: yield_json(ROUNDED_PRECISION["yields"]),
+        "yield_json_missing": lambda: yield_json(data_dir=MISSING_YIELDS_DIRNAME),
+        "yield_binary": yield_binary,
+        "yield_binary_missing": lambda: yield_binary(MISSING_YIELDS_DIRNAME),
+        "heatmap_tiles": heatmap_tiles,
+        "heatmap_clusters": heatmap_clusters,
+        "stats": stats,
+        "similar_compounds": similar_compounds,
+        "index_page": index_page,
+    }
+
+
+def _peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # KiB on Linux
+
+
+def _output_sizes(paths: list[str]) -> dict:
+    # Raw bytes of the written files (walking directories), and of their .gz siblings
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                files += [os.path.join(root, filename) for filename in filenames]
+        elif os.path.exists(path):
+            files.append(path)
+    sizes = {"output_files": 0, "output_bytes": 0, "gzip_bytes": 0}
+    for file in files:
+        if file.endswith((".gz", ".br")):
+            continue
+        sizes["output_files"] += 1
+        sizes["output_bytes"] += os.path.getsize(file)
+        if os.path.exists(f"{file}.gz"):
+            sizes["gzip_bytes"] += os.path.getsize(f"{file}.gz")
+    return sizes
+
+
+def run_case(case: str, work_dir: str) -> dict:
+    """
+    Runs one benchmark case in the current process. Called in a fresh
+    subprocess per run (see benchmark_case), so the peak RSS belongs to this
+    case alone.
+
+    Args:
+        case (str): Case name (see _benchmark_cases).
+        work_dir (str): Directory holding the synthetic dataset and docs folder.
+
+    Returns:
+        dict: Wall time, peak RSS (before and after the generator) and output sizes.
+    """
+    os.chdir(work_dir)
+    cases = _benchmark_cases()
+    baseline_rss = _peak_rss_bytes()  # Interpreter plus imported libraries
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = cases[case]()
+    wall_s = time.perf_counter() - start
+
+    return {
+        "wall_s": wall_s,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "baseline_rss_bytes": baseline_rss,
+        **_output_sizes(outputs),
+    }
+
+
+def benchmark_case(case: str, work_dir: str, repeat: int) -> dict:
+    """
+    Runs a case repeat times, each in a new Python process.
+
+    Args:
+        case (str): Case name.
+        work_dir (str): Directory holding the synthetic dataset and docs folder.
+        repeat (int): Number of runs.
+
+    Returns:
+        dict: Median wall time over the runs, the highest peak RSS, the output
+            sizes, and every run's wall time; or the error of a failed run.
+    """
+    runs = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-case", case, work_dir],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()
+            return {"case": case, "error": error[-1] if error else "failed"}
+        runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    peaks = [run["peak_rss_bytes"] for run in runs if run["peak_rss_bytes"]]
+    return {
+        "case": case,
+        "wall_s": statistics.median(run["wall_s"] for run in runs),
+        "wall_s_runs": [run["wall_s"] for run in runs],
+        "peak_rss_bytes": max(peaks) if peaks else None,
+        "baseline_rss_bytes": runs[0]["baseline_rss_bytes"],
+        "output_files": runs[-1]["output_files"],
+        "output_bytes": runs[-1]["output_bytes"],
+        "gzip_bytes": runs[-1]["gzip_bytes"],
+    }
+
+
+def run_benchmarks(
+    sizes: list[str],
+    cases: list[str] | None = None,
+    repeat: int = 3,
+    index_pages: int = 100,
+    seed: int = 0,
+    keep: bool = False,
+) -> dict:
+    """
+    Benchmarks the generators on synthetic datasets of each size.
+
+    Args:
+        sizes (list[str]): Dataset sizes as "NxMxK" (compounds x properties x methods).
+        cases (list[str] | None): Cases to run (all if None).
+        repeat (int): Runs per case; the median wall time is reported.
+        index_pages (int): Number of pages listed by the index page benchmark.
+        seed (int): Random seed of the synthetic data.
+        keep (bool): Keep the work directories (their paths are printed).
+
+    Returns:
+        dict: Benchmark results, with the environment they were measured in.
+    """
+    all_cases = list(_benchmark_cases())
+    cases = cases or all_cases
+    unknown = sorted(set(cases) - set(all_cases))
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases: {', '.join(unknown)}")
+
+    results = []
+    for size in sizes:
+        counts = parse_size(size)
+        work_dir = tempfile.mkdtemp(prefix=f"benchmark-{size}-")
+        try:
+            print(f"== {size}: generating synthetic dataset in {work_dir} ==")
+            generate_synthetic_dataset(
+                os.path.join(work_dir, DATA_DIRNAME),
+                os.path.join(work_dir, "docs", "images"),
+                counts["compounds"],
+                counts["properties"],
+                counts["methods"],
+                seed=seed,
+            )
+            generate_synthetic_dataset(
+                os.path.join(work_dir, MISSING_YIELDS_DIRNAME),
+                None,
+                counts["compounds"],
+                counts["properties"],
+                counts["methods"],
+                missing_yield_fraction=MISSING_YIELD_FRACTION,
+                seed=seed,
+            )
+            for folder in ("barchart", "heatmap", "yields", "tiles"):
+                os.makedirs(os.path.join(work_dir, "docs", "data", folder))
+            _write_dummy_pages(os.path.join(work_dir, "docs"), index_pages)
+
+            for case in cases:
+                result = {
+                    "size": size,
+                    **counts,
+                    **benchmark_case(case, work_dir, repeat),
+                }
+                results.append(result)
+                print(format_result(result))
+        finally:
+            if not keep:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "index_pages": index_pages,
+        "results": results,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return process.stdout.strip() or None
+
+
+def _megabytes(value: int | None) -> str:
+    return "n/a" if value is None else f"{value / 1e6:.1f} MB"
+
+
+def format_result(result: dict) -> str:
+    """Formats one benchmark result as a log line."""
+    if "error" in result:
+        return f"{result['size']:>14} {result['case']:<18} FAILED: {result['error']}"
+    return (
+        f"{result['size']:>14} {result['case']:<18} {result['wall_s']:8.3f} s"
+        f"  peak {_megabytes(result['peak_rss_bytes']):>9}"
+        f"  out {result['output_bytes']:>12,} B ({result['gzip_bytes']:,} B gzip)"
+    )
+
+
+def compare_results(
+    baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """
+    Compares two benchmark runs case by case and size by size.
+
+    Args:
+        baseline (dict): Earlier results (see run_benchmarks).
+        current (dict): New results.
+        threshold (float): Ratio above which a metric counts as a regression.
+
+    Returns:
+        list[str]: Descriptions of the regressions found.
+    """
+    previous = {
+        (result["case"], result["size"]): result
+        for result in baseline["results"]
+        if "error" not in result
+    }
+    regressions = []
+    print(f"Comparing with the baseline from {baseline['created']}:")
+    for result in current["results"]:
+        key = (result["case"], result["size"])
+        if key not in previous:
+            continue
+        if "error" in result:
+            regressions.append(f"{key[0]} {key[1]}: failed ({result['error']})")
+            continue
+        ratios = []
+        for metric in ("wall_s", "peak_rss_bytes", "output_bytes"):
+            old, new = previous[key].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            ratios.append(f"{metric} x{ratio:.2f}")
+            noisy = metric == "wall_s" and max(old, new) < MIN_COMPARED_SECONDS
+            if ratio > threshold and not noisy:
+                regressions.append(f"{key[0]} {key[1]}: {metric} x{ratio:.2f}")
+        print(f"{key[1]:>14} {key[0]:<18} " + ", ".join(ratios))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the site generators on synthetic datasets."
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(DEFAULT_SIZES),
+        help="Comma-separated dataset sizes as compounds x properties x methods "
+        f"(default: {','.join(DEFAULT_SIZES)})",
+    )
+    parser.add_argument("--cases", help="Comma-separated cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case")
+    parser.add_argument(
+        "--index-pages",
+        type=int,
+        default=100,
+        help="Pages listed by the index page benchmark",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed")
+    parser.add_argument(
+        "--output",
+        help=f"Results JSON path (default: {RESULTS_DIR}/benchmark-<timestamp>.json)",
+    )
+    parser.add_argument("--compare", help="Baseline results JSON to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Ratio above which a metric counts as a regression",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the synthetic work directories"
+    )
+    parser.add_argument("--run-case", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        # Worker mode: one case, one process
+        print(json.dumps(run_case(*args.run_case)))
+        return
+
+    results = run_benchmarks(
+        args.sizes.split(","),
+        args.cases.split(",") if args.cases else None,
+        repeat=args.repeat,
+        index_pages=args.index_pages,
+        seed=args.seed,
+        keep=args.keep,
+    )
+
+    output_path = args.output or os.path.join(
+        RESULTS_DIR,
+        f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+    )
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Benchmark results saved: {output_path}")
+
+    failed = [result for result in results["results"] if "error" in result]
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r") as f:
+            regressions = compare_results(json.load(f), results, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
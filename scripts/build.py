@@ -0,0 +1,769 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from data_io import resolve_table, table_exists
+import profiling
+from fingerprint import file_digest, fingerprint_site
+from generate_barchart_json import generate_bar_chart_and_yield_json
+from generate_cluster_json import generate_cluster_json
+from generate_dataset_manifest import (
+    BAR_CHART_DATA_PATH,
+    DATASET_MANIFEST_PATH,
+    HEATMAP_DATA_PATH,
+    YIELD_DATA_PATH,
+    generate_dataset_manifest,
+)
+from generate_heatmap_json import (
+    generate_heatmap_json,
+    generate_heatmap_tiles,
+    generate_yield_binary,
+    generate_yield_json,
+    generate_yield_versions,
+)
+from generate_image_variants import generate_image_bundle, generate_image_variants
+from generate_similar_compounds import generate_similar_compounds
+from generate_stats_json import generate_stats_json
+from generate_index_page import SEARCH_INDEX_PATH, generate_index_page
+
+# Content hashes of the inputs each artifact was last built from
+BUILD_MANIFEST = ".build_manifest.json"
+DOCS_DIR = "docs"
+IMAGE_DIR = os.path.join("docs", "images")
+# Scripts and styles shared by the chart apps (barchart.html, heatmap.html)
+ASSETS_DIR = os.path.join("docs", "assets")
+SCRIPTS_DIR = "scripts"
+DATA_IO_SCRIPT = os.path.join(SCRIPTS_DIR, "data_io.py")
+NUMERIC_ENGINE_SCRIPT = os.path.join(SCRIPTS_DIR, "numeric_engine.py")
+VERSIONED_DATA_SCRIPT = os.path.join(SCRIPTS_DIR, "versioned_data.py")
+# Every generator writes through json_output, which records stages in profiling
+SHARED_SCRIPTS = [
+    os.path.join(SCRIPTS_DIR, "json_output.py"),
+    os.path.join(SCRIPTS_DIR, "profiling.py"),
+]
+
+# Optional per-dataset overrides of the defaults in discover_datasets
+DATASET_CONFIG = "dataset.json"
+
+
+@dataclass
+class Artifact:
+    """A generated file (or group of files) and the inputs it is built from."""
+
+    name: str
+    inputs: list[str]
+    outputs: list[str]
+    build: Callable[[], None]
+
+
+def discover_datasets(root: str = ".") -> list[dict]:
+    """
+    Discovers the dataset directories (data_*) that contain yield data.
+
+    Each dataset is named after its directory suffix (data_252 -> "252"). The
+    page titles default to the ones used for the existing datasets and can be
+    overridden, along with any other key, by a dataset.json file in the
+    directory. A bar chart and a similar compounds index are generated when
+    Select_properties.pkl exists, and a heatmap tile pyramid when the
+    configuration sets "heatmap_tiles" to true.
+    Clustered heatmap orders are generated when it sets "heatmap_clusters" to
+    true.
+    A "precision" entry sets the precision of the "yields" and "properties"
+    columns written to JSON, e.g. {"yields": {"default": {"decimals": 1}},
+    "properties": {"default": {"significant": 6}}} (see
+    numeric_engine.validate_precision). "heatmap_colorscale" and
+    "heatmap_margin_bottom" style the heatmap in the chart app (see
+    generate_dataset_manifest), and "query_server" sets the URL of the query
+    server (see query_server) the heatmap loads its yields from. A "prebuilt"
+    dataset has no source tables: its
+    chart data is committed as is and only listed in the dataset manifest.
+
+    Args:
+        root (str): Directory containing the data_* folders.
+
+    Returns:
+        list[dict]: Dataset configurations, sorted by directory name.
+    """
+    datasets = []
+    for data_dir in sorted(glob.glob(os.path.join(root, "data_*"))):
+        config_path = os.path.join(data_dir, DATASET_CONFIG)
+        if not os.path.isdir(data_dir):
+            continue
+        if not (
+            table_exists(os.path.join(data_dir, "yields.pkl"))
+            or os.path.exists(config_path)
+        ):
+            print(f"Skipping {data_dir}: no yields.pkl or {DATASET_CONFIG}")
+            continue
+
+        name = os.path.basename(data_dir)[len("data_") :]
+        dataset = {
+            "name": name,
+            "data_dir": os.path.relpath(data_dir),
+            "heatmap_title": f"Yields Map of {name} Compounds",
+            "graph_name": "Yields Map",
+        }
+        if table_exists(os.path.join(data_dir, "Select_properties.pkl")):
+            dataset["bar_chart_title"] = (
+                f"Bar Chart of {name} Compounds with DFT Properties"
+            )
+        if os.path.exists(config_path):
+            with open(config_path, "r") as f:
+                dataset.update(json.load(f))
+        datasets.append(dataset)
+    return datasets
+
+
+def dataset_artifacts(dataset: dict) -> list[Artifact]:
+    """
+    Declares the artifacts generated for one dataset.
+
+    Args:
+        dataset (dict): Dataset configuration (see discover_datasets).
+
+    Returns:
+        list[Artifact]: Yield JSON, yield versions, yield matrix, image variants,
+            image bundle, heatmap tiles, heatmap clusters, heatmap, statistics,
+            similar compounds and bar chart artifacts.
+    """
+    if dataset.get("prebuilt"):
+        return []
+    name = dataset["name"]
+    data_dir = dataset["data_dir"]
+    precision = dataset.get("precision", {})
+    heatmap_script = os.path.join(SCRIPTS_DIR, "generate_heatmap_json.py")
+    barchart_script = os.path.join(SCRIPTS_DIR, "generate_barchart_json.py")
+    images_script = os.path.join(SCRIPTS_DIR, "generate_image_variants.py")
+    stats_script = os.path.join(SCRIPTS_DIR, "generate_stats_json.py")
+    cluster_script = os.path.join(SCRIPTS_DIR, "generate_cluster_json.py")
+    similar_script = os.path.join(SCRIPTS_DIR, "generate_similar_compounds.py")
+    image_paths_json = os.path.join(data_dir, "mol_image_paths_captioned.json")
+    config_path = os.path.join(data_dir, DATASET_CONFIG)
+    # Tables may be stored as Parquet or Arrow files instead of pickles
+    yield_inputs = [
+        resolve_table(os.path.join(data_dir, "yields.pkl")),
+        resolve_table(os.path.join(data_dir, "yield_data_df.pkl")),
+        heatmap_script,
+        DATA_IO_SCRIPT,
+        NUMERIC_ENGINE_SCRIPT,
+    ]
+
+    # Paths relative to docs, as referenced by the pages
+    yield_json_path = YIELD_DATA_PATH.format(name=name)
+    yield_matrix_path = f"data/yields/{name}_yields_matrix.json"
+    yield_versions_path = f"data/yields/{name}_yields_versions.json"
+    image_variants_path = f"data/images/{name}_images.json"
+    image_bundle_path = f"data/images/{name}_image_bundle.json"
+    stats_path = f"data/stats/{name}_stats.json"
+    similar_path = f"data/similar/{name}_similar.json"
+    tile_index_path = (
+        f"data/tiles/{name}_tiles.json" if dataset.get("heatmap_tiles") else None
+    )
+    cluster_path = (
+        f"data/clusters/{name}_clusters.json"
+        if dataset.get("heatmap_clusters")
+        else None
+    )
+    heatmap_json_path = os.path.join(DOCS_DIR, HEATMAP_DATA_PATH.format(name=name))
+    bar_chart_json_path = os.path.join(DOCS_DIR, BAR_CHART_DATA_PATH.format(name=name))
+
+    artifacts = [
+        Artifact(
+            f"{name}:yields",
+            # The config sets the precision of the yields
+            yield_inputs + [config_path],
+            [os.path.join(DOCS_DIR, yield_json_path)],
+            partial(
+                generate_yield_json,
+                yield_json_path,
+                data_dir,
+                precision.get("yields"),
+            ),
+        ),
+        Artifact(
+            f"{name}:yield-versions",
+            yield_inputs + [VERSIONED_DATA_SCRIPT, config_path],
+            [os.path.join(DOCS_DIR, yield_versions_path)],
+            partial(
+                generate_yield_versions,
+                yield_versions_path,
+                data_dir,
+                precision=precision.get("yields"),
+            ),
+        ),
+        Artifact(
+            f"{name}:yield-matrix",
+            yield_inputs,
+            [
+                os.path.join(DOCS_DIR, yield_matrix_path),
+                os.path.join(DOCS_DIR, os.path.splitext(yield_matrix_path)[0] + ".bin"),
+            ],
+            partial(generate_yield_binary, yield_matrix_path, data_dir),
+        ),
+        Artifact(
+            f"{name}:images",
+            [image_paths_json, images_script] + source_images(image_paths_json),
+            [os.path.join(DOCS_DIR, image_variants_path)],
+            partial(
+                generate_image_variants,
+                os.path.join(DOCS_DIR, image_variants_path),
+                data_dir,
+                IMAGE_DIR,
+            ),
+        ),
+        Artifact(
+            f"{name}:image-bundle",
+            [image_paths_json, images_script] + source_images(image_paths_json),
+            [os.path.join(DOCS_DIR, image_bundle_path)],
+            partial(
+                generate_image_bundle,
+                os.path.join(DOCS_DIR, image_bundle_path),
+                data_dir,
+                IMAGE_DIR,
+            ),
+        ),
+    ]
+    if tile_index_path:
+        artifacts.append(
+            Artifact(
+                f"{name}:tiles",
+                yield_inputs,
+                [os.path.join(DOCS_DIR, tile_index_path)],
+                partial(generate_heatmap_tiles, tile_index_path, data_dir),
+            )
+        )
+    if cluster_path:
+        artifacts.append(
+            Artifact(
+                f"{name}:clusters",
+                yield_inputs + [cluster_script],
+                [os.path.join(DOCS_DIR, cluster_path)],
+                partial(
+                    generate_cluster_json,
+                    os.path.join(DOCS_DIR, cluster_path),
+                    data_dir,
+                ),
+            )
+        )
+    artifacts.append(
+        Artifact(
+            f"{name}:heatmap",
+            # The config decides whether the heatmap references tiles and clusters
+            yield_inputs + [image_paths_json, config_path],
+            [heatmap_json_path],
+            partial(
+                generate_heatmap_json,
+                heatmap_json_path,
+                yield_json_path,
+                data_dir,
+                IMAGE_DIR,
+                dataset["heatmap_title"],
+                dataset["graph_name"],
+                yield_matrix_path=yield_matrix_path,
+                image_variants_path=image_variants_path,
+                image_bundle_path=image_bundle_path,
+                tile_index_path=tile_index_path,
+                cluster_path=cluster_path,
+            ),
+        )
+    )
+    if dataset.get("bar_chart_title"):
+        properties_table = resolve_table(
+            os.path.join(data_dir, "Select_properties.pkl")
+        )
+        artifacts.append(
+            Artifact(
+                f"{name}:stats",
+                yield_inputs + [properties_table, stats_script],
+                [os.path.join(DOCS_DIR, stats_path)],
+                partial(
+                    generate_stats_json,
+                    os.path.join(DOCS_DIR, stats_path),
+                    "Select_properties.pkl",
+                    data_dir,
+                ),
+            )
+        )
+        artifacts.append(
+            Artifact(
+                f"{name}:similar",
+                [properties_table, similar_script, DATA_IO_SCRIPT],
+                [
+                    os.path.join(DOCS_DIR, similar_path),
+                    os.path.join(DOCS_DIR, os.path.splitext(similar_path)[0] + ".bin"),
+                ],
+                partial(
+                    generate_similar_compounds,
+                    similar_path,
+                    "Select_properties.pkl",
+                    data_dir,
+                ),
+            )
+        )
+        # The yields JSON is shared with the heatmap and built by the yields artifact
+        artifacts.append(
+            Artifact(
+                f"{name}:barchart",
+                [
+                    properties_table,
+                    image_paths_json,
+                    barchart_script,
+                    DATA_IO_SCRIPT,
+                    NUMERIC_ENGINE_SCRIPT,
+                    config_path,
+                ],
+                [bar_chart_json_path],
+                partial(
+                    generate_bar_chart_and_yield_json,
+                    bar_chart_json_path,
+                    os.path.join(DOCS_DIR, yield_json_path),
+                    "Select_properties.pkl",
+                    data_dir,
+                    IMAGE_DIR,
+                    dataset["bar_chart_title"],
+                    output_format="sharded",
+                    write_yield_json=False,
+                    image_variants_path=image_variants_path,
+                    image_bundle_path=image_bundle_path,
+                    stats_path=stats_path,
+                    yield_versions_path=yield_versions_path,
+                    similar_compounds_path=similar_path,
+                    property_precision=precision.get("properties"),
+                ),
+            )
+        )
+    for artifact in artifacts:
+        artifact.inputs += SHARED_SCRIPTS
+    return artifacts
+
+
+def source_images(image_paths_json: str) -> list[str]:
+    """
+    Lists the existing source images referenced by a dataset, so that editing
+    an image rebuilds its variants.
+
+    Args:
+        image_paths_json (str): Path to mol_image_paths_captioned.json.
+
+    Returns:
+        list[str]: Paths of the referenced images that exist in IMAGE_DIR.
+    """
+    if not os.path.exists(image_paths_json):
+        return []
+    with open(image_paths_json, "r") as f:
+        mol_image_paths = json.load(f)
+    paths = {
+        os.path.join(IMAGE_DIR, os.path.basename(img_path.replace("\\", "/")))
+        for img_path in mol_image_paths.values()
+    }
+    return sorted(path for path in paths if os.path.exists(path))
+
+
+def dataset_manifest_artifact(datasets: list[dict]) -> Artifact:
+    """
+    Declares the dataset manifest artifact, which lists the chart data of every
+    dataset for the chart apps.
+
+    Args:
+        datasets (list[dict]): Dataset configurations (see discover_datasets).
+
+    Returns:
+        Artifact: The dataset manifest artifact.
+    """
+    # The configs set the titles and styles; the chart data decides the charts
+    chart_data = [
+        os.path.join(DOCS_DIR, template.format(name=dataset["name"]))
+        for dataset in datasets
+        for template in (HEATMAP_DATA_PATH, BAR_CHART_DATA_PATH)
+    ]
+    return Artifact(
+        "datasets",
+        [os.path.join(dataset["data_dir"], DATASET_CONFIG) for dataset in datasets]
+        + chart_data
+        + [os.path.join(SCRIPTS_DIR, "generate_dataset_manifest.py")]
+        + SHARED_SCRIPTS,
+        [os.path.join(DOCS_DIR, DATASET_MANIFEST_PATH)],
+        partial(generate_dataset_manifest, datasets, DOCS_DIR),
+    )
+
+
+def index_artifact(file_cache: dict | None = None) -> Artifact:
+    """
+    Declares the index page artifact, built from the other HTML pages in docs
+    and the datasets of the chart apps.
+
+    Args:
+        file_cache (dict | None): Cached file digests (see file_digest), used to
+            fingerprint the page links.
+
+    Returns:
+        Artifact: The index page and search index artifact.
+    """
+    index_path = os.path.join(DOCS_DIR, "index.html")
+    pages = sorted(
+        os.path.join(DOCS_DIR, f)
+        for f in os.listdir(DOCS_DIR)
+        if f.endswith(".html") and f != "index.html"
+    )
+    return Artifact(
+        "index",
+        pages
+        + [
+            os.path.join(DOCS_DIR, DATASET_MANIFEST_PATH),
+            os.path.join(SCRIPTS_DIR, "generate_index_page.py"),
+            os.path.join(SCRIPTS_DIR, "fingerprint.py"),
+        ]
+        + SHARED_SCRIPTS,
+        [index_path, os.path.join(DOCS_DIR, SEARCH_INDEX_PATH)],
+        partial(generate_index_page, DOCS_DIR, file_cache),
+    )
+
+
+def select_artifacts(artifacts: list[Artifact], targets: list[str]) -> list[Artifact]:
+    """
+    Filters artifacts by name or dataset prefix.
+
+    Args:
+        artifacts (list[Artifact]): Declared artifacts.
+        targets (list[str]): Artifact names ("252:heatmap") or dataset names
+            ("252"); an empty list selects every artifact.
+
+    Returns:
+        list[Artifact]: The selected artifacts, in their original order.
+    """
+    if not targets:
+        return artifacts
+    return [
+        artifact
+        for artifact in artifacts
+        if any(
+            artifact.name == target or artifact.name.startswith(f"{target}:")
+            for target in targets
+        )
+    ]
+
+
+def load_manifest(manifest_path: str) -> dict:
+    """
+    Loads the build manifest, or an empty one if it does not exist yet.
+
+    Args:
+        manifest_path (str): Path to the build manifest.
+
+    Returns:
+        dict: Cached file digests ("files") and per-artifact input digests ("artifacts").
+    """
+    if not os.path.exists(manifest_path):
+        return {"files": {}, "artifacts": {}}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def build_artifacts(
+    artifacts: list[Artifact],
+    manifest: dict,
+    force: bool = False,
+    dry_run: bool = False,
+) -> bool:
+    """
+    Builds every artifact whose inputs changed since the last recorded build.
+
+    Args:
+        artifacts (list[Artifact]): Artifacts to consider, in build order.
+        manifest (dict): Build manifest, updated in place.
+        force (bool): Rebuild every artifact regardless of the manifest.
+        dry_run (bool): Only report which artifacts are stale.
+
+    Returns:
+        bool: True if every artifact is up to date or was built successfully.
+    """
+    success = True
+
+    for artifact in artifacts:
+        with profiling.stage(f"{artifact.name}/hash_inputs"):
+            digests = {
+                path: file_digest(path, manifest["files"]) for path in artifact.inputs
+            }
+        record = manifest["artifacts"].get(artifact.name)
+        up_to_date = (
+            not force
+            and record is not None
+            and record["inputs"] == digests
+            and all(os.path.exists(path) for path in artifact.outputs)
+        )
+        if up_to_date:
+            print(f"[skip] {artifact.name}")
+            continue
+        if dry_run:
+            print(f"[stale] {artifact.name}")
+            continue
+
+        print(f"[build] {artifact.name}")
+        try:
+            # Generator stages are recorded under the artifact name
+            with profiling.stage(artifact.name):
+                artifact.build()
+        except Exception as e:
+            print(f"[fail] {artifact.name}: {e}")
+            manifest["artifacts"].pop(artifact.name, None)
+            success = False
+            continue
+        manifest["artifacts"][artifact.name] = {
+            "inputs": digests,
+            "outputs": artifact.outputs,
+        }
+    return success
+
+
+def refresh_input_digests(artifacts: list[Artifact], manifest: dict):
+    """
+    Records the current input digests of artifacts that are built and up to
+    date. Called after fingerprinting, which rewrites the "?v=" hashes in data
+    files that later artifacts read (e.g. the chart data listed in the dataset
+    manifest), so the next build does not see those inputs as changed.
+
+    Args:
+        artifacts (list[Artifact]): Artifacts considered in this build.
+        manifest (dict): Build manifest, updated in place.
+
+    Returns:
+        None
+    """
+    for artifact in artifacts:
+        record = manifest["artifacts"].get(artifact.name)
+        if record is not None:
+            record["inputs"] = {
+                path: file_digest(path, manifest["files"]) for path in artifact.inputs
+            }
+
+
+def build_dataset(
+    dataset: dict,
+    manifest: dict,
+    targets: list[str],
+    force: bool,
+    dry_run: bool,
+    profile: bool = False,
+    cprofile: bool = False,
+) -> dict:
+    """
+    Builds the artifacts of one dataset, capturing its log output. Runs in a
+    worker process, so the manifest is a copy and the changes are returned.
+
+    Args:
+        dataset (dict): Dataset configuration.
+        manifest (dict): Snapshot of the build manifest.
+        targets (list[str]): Artifact selection (see select_artifacts).
+        force (bool): Rebuild every artifact regardless of the manifest.
+        dry_run (bool): Only report which artifacts are stale.
+        profile (bool): Record the build stages (see profiling).
+        cprofile (bool): Also run cProfile, dumped to a temporary file.
+
+    Returns:
+        dict: Success flag, captured log, the dataset's updated manifest entries,
+            and the stage records and cProfile dump path when profiling.
+    """
+    profiling.disable()  # Drop any profiler inherited from a forked parent
+    if profile:
+        profiling.enable(cprofile=cprofile)
+    artifacts = select_artifacts(dataset_artifacts(dataset), targets)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            success = build_artifacts(artifacts, manifest, force, dry_run)
+        except Exception as e:
+            print(f"[fail] {dataset['name']}: {e}")
+            success = False
+    profiler = profiling.disable()
+    return {
+        "profile": profiler.records if profiler else None,
+        "cprofile": profiler.dump_cprofile() if profiler else None,
+        "success": success,
+        "log": log.getvalue(),
+        "artifacts": {
+            artifact.name: manifest["artifacts"].get(artifact.name)
+            for artifact in artifacts
+        },
+        "files": manifest["files"],
+    }
+
+
+def run_build(
+    datasets: list[dict],
+    targets: list[str] | None = None,
+    manifest_path: str = BUILD_MANIFEST,
+    jobs: int | None = None,
+    force: bool = False,
+    dry_run: bool = False,
+    profile_path: str | None = None,
+    cprofile_path: str | None = None,
+) -> bool:
+    """
+    Builds the datasets concurrently on a process pool, then the dataset
+    manifest and the index page.
+
+    Logs are printed per dataset, in dataset order, once each dataset finishes.
+    When profiling, the stage timings of every process are merged into one
+    report, printed at the end and optionally saved as JSON.
+
+    Args:
+        datasets (list[dict]): Dataset configurations.
+        targets (list[str] | None): Artifact selection (see select_artifacts).
+        manifest_path (str): Path to the build manifest.
+        jobs (int | None): Number of worker processes (defaults to the CPU count).
+        force (bool): Rebuild every artifact regardless of the manifest.
+        dry_run (bool): Only report which artifacts are stale.
+        profile_path (str | None): Path to save the profile report JSON to.
+        cprofile_path (str | None): Path to save the combined cProfile dump to.
+
+    Returns:
+        bool: True if every dataset, the dataset manifest and the index page
+            built successfully.
+    """
+    targets = targets or []
+    manifest = load_manifest(manifest_path)
+    success = True
+    profile = bool(profile_path or cprofile_path)
+    profiler = profiling.enable(cprofile=bool(cprofile_path)) if profile else None
+    worker_dumps = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                build_dataset,
+                dataset,
+                manifest,
+                targets,
+                force,
+                dry_run,
+                profile,
+                bool(cprofile_path),
+            )
+            for dataset in datasets
+        ]
+        for dataset, future in zip(datasets, futures):
+            print(f"== Dataset {dataset['name']} ({dataset['data_dir']}) ==")
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[fail] {dataset['name']}: {e}")
+                success = False
+                continue
+            print(result["log"], end="")
+            success = success and result["success"]
+            if profiler and result["profile"]:
+                profiling.merge_records(profiler.records, result["profile"])
+                worker_dumps.append(result["cprofile"])
+            manifest["files"].update(result["files"])
+            for name, record in result["artifacts"].items():
+                if record is None:
+                    manifest["artifacts"].pop(name, None)
+                else:
+                    manifest["artifacts"][name] = record
+
+    # The chart apps list every dataset, so the manifest follows the datasets
+    dataset_manifest = select_artifacts([dataset_manifest_artifact(datasets)], targets)
+    if dataset_manifest:
+        print("== Datasets ==")
+        success = (
+            build_artifacts(dataset_manifest, manifest, force, dry_run) and success
+        )
+
+    # Content-hash the asset references in the data and pages before indexing them
+    if not dry_run:
+        print("== Fingerprints ==")
+        with profiling.stage("fingerprint"):
+            fingerprint_site(DOCS_DIR, manifest["files"])
+        refresh_input_digests(dataset_manifest, manifest)
+
+    # The index page lists the pages of every dataset, so it is built last
+    index = select_artifacts([index_artifact(manifest["files"])], targets)
+    if index:
+        print("== Index ==")
+        success = build_artifacts(index, manifest, force, dry_run) and success
+
+    if not dry_run:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if profiler:
+        profiling.disable()
+        print("== Profile ==")
+        print(profiling.format_report(profiler.records))
+        if profile_path:
+            profiling.write_report(
+                profile_path,
+                profiler.records,
+                time.perf_counter() - start,
+                jobs=jobs,
+                cprofile=cprofile_path,
+            )
+        if cprofile_path:
+            profiling.merge_cprofile(
+                [profiler.dump_cprofile()] + worker_dumps, cprofile_path
+            )
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the generated site data.")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="Artifact names or dataset prefixes to build, e.g. '252' or '252:heatmap'",
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild everything")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only list stale artifacts"
+    )
+    parser.add_argument(
+        "--manifest", default=BUILD_MANIFEST, help="Build manifest path"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=profiling.PROFILE_REPORT,
+        metavar="REPORT",
+        help="Record per-stage wall/CPU time, peak memory and bytes written, and "
+        f"save them as JSON (default: {profiling.PROFILE_REPORT})",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Also save a cProfile dump of the build (all processes combined)",
+    )
+    args = parser.parse_args()
+
+    success = run_build(
+        discover_datasets(),
+        args.targets,
+        args.manifest,
+        jobs=args.jobs,
+        force=args.force,
+        dry_run=args.dry_run,
+        profile_path=args.profile,
+        cprofile_path=args.cprofile,
+    )
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only pickles can be read without it
+    pa = None
+
+# Columnar formats are preferred over pickles with the same name, in this order
+TABLE_EXTENSIONS = (".parquet", ".arrow", ".feather")
+
+
+def resolve_table(path: str) -> str:
+    """
+    Finds the file to read for a table, preferring Parquet or Arrow IPC files
+    stored next to the pickle (e.g. yields.parquet for yields.pkl).
+
+    Args:
+        path (str): Path to the table, usually its .pkl file.
+
+    Returns:
+        str: Path of the first existing columnar file (when pyarrow is
+            installed), otherwise the given path.
+    """
+    if pa is not None:
+        stem = os.path.splitext(path)[0]
+        for extension in TABLE_EXTENSIONS:
+            if os.path.exists(stem + extension):
+                return stem + extension
+    return path
+
+
+def table_exists(path: str) -> bool:
+    """
+    Checks whether a table exists in any readable format.
+
+    Args:
+        path (str): Path to the table, usually its .pkl file.
+
+    Returns:
+        bool: True if the table can be read.
+    """
+    return os.path.exists(resolve_table(path))
+
+
+class TableReader:
+    """
+    Reads a table stored as Parquet, Arrow IPC/Feather or pickle, loading only
+    the columns that are asked for.
+
+    Parquet and Arrow IPC files are memory-mapped, and their column names and
+    types come from the schema without reading any data. Pickles cannot be read
+    partially, so they are loaded whole on first use and kept in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = resolve_table(path)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Required file not found: {path}")
+        self.format = os.path.splitext(self.path)[1].lstrip(".")
+        self._frame = None
+        self._parquet = None
+        self._ipc = None
+        if self.format == "parquet":
+            self._parquet = pq.ParquetFile(self.path, memory_map=True)
+        elif self.format in ("arrow", "feather"):
+            # Record batches stay backed by the mapped file until converted
+            self._ipc = pa.ipc.open_file(pa.memory_map(self.path)).read_all()
+
+    def _schema(self):
+        return self._parquet.schema_arrow if self._parquet else self._ipc.schema
+
+    def _pickled_frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = pd.read_pickle(self.path)
+        return self._frame
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by the reader: the whole DataFrame of a pickle once loaded.
+        Parquet and Arrow IPC files are memory-mapped and count as 0.
+        """
+        if self._frame is None:
+            return 0
+        return int(self._frame.memory_usage(index=True, deep=True).sum())
+
+    @property
+    def columns(self) -> list[str]:
+        """Column names, in file order (read from the schema when possible)."""
+        if self.format == "pkl":
+            return self._pickled_frame().columns.tolist()
+        metadata_columns = self._index_columns()
+        return [name for name in self._schema().names if name not in metadata_columns]
+
+    def numeric_columns(self) -> list[str]:
+        """
+        Names of the numeric columns, like select_dtypes(include="number").
+
+        Returns:
+            list[str]: Integer and floating point column names, in file order.
+        """
+        if self.format == "pkl":
+            frame = self._pickled_frame()
+            return frame.select_dtypes(include="number").columns.tolist()
+        schema = self._schema()
+        return [
+            name
+            for name in self.columns
+            if pa.types.is_integer(schema.field(name).type)
+            or pa.types.is_floating(schema.field(name).type)
+        ]
+
+    def _index_columns(self) -> set:
+        # Serialized pandas indexes are stored as extra columns such as
+        # "__index_level_0__"
+        pandas_metadata = self._schema().pandas_metadata or {}
+        return {
+            name
+            for name in pandas_metadata.get("index_columns", [])
+            if isinstance(name, str)
+        }
+
+    def read(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Reads the given columns (all columns if None) into a DataFrame.
+
+        Args:
+            columns (list[str] | None): Columns to read.
+
+        Returns:
+            pd.DataFrame: The projected table.
+        """
+        if self.format == "pkl":
+            frame = self._pickled_frame()
+            return frame if columns is None else frame[columns]
+        if self._parquet:
+            table = self._parquet.read(columns=columns, use_pandas_metadata=True)
+        else:
+            # The stored index columns are kept, as Parquet reads them too
+            table = (
+                self._ipc
+                if columns is None
+                else self._ipc.select(columns + sorted(self._index_columns()))
+            )
+        return table.to_pandas()[columns] if columns else table.to_pandas()
+
+    def column(self, name: str):
+        """
+        Reads a single column.
+
+        Args:
+            name (str): Column name.
+
+        Returns:
+            numpy.ndarray: Column values, with NaN for missing numbers.
+        """
+        if self.format == "pkl":
+            return self._pickled_frame()[name].to_numpy()
+        if self._parquet:
+            values = self._parquet.read(columns=[name]).column(name)
+        else:
+            values = self._ipc.column(name)
+        return values.to_pandas().to_numpy()
+
+
+def read_table(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Reads a table, or only some of its columns, from Parquet, Arrow IPC/Feather
+    or pickle (see TableReader).
+
+    Args:
+        path (str): Path to the table, usually its .pkl file.
+        columns (list[str] | None): Columns to read (all columns if None).
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    return TableReader(path).read(columns)
+
+
+def convert_pickles(data_dir: str, file_format: str = "parquet"):
+    """
+    Writes a Parquet or Arrow IPC copy of every pickled DataFrame in a dataset
+    directory, which the generators then read instead of the pickles.
+
+    Args:
+        data_dir (str): Path to the folder containing data pickle files.
+        file_format (str): "parquet" or "arrow".
+
+    Returns:
+        None
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required to write Parquet or Arrow files")
+    if file_format not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown table format: {file_format}")
+
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith(".pkl"):
+            continue
+        df = pd.read_pickle(os.path.join(data_dir, filename))
+        if not isinstance(df, pd.DataFrame):
+            continue
+        output_path = os.path.join(
+            data_dir, f"{os.path.splitext(filename)[0]}.{file_format}"
+        )
+        table = pa.Table.from_pandas(df)
+        if file_format == "parquet":
+            pq.write_table(table, output_path)
+        else:
+            # Uncompressed, so readers can memory-map the columns directly
+            with pa.OSFile(output_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        print(f"Converted {filename} -> {os.path.basename(output_path)}")
+
+
+if __name__ == "__main__":
+    data_dir = "data_252"  # Path to the folder containing data pickle files
+
+    convert_pickles(data_dir, "parquet")
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import hashlib
+from urllib.parse import unquote
+from json_output import write_json
+
+# Maps every fingerprinted asset (relative to the site root) to its content hash
+ASSET_MANIFEST = "asset-manifest.json"
+FINGERPRINT_LENGTH = 10
+
+# JSON keys whose string values are asset URLs; values of an "images" map are too
+URL_KEYS = {
+    "url",
+    "data_path",
+    "yield_data_path",
+    "yield_matrix_path",
+    "yield_versions_path",
+    "image_variants_path",
+    "image_bundle_path",
+    "stats_path",
+    "tile_index_path",
+    "cluster_path",
+    "similar_compounds_path",
+}
+
+# Quoted local asset URLs in the HTML pages, with an optional existing fingerprint
+PAGE_URL_PATTERN = re.compile(
+    r"""(['"])((?:data|images|assets)/[^'"?#\s]+|favicon\.ico)(?:\?v=[0-9a-f]+)?\1"""
+)
+
+
+def file_digest(path: str, file_cache: dict) -> str | None:
+    """
+    Computes the SHA-256 of a file, reusing the cached digest when its size and
+    modification time are unchanged.
+
+    Args:
+        path (str): Path to the file.
+        file_cache (dict): Cached digests keyed by path, updated in place.
+
+    Returns:
+        str | None: Hex digest, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    cached = file_cache.get(path)
+    if (
+        cached
+        and cached["size"] == stat.st_size
+        and cached["mtime_ns"] == stat.st_mtime_ns
+    ):
+        return cached["sha256"]
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    file_cache[path] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256.hexdigest(),
+    }
+    return file_cache[path]["sha256"]
+
+
+class Fingerprinter:
+    """
+    Rewrites asset references in the site's JSON data and HTML pages to
+    content-hashed URLs ("data/x.json?v=<hash>").
+
+    JSON files are fingerprinted depth-first: the files a JSON file references
+    are rewritten and hashed before it, so a change to any asset changes the
+    URL of every file that (transitively) references it.
+    """
+
+    def __init__(self, root: str = "docs", file_cache: dict | None = None):
+        self.root = root
+        self.file_cache = {} if file_cache is None else file_cache
+        self.hashes = {}  # Site-relative path -> fingerprint, for this run
+
+    def fingerprint(self, path: str) -> str | None:
+        """
+        Rewrites the references inside a JSON file (if any) and returns its hash.
+
+        Args:
+            path (str): Path to the asset.
+
+        Returns:
+            str | None: Fingerprint of the asset, or None if it does not exist.
+        """
+        key = os.path.relpath(path, self.root).replace(os.sep, "/")
+        if key not in self.hashes:
+            self.hashes[key] = None  # Guards against reference cycles
+            if path.endswith(".json") and os.path.exists(path):
+                self._rewrite_json(path)
+            digest = file_digest(path, self.file_cache)
+            self.hashes[key] = digest[:FINGERPRINT_LENGTH] if digest else None
+        return self.hashes[key]
+
+    def fingerprint_url(self, url: str, base_dir: str | None = None) -> str:
+        """
+        Appends the content hash of the referenced asset to a URL.
+
+        Relative URLs are resolved against base_dir first (for references
+        relative to the referencing file), then against the site root.
+
+        Args:
+            url (str): Asset URL, with or without an existing "?v=" query.
+            base_dir (str | None): Directory of the referencing file.
+
+        Returns:
+            str: The fingerprinted URL, or the URL unchanged if no asset matches.
+        """
+        path = url.replace("\\", "/").split("?", 1)[0].split("#", 1)[0]
+        if not path or "://" in path or path.startswith(("/", "data:")):
+            return url
+        for directory in filter(None, (base_dir, self.root)):
+            # Percent-encoded URLs (e.g. the image variants) name unencoded files
+            candidate = os.path.normpath(os.path.join(directory, unquote(path)))
+            if os.path.isfile(candidate):
+                digest = self.fingerprint(candidate)
+                return f"{path}?v={digest}" if digest else url
+        return url
+
+    def _rewrite_urls(self, value, base_dir: str, key: str | None = None):
+        if isinstance(value, dict):
+            if key == "images":
+                return {
+                    k: self.fingerprint_url(v, base_dir) if isinstance(v, str) else v
+                    for k, v in value.items()
+                }
+            return {k: self._rewrite_urls(v, base_dir, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._rewrite_urls(v, base_dir, key) for v in value]
+        if isinstance(value, str) and key in URL_KEYS:
+            return self.fingerprint_url(value, base_dir)
+        return value
+
+    def _rewrite_json(self, path: str):
+        with open(path, "r") as f:
+            text = f.read()
+        data = json.loads(text)
+        rewritten = self._rewrite_urls(data, os.path.dirname(path))
+        if rewritten == data:
+            return
+        # Keep the file's existing layout (pretty-printed or compact)
+        write_json(path, rewritten, indent=2 if text.startswith("{\n") else None)
+
+    def rewrite_page(self, html_path: str):
+        """
+        Rewrites the quoted local asset URLs (data/..., images/..., assets/...,
+        favicon.ico) in an HTML page to their fingerprinted form.
+
+        Args:
+            html_path (str): Path to the HTML page.
+
+        Returns:
+            None
+        """
+        with open(html_path, "r", newline="") as f:
+            html = f.read()
+        rewritten = PAGE_URL_PATTERN.sub(
+            lambda m: f"{m.group(1)}{self.fingerprint_url(m.group(2))}{m.group(1)}",
+            html,
+        )
+        if rewritten != html:
+            with open(html_path, "w", newline="") as f:
+                f.write(rewritten)
+
+
+def fingerprint_site(root: str = "docs", file_cache: dict | None = None) -> dict:
+    """
+    Fingerprints the references in every HTML page (except index.html, which
+    generate_index_page writes) and writes the asset manifest.
+
+    Args:
+        root (str): Site root folder.
+        file_cache (dict | None): Cached file digests (see file_digest).
+
+    Returns:
+        dict: The asset manifest, mapping site-relative paths to fingerprints.
+    """
+    fingerprinter = Fingerprinter(root, file_cache)
+    for filename in sorted(os.listdir(root)):
+        if filename.endswith(".html") and filename != "index.html":
+            fingerprinter.rewrite_page(os.path.join(root, filename))
+            fingerprinter.fingerprint(os.path.join(root, filename))
+
+    manifest = {
+        path: digest
+        for path, digest in sorted(fingerprinter.hashes.items())
+        if digest is not None
+    }
+    with open(os.path.join(root, ASSET_MANIFEST), "w") as json_file:
+        json.dump(manifest, json_file, indent=2)
+
+    print(f"Fingerprinted {len(manifest)} assets: {os.path.join(root, ASSET_MANIFEST)}")
+    return manifest
+
+
+if __name__ == "__main__":
+    fingerprint_site("docs")
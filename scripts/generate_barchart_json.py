@@ -1,6 +1,84 @@
 import os
+import re
 import json
-import pandas as pd
+import numpy as np
+from data_io import TableReader, resolve_table
+from json_output import StreamedObject, write_json
+from numeric_engine import (
+    column_batches,
+    column_precision,
+    encode_array,
+    fixed_point,
+    record_object,
+    sort_orders,
+    validate_precision,
+)
+from profiling import stage
+
+
+def _property_columns(properties: TableReader, columns: list[str]):
+    """
+    Reads the numeric properties with their sort permutations. Columns are read
+    and sorted a batch at a time, as one matrix.
+
+    Args:
+        properties (TableReader): Properties table.
+        columns (list[str]): Numeric property columns.
+
+    Yields:
+        tuple: (column, values, order), where order is the stable ascending
+            sort permutation of values with missing values last, like sort_values.
+    """
+    for names, block, integer in column_batches(properties, columns):
+        with stage("sort"):
+            orders = sort_orders(block)
+        for j, name in enumerate(names):
+            values = block[:, j]
+            # Nullable integer columns (Int64) hold NaN for missing values, which
+            # have no int64 representation, so they stay floats
+            if integer[j] and not np.isnan(values).any():
+                values = values.astype(np.int64)
+            yield name, values, orders[:, j]
+
+
+def _property_column(
+    values: np.ndarray, order: np.ndarray, precision: dict | None = None
+) -> dict:
+    """
+    Builds the columnar representation of one numeric property.
+
+    Args:
+        values (numpy.ndarray): Property values aligned with the compound list.
+        order (numpy.ndarray): Ascending sort permutation of values.
+        precision (dict | None): Precision spec of the property.
+
+    Returns:
+        dict: Encoded values (missing values as null) and sort permutation,
+            with "fixed_point" decimals when values are scaled integers.
+    """
+    column_data = {
+        "values": encode_array(values, precision),
+        "order": encode_array(order),
+    }
+    decimals = fixed_point(values, precision)
+    if decimals is not None:
+        column_data["fixed_point"] = decimals
+    return column_data
+
+
+def _shard_filename(index: int, column: str) -> str:
+    """
+    Builds a URL-safe, unique shard file name for a property column.
+
+    Args:
+        index (int): Position of the property in the manifest.
+        column (str): Property name, e.g. "BDE (kcal/mol)".
+
+    Returns:
+        str: File name such as "000_BDE_kcal_mol.json".
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", column).strip("_")
+    return f"{index:03d}_{slug}.json"
 
 
 def generate_bar_chart_and_yield_json(
@@ -10,50 +88,107 @@ def generate_bar_chart_and_yield_json(
     data_dir: str,
     image_dir: str,
     page_title: str,
+    output_format: str = "columnar",
+    write_yield_json: bool = True,
+    image_variants_path: str | None = None,
+    image_bundle_path: str | None = None,
+    stats_path: str | None = None,
+    yield_versions_path: str | None = None,
+    similar_compounds_path: str | None = None,
+    property_precision: dict | None = None,
+    yield_precision: dict | None = None,
 ):
     """
     Generates two JSON files:
     - Bar chart data containing DFT properties.
     - Yield data for compounds to be queried dynamically.
 
+    The bar chart data is written in one of three layouts:
+    - "columnar": the compound list is stored once, and each property is stored
+      as a value column aligned with it plus a sort permutation into that list.
+    - "sharded": like "columnar", but each property column is written to its own
+      shard file next to a manifest (written to output_bar_chart_json) that lists
+      the shard URLs, byte sizes and value ranges, so pages load one property
+      at a time.
+    - "legacy": each property stores its own sorted copy of the compound names
+      and values (x_values/y_values).
+
     Args:
         output_bar_chart_json (str): Path to save the bar chart JSON file.
         output_yield_json (str): Path to save the yield JSON file.
-        properties_pkl (str): Properties data file (pickle).
+        properties_pkl (str): Properties data file (pickle). A Parquet or Arrow
+            file with the same name is read instead when present, one property
+            column at a time.
         data_dir (str): Path to the folder containing data pickle files.
         image_dir (str): Directory containing molecular images, named by compound IDs.
         page_title (str): Title for the bar chart page.
+        output_format (str): Layout of the bar chart JSON, "columnar", "sharded"
+            or "legacy".
+        write_yield_json (bool): Whether to write the yield JSON file. The build
+            disables this when generate_yield_json already produces it; the bar
+            chart data still records output_yield_json as its yield data path.
+        image_variants_path (str | None): Path to the image variant manifest JSON
+            (see generate_image_variants), used by pages to pick hover thumbnails.
+        image_bundle_path (str | None): Path to the image bundle index JSON (see
+            generate_image_bundle). When set, pages read hover thumbnails from
+            the packed bundles with Range requests.
+        stats_path (str | None): Path to the property-yield statistics JSON (see
+            generate_stats_json), shown by pages below the chart.
+        yield_versions_path (str | None): Path to the yield version manifest
+            (see generate_yield_versions). When set, pages keep the yields in
+            IndexedDB and only download the deltas published since their visit.
+        similar_compounds_path (str | None): Path to the similar compounds
+            index header JSON (see generate_similar_compounds), used by pages
+            to list the analogues of a hovered compound.
+        property_precision (dict | None): Precision of the property columns,
+            keyed by property with a "default" entry (see
+            numeric_engine.column_precision). Scaled properties are written as
+            integers with their "fixed_point" decimals. Full precision when None.
+        yield_precision (dict | None): Precision of the yield columns (see
+            generate_heatmap_json.generate_yield_json).
 
     Returns:
         None
     """
+    if output_format not in ("columnar", "sharded", "legacy"):
+        raise ValueError(f"Unknown bar chart output format: {output_format}")
+    for spec in (property_precision or {}).values():
+        validate_precision(spec)
+
     # Validate required files and directories
     required_files = [
-        os.path.join(data_dir, properties_pkl),
+        resolve_table(os.path.join(data_dir, properties_pkl)),
         os.path.join(data_dir, "mol_image_paths_captioned.json"),
-        os.path.join(data_dir, "yields.pkl"),
     ]
+    if write_yield_json:
+        required_files.append(resolve_table(os.path.join(data_dir, "yields.pkl")))
     for file in required_files:
         if not os.path.exists(file):
             raise FileNotFoundError(f"Required file not found: {file}")
     if not os.path.exists(image_dir):
         raise FileNotFoundError(f"Image directory not found: {image_dir}")
 
-    df = pd.read_pickle(required_files[0])  # Load properties dataset
-    with open(required_files[1], "r") as f:
-        mol_image_paths = json.load(f)  # Load image JSON file
-    yields_df = pd.read_pickle(required_files[2])  # Load yield dataset
+    # Load properties dataset lazily: property columns are read as they are written
+    with stage("load"):
+        properties = TableReader(required_files[0])
+        property_columns = properties.numeric_columns()
+        compounds = properties.read(["Compound_Name"])["Compound_Name"].tolist()
+        with open(required_files[1], "r") as f:
+            mol_image_paths = json.load(f)  # Load image JSON file
 
     # Convert image paths to base64 encoded strings
-    mol_image_base64 = {}
-    for compound_id, img_path in mol_image_paths.items():
-        base_filename = os.path.basename(img_path)
-        img_full_path = os.path.join(image_dir, base_filename)
-        if os.path.exists(img_full_path):
-            mol_image_base64[compound_id] = img_path
-        else:
-            mol_image_base64[compound_id] = None
-            print(f"Warning: Image file not found for {compound_id} at {img_full_path}")
+    with stage("check_images"):
+        mol_image_base64 = {}
+        for compound_id, img_path in mol_image_paths.items():
+            base_filename = os.path.basename(img_path)
+            img_full_path = os.path.join(image_dir, base_filename)
+            if os.path.exists(img_full_path):
+                mol_image_base64[compound_id] = img_path
+            else:
+                mol_image_base64[compound_id] = None
+                print(
+                    f"Warning: Image file not found for {compound_id} at {img_full_path}"
+                )
 
     print("Generating JSON files...")
 
@@ -64,37 +199,128 @@ def generate_bar_chart_and_yield_json(
         "images": mol_image_base64,
         "yield_data_path": output_yield_json,
     }
+    if image_variants_path:
+        bar_chart_data["image_variants_path"] = image_variants_path
+    if image_bundle_path:
+        bar_chart_data["image_bundle_path"] = image_bundle_path
+    if stats_path:
+        bar_chart_data["stats_path"] = stats_path
+    if yield_versions_path:
+        bar_chart_data["yield_versions_path"] = yield_versions_path
+    if similar_compounds_path:
+        bar_chart_data["similar_compounds_path"] = similar_compounds_path
 
-    # Store Yield Data Separately
-    yield_data = {
-        "compounds": yields_df["id"].tolist(),
-        "methods": list(yields_df.select_dtypes(include="number").columns),
-        "yields": yields_df.set_index("id")
-        .select_dtypes(include="number")
-        .to_dict("index"),
-    }
+    if output_format == "columnar":
+        # Store the compound list once; properties index into it
+        bar_chart_data["format"] = "columnar"
+        bar_chart_data["compounds"] = compounds
 
-    # Generate data for each numeric property
-    for column in df.select_dtypes(include="number").columns:
-        sorted_df = df.sort_values(column)
-        x_values = sorted_df["Compound_Name"].tolist()
-        y_values = sorted_df[column].tolist()
+        # Columns are read and built a batch at a time while the file is written
+        def property_columns_data():
+            for column, values, order in _property_columns(
+                properties, property_columns
+            ):
+                with stage("columns"):
+                    column_data = _property_column(
+                        values, order, column_precision(property_precision, column)
+                    )
+                yield column, column_data
 
-        # Store data in JSON format
-        bar_chart_data["data"][column] = {
-            "x_values": x_values,
-            "y_values": y_values,
-        }
+        bar_chart_data["data"] = StreamedObject(property_columns_data())
+    elif output_format == "sharded":
+        # The manifest keeps the shared compound list; shards hold one property each
+        shard_dir = os.path.splitext(output_bar_chart_json)[0]
+        shard_dir_name = os.path.basename(shard_dir)
+        os.makedirs(shard_dir, exist_ok=True)
+        del bar_chart_data["data"]
+        bar_chart_data["format"] = "sharded"
+        bar_chart_data["compounds"] = compounds
+        bar_chart_data["properties"] = []
+        shard_files = set()
+        for index, (column, values, order) in enumerate(
+            _property_columns(properties, property_columns)
+        ):
+            with stage("columns"):
+                shard_data = {
+                    "property": column,
+                    **_property_column(
+                        values, order, column_precision(property_precision, column)
+                    ),
+                }
+            shard_file = _shard_filename(index, column)
+            shard_path = os.path.join(shard_dir, shard_file)
+            with stage("write_shards"):
+                shard_sizes = write_json(shard_path, shard_data)
+            shard_files.add(shard_file)
+            missing = np.isnan(values).all()
 
-    # Save JSON output
-    with open(output_bar_chart_json, "w") as json_file:
-        json.dump(bar_chart_data, json_file, indent=2, allow_nan=False)
+            # Shard URLs are relative to the manifest so pages can resolve them
+            bar_chart_data["properties"].append(
+                {
+                    "name": column,
+                    "url": f"{shard_dir_name}/{shard_file}",
+                    "bytes": shard_sizes["raw"],
+                    "gzip_bytes": shard_sizes["gzip"],
+                    "min": None if missing else float(np.nanmin(values)),
+                    "max": None if missing else float(np.nanmax(values)),
+                }
+            )
+
+        # Remove shards (and their compressed siblings) of properties that no
+        # longer exist
+        for stale_file in os.listdir(shard_dir):
+            shard_file = stale_file.removesuffix(".gz").removesuffix(".br")
+            if shard_file.endswith(".json") and shard_file not in shard_files:
+                os.remove(os.path.join(shard_dir, stale_file))
+    else:
+        # Generate data for each numeric property while the file is written
+        def legacy_columns():
+            compound_array = np.array(compounds, dtype=object)
+            for column, values, order in _property_columns(
+                properties, property_columns
+            ):
+                precision = column_precision(property_precision, column)
+                with stage("columns"):
+                    column_data = {
+                        "x_values": compound_array[order].tolist(),
+                        "y_values": encode_array(values[order], precision),
+                    }
+                    decimals = fixed_point(values, precision)
+                    if decimals is not None:
+                        column_data["fixed_point"] = decimals
+                yield column, column_data
+
+        bar_chart_data["data"] = StreamedObject(legacy_columns())
 
-    with open(output_yield_json, "w") as json_file:
-        json.dump(yield_data, json_file, indent=2, allow_nan=False)
+    # Save JSON output
+    with stage("write"):
+        write_json(output_bar_chart_json, bar_chart_data)
 
     print(f"Bar chart JSON data file generated: {output_bar_chart_json}")
-    print(f"Yield JSON data file generated: {output_yield_json}")
+
+    if write_yield_json:
+        # Load yield dataset (IDs and numeric columns only)
+        with stage("load_yields"):
+            yields = TableReader(required_files[2])
+            methods = [c for c in yields.numeric_columns() if c != "id"]
+            yields_df = yields.read(["id"] + methods)
+
+        # Store Yield Data Separately, encoded straight from the value columns
+        with stage("encode_yields"):
+            compound_ids = yields_df["id"].tolist()
+            yield_data = {
+                "compounds": compound_ids,
+                "methods": methods,
+                "yields": record_object(
+                    compound_ids, yields_df[methods], yield_precision
+                ),
+            }
+            if yield_precision:
+                yield_data["precision"] = yield_precision
+        with stage("write_yields"):
+            write_json(output_yield_json, yield_data)
+
+        print(f"Yield JSON data file generated: {output_yield_json}")
 
 
 if __name__ == "__main__":
@@ -112,4 +338,5 @@ if __name__ == "__main__":
         data_dir,
         image_dir,
         page_title,
+        output_format="sharded",
     )
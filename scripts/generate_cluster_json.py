@@ -0,0 +1,232 @@
+import os
+import hashlib
+import numpy as np
+from generate_heatmap_json import load_yield_matrix
+from json_output import write_json
+from numeric_engine import encode_matrix
+from profiling import stage
+
+try:
+    from scipy.cluster import hierarchy
+except ImportError:  # Optional: without SciPy the heatmap keeps the table order
+    hierarchy = None
+
+# Clustering results, keyed by a hash of the yield matrix and the settings
+CLUSTER_CACHE_DIR = ".cluster_cache"
+# Cached results kept; the least recently used are removed
+MAX_CACHE_ENTRIES = 32
+# Linkage method (see scipy.cluster.hierarchy.linkage), on Euclidean distances
+LINKAGE_METHOD = "average"
+# Optimal leaf ordering is skipped above this many leaves: its cost is cubic
+# (about 3 s for 1000 leaves, 30 s for 2000)
+MAX_OPTIMAL_ORDERING_LEAVES = 1000
+# Rows of the distance matrix computed at once
+DISTANCE_BLOCK_ROWS = 1024
+# Bump when the clustering changes, so cached results are recomputed
+CLUSTER_VERSION = 1
+
+
+def _impute_missing(matrix: np.ndarray) -> np.ndarray:
+    # Missing yields take the mean of their column (0 for empty columns)
+    missing = np.isnan(matrix)
+    if not missing.any():
+        return matrix
+    counts = (~missing).sum(axis=0)
+    sums = np.where(missing, 0.0, matrix).sum(axis=0)
+    means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+    return np.where(missing, means, matrix)
+
+
+def condensed_distances(
+    points: np.ndarray, block_rows: int = DISTANCE_BLOCK_ROWS
+) -> np.ndarray:
+    """
+    Computes the pairwise Euclidean distances between rows, in the condensed
+    layout of scipy.spatial.distance.pdist, without the full square matrix.
+    Each block of rows is computed with one matrix product
+    (|a - b|^2 = |a|^2 + |b|^2 - 2 a.b).
+
+    Args:
+        points (numpy.ndarray): Rows x features matrix, without NaN.
+        block_rows (int): Rows computed per block.
+
+    Returns:
+        numpy.ndarray: The n * (n - 1) / 2 distances of the pairs i < j.
+    """
+    n = len(points)
+    squared_norms = np.einsum("ij,ij->i", points, points)
+    distances = np.empty(n * (n - 1) // 2)
+    offset = 0
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = (
+            squared_norms[start:stop, None]
+            + squared_norms[None, :]
+            - 2.0 * (points[start:stop] @ points.T)
+        )
+        np.sqrt(np.maximum(block, 0.0, out=block), out=block)
+        for i in range(start, stop):
+            row = block[i - start, i + 1 :]
+            distances[offset : offset + len(row)] = row
+            offset += len(row)
+    return distances
+
+
+def cluster_order(points: np.ndarray, method: str = LINKAGE_METHOD) -> tuple:
+    """
+    Clusters rows hierarchically, with optimal leaf ordering (adjacent leaves
+    as similar as possible) for up to MAX_OPTIMAL_ORDERING_LEAVES rows.
+
+    Args:
+        points (numpy.ndarray): Rows x features matrix, without NaN.
+        method (str): Linkage method.
+
+    Returns:
+        tuple: (order, linkage), where order is the leaf order as row indices
+            and linkage the SciPy linkage matrix (n - 1 merges of [cluster,
+            cluster, distance, size]), the dendrogram data.
+    """
+    if len(points) < 2:
+        return np.arange(len(points)), np.empty((0, 4))
+    with stage("distances"):
+        distances = condensed_distances(points)
+    with stage("linkage"):
+        linkage = hierarchy.linkage(distances, method=method)
+    if len(points) <= MAX_OPTIMAL_ORDERING_LEAVES:
+        with stage("leaf_ordering"):
+            linkage = hierarchy.optimal_leaf_ordering(linkage, distances)
+    return hierarchy.leaves_list(linkage), linkage
+
+
+def matrix_hash(matrix: np.ndarray, method: str) -> str:
+    """
+    Hashes a yield matrix together with the clustering settings.
+
+    Args:
+        matrix (numpy.ndarray): Compounds x methods yields, NaN for missing.
+        method (str): Linkage method.
+
+    Returns:
+        str: The cache key.
+    """
+    digest = hashlib.sha256(
+        f"{CLUSTER_VERSION}:{method}:{MAX_OPTIMAL_ORDERING_LEAVES}:{matrix.shape}".encode()
+    )
+    digest.update(np.ascontiguousarray(matrix, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def cached_clusters(
+    matrix: np.ndarray,
+    method: str = LINKAGE_METHOD,
+    cache_dir: str = CLUSTER_CACHE_DIR,
+) -> dict:
+    """
+    Clusters the rows and columns of a yield matrix, reusing the cached result
+    when the matrix and settings are unchanged.
+
+    Args:
+        matrix (numpy.ndarray): Compounds x methods yields, NaN for missing.
+        method (str): Linkage method.
+        cache_dir (str): Folder of the cached results.
+
+    Returns:
+        dict: The "key", and the "row_order", "row_linkage", "column_order"
+            and "column_linkage" arrays.
+    """
+    key = matrix_hash(matrix, method)
+    cache_path = os.path.join(cache_dir, f"{key}.npz")
+    if os.path.exists(cache_path):
+        os.utime(cache_path)  # Keep recently used results through pruning
+        with np.load(cache_path) as cached:
+            print(f"Reusing cached clustering: {cache_path}")
+            return {"key": key, **{name: cached[name] for name in cached.files}}
+
+    points = _impute_missing(matrix)
+    with stage("rows"):
+        row_order, row_linkage = cluster_order(points, method)
+    with stage("columns"):
+        column_order, column_linkage = cluster_order(points.T, method)
+    result = {
+        "row_order": row_order,
+        "row_linkage": row_linkage,
+        "column_order": column_order,
+        "column_linkage": column_linkage,
+    }
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(cache_path, **result)
+    entries = sorted(
+        (os.path.join(cache_dir, f) for f in os.listdir(cache_dir)),
+        key=os.path.getmtime,
+    )
+    for stale in entries[:-MAX_CACHE_ENTRIES]:
+        os.remove(stale)
+    return {"key": key, **result}
+
+
+def generate_cluster_json(
+    output_json_path: str,
+    data_dir: str,
+    method: str = LINKAGE_METHOD,
+    cache_dir: str = CLUSTER_CACHE_DIR,
+):
+    """
+    Generates clustered orders of the heatmap rows (compounds) and columns
+    (methods), so pages can switch to a clustered view without reordering the
+    data themselves. Missing yields are replaced by their method's mean for
+    clustering. Results are cached in cache_dir, keyed by a hash of the yield
+    matrix, so unchanged yields are not clustered again.
+
+    Without SciPy, the table order is written with "clustered" set to false.
+
+    Args:
+        output_json_path (str): Path to save the generated JSON file.
+        data_dir (str): Path to the folder containing data pickle files.
+        method (str): Linkage method (see scipy.cluster.hierarchy.linkage).
+        cache_dir (str): Folder of the cached clustering results.
+
+    Returns:
+        None
+    """
+    compounds, methods, matrix = load_yield_matrix(data_dir)
+
+    if hierarchy is None:
+        print("Warning: SciPy is not installed; keeping the table order")
+        clusters = {
+            "key": None,
+            "row_order": np.arange(len(compounds)),
+            "row_linkage": np.empty((0, 4)),
+            "column_order": np.arange(len(methods)),
+            "column_linkage": np.empty((0, 4)),
+        }
+    else:
+        clusters = cached_clusters(matrix, method, cache_dir)
+
+    # Leaves are listed as labels; linkages index the original order
+    cluster_data = {
+        "clustered": hierarchy is not None,
+        "method": method,
+        "metric": "euclidean",
+        "matrix_hash": clusters["key"],
+        "rows": {
+            "order": [compounds[i] for i in clusters["row_order"]],
+            "linkage": encode_matrix(clusters["row_linkage"]),
+        },
+        "columns": {
+            "order": [methods[i] for i in clusters["column_order"]],
+            "linkage": encode_matrix(clusters["column_linkage"]),
+        },
+    }
+    os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
+    with stage("write"):
+        write_json(output_json_path, cluster_data)
+
+    print(f"Cluster JSON data file generated: {output_json_path}")
+
+
+if __name__ == "__main__":
+    output_json_path = "docs/data/clusters/252_clusters.json"
+    data_dir = "data_252"  # Path to the folder containing data pickle files
+
+    generate_cluster_json(output_json_path, data_dir)
@@ -0,0 +1,102 @@
+import os
+from json_output import write_json
+
+# Dataset manifest read by the chart apps, relative to the site folder
+DATASET_MANIFEST_PATH = os.path.join("data", "datasets.json")
+# Data files of each dataset, relative to the site folder
+HEATMAP_DATA_PATH = "data/heatmap/{name}_compounds.json"
+BAR_CHART_DATA_PATH = "data/barchart/{name}_compounds.json"
+YIELD_DATA_PATH = "data/yields/{name}_yields.json"
+# Chart app page and index page label of each chart type
+CHART_PAGES = {
+    "heatmap": ("heatmap.html", "Yield Heatmap"),
+    "barchart": ("barchart.html", "Barchart"),
+}
+DEFAULT_COLORSCALE = "Viridis"
+DEFAULT_MARGIN_BOTTOM = 100
+
+
+def generate_dataset_manifest(datasets: list[dict], folder: str = "docs") -> dict:
+    """
+    Generates the dataset manifest that drives the chart apps (heatmap.html and
+    barchart.html): one page per chart type shows any dataset, selected with
+    "?dataset=<name>", instead of one page copy per dataset.
+
+    A dataset lists the charts whose data JSON exists in the folder, with the
+    title shown in the dataset selector, the data paths, and the heatmap
+    colorscale and bottom margin ("heatmap_colorscale" and
+    "heatmap_margin_bottom" in the dataset configuration). When the
+    configuration names a "query_server" (see query_server.py), the heatmap
+    loads the yields of the compounds in view from it instead of the whole
+    yield matrix.
+
+    Args:
+        datasets (list[dict]): Dataset configurations (see build.discover_datasets).
+        folder (str): Site folder the data paths are relative to.
+
+    Returns:
+        dict: The manifest, {"datasets": [{"name": ..., "charts": {...}}]}.
+    """
+    entries = []
+    for dataset in datasets:
+        name = dataset["name"]
+        charts = {}
+        heatmap_path = HEATMAP_DATA_PATH.format(name=name)
+        if os.path.exists(os.path.join(folder, heatmap_path)):
+            charts["heatmap"] = {
+                "title": dataset["heatmap_title"],
+                "data_path": heatmap_path,
+                "colorscale": dataset.get("heatmap_colorscale", DEFAULT_COLORSCALE),
+                "margin_bottom": dataset.get(
+                    "heatmap_margin_bottom", DEFAULT_MARGIN_BOTTOM
+                ),
+            }
+            if dataset.get("query_server"):
+                charts["heatmap"]["query_url"] = dataset["query_server"]
+        bar_chart_path = BAR_CHART_DATA_PATH.format(name=name)
+        if dataset.get("bar_chart_title") and os.path.exists(
+            os.path.join(folder, bar_chart_path)
+        ):
+            charts["barchart"] = {
+                "title": dataset["bar_chart_title"],
+                "data_path": bar_chart_path,
+                "yield_data_path": YIELD_DATA_PATH.format(name=name),
+            }
+        if not charts:
+            print(f"Skipping dataset {name}: no chart data in {folder}")
+            continue
+        entries.append({"name": name, "charts": charts})
+
+    manifest = {"datasets": entries}
+    output_path = os.path.join(folder, DATASET_MANIFEST_PATH)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    write_json(output_path, manifest, indent=2)
+    print(f"Dataset manifest saved with {len(entries)} datasets: {output_path}")
+    return manifest
+
+
+if __name__ == "__main__":
+    # The published datasets (the build discovers them from the data_* folders)
+    datasets = [
+        {
+            "name": "252",
+            "heatmap_title": "Yields Map of 252 Compounds",
+            "graph_name": "Yields Map",
+            "bar_chart_title": "Bar Chart of 252 Compounds with DFT Properties",
+        },
+        {
+            "name": "35",
+            "heatmap_title": "Yields Map of 35 Compounds",
+            "graph_name": "Yields Map",
+            "bar_chart_title": "Bar Chart of 35 Compounds with DFT Properties",
+        },
+        {
+            "name": "Robussness",
+            "heatmap_title": "Yields Change of Robussness Screening",
+            "graph_name": "Robussness Screening",
+            "heatmap_colorscale": "Red",
+            "heatmap_margin_bottom": 60,
+        },
+    ]
+
+    generate_dataset_manifest(datasets)
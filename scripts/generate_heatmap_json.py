@@ -1,6 +1,19 @@
 import os
 import json
-import pandas as pd
+import shutil
+import hashlib
+import warnings
+import numpy as np
+from data_io import TableReader, resolve_table
+from json_output import write_binary, write_json
+from numeric_engine import record_object, record_texts
+from profiling import stage
+from versioned_data import MAX_DELTA_RATIO, MAX_DELTAS, write_versioned_records
+
+# Sentinel stored in place of missing yields in quantized (uint16) matrices
+UINT16_NAN_SENTINEL = 65535
+# Cells per side of a heatmap tile
+TILE_SIZE = 256
 
 
 def generate_heatmap_json(
@@ -10,6 +23,11 @@ def generate_heatmap_json(
     image_dir: str,
     page_title: str,
     graph_name: str,
+    yield_matrix_path: str | None = None,
+    image_variants_path: str | None = None,
+    image_bundle_path: str | None = None,
+    tile_index_path: str | None = None,
+    cluster_path: str | None = None,
 ):
     """
     Generates a JSON file containing heatmap data for visualization.
@@ -21,14 +39,26 @@ def generate_heatmap_json(
         image_dir (str): Directory containing molecular images, named by compound IDs.
         page_title (str): Title for the heatmap page.
         graph_name (str): Name of the graph to be included in the JSON data.
+        yield_matrix_path (str | None): Path to the binary yield matrix header JSON
+            (see generate_yield_binary). When set, pages load the typed-array
+            matrix instead of the yield JSON.
+        image_variants_path (str | None): Path to the image variant manifest JSON
+            (see generate_image_variants), used by pages to pick hover thumbnails.
+        image_bundle_path (str | None): Path to the image bundle index JSON (see
+            generate_image_bundle). When set, pages read hover thumbnails from
+            the packed bundles with Range requests.
+        tile_index_path (str | None): Path to the heatmap tile index JSON (see
+            generate_heatmap_tiles). When set, pages render from the tile pyramid.
+        cluster_path (str | None): Path to the cluster JSON (see
+            generate_cluster_json). When set, pages offer the clustered order.
 
     Returns:
         None
     """
     # Validate required files
     required_files = [
-        os.path.join(data_dir, "yields.pkl"),
-        os.path.join(data_dir, "yield_data_df.pkl"),
+        resolve_table(os.path.join(data_dir, "yields.pkl")),
+        resolve_table(os.path.join(data_dir, "yield_data_df.pkl")),
         os.path.join(data_dir, "mol_image_paths_captioned.json"),
     ]
     for file in required_files:
@@ -37,77 +67,400 @@ def generate_heatmap_json(
     if not os.path.exists(image_dir):
         raise FileNotFoundError(f"Image directory not found: {image_dir}")
 
-    # Load data
-    yields_df = pd.read_pickle(required_files[0])
-    yield_data_df = pd.read_pickle(required_files[1])
-    with open(required_files[2], "r") as f:
-        mol_image_paths = json.load(f)
+    # Load data (only the compound IDs and the method names are needed)
+    with stage("load"):
+        compounds = TableReader(required_files[0]).read(["id"])["id"].tolist()
+        methods = TableReader(required_files[1]).columns
+        with open(required_files[2], "r") as f:
+            mol_image_paths = json.load(f)
 
     # Generate image paths (instead of base64 encoding)
-    mol_image_urls = {}
-    for compound_id, img_path in mol_image_paths.items():
-        base_filename = os.path.basename(img_path)
-        img_full_path = os.path.join(image_dir, base_filename)
-        if os.path.exists(img_full_path):
-            mol_image_urls[compound_id] = img_path
-        else:
-            print(f"Warning: Image file not found for {compound_id} at {img_full_path}")
+    with stage("check_images"):
+        mol_image_urls = {}
+        for compound_id, img_path in mol_image_paths.items():
+            base_filename = os.path.basename(img_path)
+            img_full_path = os.path.join(image_dir, base_filename)
+            if os.path.exists(img_full_path):
+                mol_image_urls[compound_id] = img_path
+            else:
+                print(
+                    f"Warning: Image file not found for {compound_id} at {img_full_path}"
+                )
 
     # Generate heatmap JSON
     heatmap_data = {
         "page_title": page_title,
         "graph_name": graph_name,
-        "compounds": yields_df["id"].tolist(),
-        "methods": yield_data_df.columns.tolist(),
+        "compounds": compounds,
+        "methods": methods,
         "yield_data_path": yield_json_path,  # Path to external yield data JSON
         "images": mol_image_urls,  # Store only hosted image URLs
     }
+    if yield_matrix_path:
+        heatmap_data["yield_matrix_path"] = yield_matrix_path
+    if image_variants_path:
+        heatmap_data["image_variants_path"] = image_variants_path
+    if image_bundle_path:
+        heatmap_data["image_bundle_path"] = image_bundle_path
+    if tile_index_path:
+        heatmap_data["tile_index_path"] = tile_index_path
+    if cluster_path:
+        heatmap_data["cluster_path"] = cluster_path
 
     # Save JSON output
-    with open(output_json_path, "w") as json_file:
-        json.dump(heatmap_data, json_file, indent=2, allow_nan=False)
+    os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
+    with stage("write"):
+        write_json(output_json_path, heatmap_data)
 
     print(f"Heatmap JSON data file generated: {output_json_path}")
 
 
-def generate_yield_json(yield_json_path: str, data_dir: str):
+def _load_yield_table(data_dir: str) -> tuple:
+    """
+    Loads the compound IDs and yield columns for the yield JSON.
+
+    Args:
+        data_dir (str): Path to the folder containing data pickle files.
+
+    Returns:
+        tuple: (compound IDs, method names, DataFrame of the numeric yield
+            columns in yields.pkl).
+    """
+    # Validate required files
+    required_files = [
+        resolve_table(os.path.join(data_dir, "yields.pkl")),
+        resolve_table(os.path.join(data_dir, "yield_data_df.pkl")),
+    ]
+    for file in required_files:
+        if not os.path.exists(file):
+            raise FileNotFoundError(f"Required file not found: {file}")
+
+    # Load data (the method names come from the schema alone)
+    with stage("load"):
+        yields = TableReader(required_files[0])
+        yield_value_columns = [c for c in yields.numeric_columns() if c != "id"]
+        yields_df = yields.read(["id"] + yield_value_columns)
+        methods = TableReader(required_files[1]).numeric_columns()
+    return yields_df["id"].tolist(), methods, yields_df[yield_value_columns]
+
+
+def generate_yield_json(
+    yield_json_path: str, data_dir: str, precision: dict | None = None
+):
     """
     Generates a separate JSON file for yield values.
 
     Args:
         yield_json_path (str): Path to save the yield data JSON file.
         data_dir (str): Path to the folder containing data pickle files.
+        precision (dict | None): Precision of the yield columns, keyed by method
+            with a "default" entry (see numeric_engine.column_precision). The
+            config is recorded in the JSON. Full precision when None.
+
+    Returns:
+        None
+    """
+    compound_ids, methods, yield_values = _load_yield_table(data_dir)
+
+    # Create structured yield data, encoded straight from the value columns
+    with stage("encode"):
+        yield_data = {
+            "compounds": compound_ids,
+            "methods": methods,
+            "yields": record_object(compound_ids, yield_values, precision),
+        }
+        if precision:
+            yield_data["precision"] = precision
+
+    # Save JSON output
+    output_path = os.path.join("docs", yield_json_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with stage("write"):
+        write_json(output_path, yield_data)
+
+    print(f"Yield JSON data file generated: {yield_json_path}")
+
+
+def generate_yield_versions(
+    versions_path: str,
+    data_dir: str,
+    max_deltas: int = MAX_DELTAS,
+    max_delta_ratio: float = MAX_DELTA_RATIO,
+    precision: dict | None = None,
+):
+    """
+    Publishes the yield data as a versioned base snapshot plus append-only
+    deltas (see versioned_data.write_versioned_records), so pages that cached
+    an earlier version only download the compounds added or changed since.
+
+    Args:
+        versions_path (str): Path of the version manifest JSON, relative to docs.
+        data_dir (str): Path to the folder containing data pickle files.
+        max_deltas (int): Deltas kept before compacting into a new base.
+        max_delta_ratio (float): Total delta size, relative to the base, that
+            triggers compaction.
+        precision (dict | None): Precision of the yield columns (see
+            generate_yield_json).
 
     Returns:
         None
     """
+    compound_ids, methods, yield_values = _load_yield_table(data_dir)
+
+    with stage("encode"):
+        records = dict(
+            zip(compound_ids, record_texts(compound_ids, yield_values, precision))
+        )
+
+    with stage("write"):
+        write_versioned_records(
+            os.path.join("docs", versions_path),
+            compound_ids,
+            methods,
+            records,
+            max_deltas,
+            max_delta_ratio,
+        )
+
+
+def load_yield_matrix(data_dir: str) -> tuple:
+    """
+    Loads the yields as a dense compounds x methods matrix.
+
+    Args:
+        data_dir (str): Path to the folder containing data pickle files.
+
+    Returns:
+        tuple: (compounds, methods, matrix), in the same order as the yield JSON,
+            with NaN for missing yields.
+    """
     # Validate required files
     required_files = [
-        os.path.join(data_dir, "yields.pkl"),
-        os.path.join(data_dir, "yield_data_df.pkl"),
+        resolve_table(os.path.join(data_dir, "yields.pkl")),
+        resolve_table(os.path.join(data_dir, "yield_data_df.pkl")),
     ]
     for file in required_files:
         if not os.path.exists(file):
             raise FileNotFoundError(f"Required file not found: {file}")
 
-    # Load data
-    yields_df = pd.read_pickle(required_files[0])
-    yield_data_df = pd.read_pickle(required_files[1])
-
-    # Create structured yield data
-    yield_data = {
-        "compounds": yields_df["id"].tolist(),
-        "methods": yield_data_df.select_dtypes(include="number").columns.tolist(),
-        "yields": yields_df.set_index("id")
-        .select_dtypes(include="number")
-        .to_dict(orient="index"),
+    # Load only the ID and method columns
+    with stage("load"):
+        yields = TableReader(required_files[0])
+        methods = TableReader(required_files[1]).numeric_columns()
+        yield_columns = set(yields.columns)
+        yields_df = yields.read(["id"] + [m for m in methods if m in yield_columns])
+
+        matrix = (
+            yields_df.set_index("id")
+            .reindex(columns=methods)
+            .to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+    return yields_df["id"].tolist(), methods, matrix
+
+
+def generate_yield_binary(
+    yield_matrix_path: str, data_dir: str, dtype: str = "float32"
+):
+    """
+    Generates a binary yield matrix with a small JSON header.
+
+    The matrix is stored row-major with one row per compound and one column per
+    method, as little-endian float32 values (NaN for missing yields) or as
+    quantized uint16 values (value = offset + q * scale, with a sentinel for
+    missing yields). The binary buffer is written next to the header with a
+    ".bin" extension.
+
+    Args:
+        yield_matrix_path (str): Path to save the header JSON file, relative to docs.
+        data_dir (str): Path to the folder containing data pickle files.
+        dtype (str): Storage type of the matrix, "float32" or "uint16".
+
+    Returns:
+        None
+    """
+    if dtype not in ("float32", "uint16"):
+        raise ValueError(f"Unknown yield matrix dtype: {dtype}")
+
+    compounds, methods, matrix = load_yield_matrix(data_dir)
+
+    header = {
+        "compounds": compounds,
+        "methods": methods,
+        "shape": list(matrix.shape),
+        "dtype": dtype,
+        "byte_order": "little",
+        "data_path": os.path.splitext(os.path.basename(yield_matrix_path))[0] + ".bin",
     }
+    with stage("encode"):
+        if dtype == "uint16":
+            # Quantize the observed range onto 0..65534, keeping 65535 for missing values
+            missing = np.isnan(matrix)
+            offset = float(np.nanmin(matrix)) if not missing.all() else 0.0
+            span = float(np.nanmax(matrix)) - offset if not missing.all() else 0.0
+            scale = span / (UINT16_NAN_SENTINEL - 1) if span > 0 else 1.0
+            quantized = np.rint((np.where(missing, offset, matrix) - offset) / scale)
+            quantized[missing] = UINT16_NAN_SENTINEL
+            buffer = quantized.astype("<u2").tobytes()
+            header.update(
+                {"nan_sentinel": UINT16_NAN_SENTINEL, "offset": offset, "scale": scale}
+            )
+        else:
+            buffer = matrix.astype("<f4").tobytes()
+            header["nan_sentinel"] = "NaN"
 
-    # Save JSON output
-    with open(os.path.join("docs", yield_json_path), "w") as json_file:
-        json.dump(yield_data, json_file, indent=2, allow_nan=False)
+    # Save header and binary buffer
+    output_path = os.path.join("docs", yield_matrix_path)
+    with stage("write"):
+        write_binary(
+            os.path.join(os.path.dirname(output_path), header["data_path"]), buffer
+        )
+        write_json(output_path, header)
 
-    print(f"Yield JSON data file generated: {yield_json_path}")
+    print(f"Yield matrix file generated: {yield_matrix_path} ({dtype})")
+
+
+def _downsample(stats: dict, row_step: int, col_step: int) -> dict:
+    """
+    Merges row_step x col_step blocks of one tile pyramid level into the next.
+
+    Args:
+        stats (dict): "sum", "count", "min" and "max" arrays of the finer level.
+        row_step (int): Rows merged per block.
+        col_step (int): Columns merged per block.
+
+    Returns:
+        dict: The same statistics for the coarser level.
+    """
+    rows, cols = stats["sum"].shape
+    pad = ((0, -rows % row_step), (0, -cols % col_step))
+    fill = {"sum": 0, "count": 0, "min": np.inf, "max": -np.inf}
+    reduce = {"sum": np.sum, "count": np.sum, "min": np.min, "max": np.max}
+    coarse = {}
+    for key, values in stats.items():
+        padded = np.pad(values, pad, constant_values=fill[key])
+        blocks = padded.reshape(
+            padded.shape[0] // row_step, row_step, padded.shape[1] // col_step, col_step
+        )
+        coarse[key] = reduce[key](blocks, axis=(1, 3))
+    return coarse
+
+
+def generate_heatmap_tiles(
+    tile_index_path: str, data_dir: str, tile_size: int = TILE_SIZE
+):
+    """
+    Generates a multi-resolution tile pyramid of the yield matrix, so heatmaps of
+    very large datasets only fetch the cells visible at the current zoom level.
+
+    Level 0 is the full compounds x methods matrix. Each further level halves
+    every axis still longer than one tile, aggregating the merged cells into
+    their mean, min and max (ignoring missing yields), until the whole matrix
+    fits in a single tile. Every level is cut into tile_size x tile_size tiles of
+    little-endian float32 planes (mean, then min and max above level 0), written
+    to "<index name>/<level>/<row>_<col>.bin" next to the tile index JSON.
+
+    Args:
+        tile_index_path (str): Path to save the tile index JSON file, relative to docs.
+        data_dir (str): Path to the folder containing data pickle files.
+        tile_size (int): Cells per tile side.
+
+    Returns:
+        None
+    """
+    compounds, methods, matrix = load_yield_matrix(data_dir)
+
+    output_path = os.path.join("docs", tile_index_path)
+    tile_dirname = os.path.splitext(os.path.basename(tile_index_path))[0]
+    tile_dir = os.path.join(os.path.dirname(output_path), tile_dirname)
+    if os.path.exists(tile_dir):
+        shutil.rmtree(tile_dir)  # Tiles are always fully regenerated
+
+    # Aggregates are carried up the pyramid exactly, rather than averaging means
+    missing = np.isnan(matrix)
+    stats = {
+        "sum": np.where(missing, 0.0, matrix),
+        "count": (~missing).astype(np.int64),
+        "min": np.where(missing, np.inf, matrix),
+        "max": np.where(missing, -np.inf, matrix),
+    }
+    levels = []
+    row_factor = col_factor = 1
+    tile_count = 0
+    tile_bytes = 0
+    while True:
+        level = len(levels)
+        rows, cols = stats["sum"].shape
+        with stage("aggregate"):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # Empty cells -> NaN
+                planes = [stats["sum"] / stats["count"]]
+            if level > 0:
+                planes.append(np.where(np.isinf(stats["min"]), np.nan, stats["min"]))
+                planes.append(np.where(np.isinf(stats["max"]), np.nan, stats["max"]))
+            planes = np.stack(planes).astype("<f4")
+
+        with stage("write_tiles"):
+            tile_rows = -(-rows // tile_size)
+            tile_cols = -(-cols // tile_size)
+            os.makedirs(os.path.join(tile_dir, str(level)), exist_ok=True)
+            for tile_row in range(tile_rows):
+                for tile_col in range(tile_cols):
+                    tile = planes[
+                        :,
+                        tile_row * tile_size : (tile_row + 1) * tile_size,
+                        tile_col * tile_size : (tile_col + 1) * tile_size,
+                    ]
+                    sizes = write_binary(
+                        os.path.join(
+                            tile_dir, str(level), f"{tile_row}_{tile_col}.bin"
+                        ),
+                        np.ascontiguousarray(tile).tobytes(),
+                        report=False,
+                    )
+                    tile_count += 1
+                    tile_bytes += sizes["raw"]
+
+        levels.append(
+            {
+                "level": level,
+                "row_factor": row_factor,
+                "col_factor": col_factor,
+                "rows": rows,
+                "cols": cols,
+                "tile_rows": tile_rows,
+                "tile_cols": tile_cols,
+                "planes": ["mean", "min", "max"] if level > 0 else ["mean"],
+            }
+        )
+        if rows <= tile_size and cols <= tile_size:
+            break
+
+        row_step = 2 if rows > tile_size else 1
+        col_step = 2 if cols > tile_size else 1
+        with stage("aggregate"):
+            stats = _downsample(stats, row_step, col_step)
+        row_factor *= row_step
+        col_factor *= col_step
+
+    tile_index = {
+        "compounds": compounds,
+        "methods": methods,
+        "shape": list(matrix.shape),
+        "tile_size": tile_size,
+        "dtype": "float32",
+        "byte_order": "little",
+        "url_template": f"{tile_dirname}/{{level}}/{{row}}_{{col}}.bin",
+        # Tile URLs are templated, so pages version them with this hash instead
+        "data_hash": hashlib.sha256(matrix.tobytes()).hexdigest()[:10],
+        "levels": levels,
+    }
+    with stage("write"):
+        write_json(output_path, tile_index)
+
+    print(
+        f"Heatmap tiles generated: {tile_index_path} "
+        f"({len(levels)} levels, {tile_count} tiles, {tile_bytes:,} B raw)"
+    )
 
 
 if __name__ == "__main__":
@@ -115,13 +468,22 @@ if __name__ == "__main__":
     graph_name = "Yields Map"
     output_json_path = "docs/data/heatmap/252_compounds.json"
     yield_json_path = "data/yields/252_yields.json"
+    yield_matrix_path = "data/yields/252_yields_matrix.json"
     data_dir = "data_252"  # Path to the folder containing data pickle files
     image_dir = os.path.join("docs", "images")  # Path to the folder containing images
 
     print("Generating JSON files...")
     # Generate separate yield JSON
     generate_yield_json(yield_json_path, data_dir)
+    # Generate the binary yield matrix consumed by the heatmap page
+    generate_yield_binary(yield_matrix_path, data_dir, dtype="float32")
     # Generate heatmap JSON with reference to yield data JSON
     generate_heatmap_json(
-        output_json_path, yield_json_path, data_dir, image_dir, title, graph_name
+        output_json_path,
+        yield_json_path,
+        data_dir,
+        image_dir,
+        title,
+        graph_name,
+        yield_matrix_path=yield_matrix_path,
     )
@@ -0,0 +1,322 @@
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+from PIL import Image, features
+from json_output import write_binary, write_json
+from profiling import stage
+
+# Bounding boxes (in pixels) of the generated thumbnails; 150 matches the
+# hover panel's max image size, 300 covers high-DPI screens
+THUMBNAIL_SIZES = (150, 300)
+VARIANT_FORMATS = ("webp", "avif")
+VARIANT_DIRNAME = "variants"
+# Thumbnails packed into the image bundles (see generate_image_bundle); the
+# bundles hold hover images only, originals stay individual files
+BUNDLE_SIZES = THUMBNAIL_SIZES
+BUNDLE_FORMATS = ("webp",)
+
+
+def _transcode(task: tuple) -> dict:
+    """
+    Writes one resized variant of a source image, unless it is already up to date.
+
+    Args:
+        task (tuple): (source_path, variant_path, size, image_format).
+
+    Returns:
+        dict: Variant path, format and dimensions, and whether it was rewritten.
+    """
+    source_path, variant_path, size, image_format = task
+    up_to_date = os.path.exists(variant_path) and os.path.getmtime(
+        variant_path
+    ) >= os.path.getmtime(source_path)
+    if not up_to_date:
+        with Image.open(source_path) as img:
+            img = img.convert("RGBA")
+            img.thumbnail((size, size), Image.LANCZOS)  # Keeps aspect, no upscale
+            # Write then rename, since datasets sharing an image may run concurrently
+            temp_path = f"{variant_path}.{os.getpid()}.tmp"
+            img.save(temp_path, format=image_format.upper(), quality=80)
+            os.replace(temp_path, variant_path)
+    with Image.open(variant_path) as img:
+        width, height = img.size
+    return {
+        "path": variant_path,
+        "format": image_format,
+        "width": width,
+        "height": height,
+        "bytes": os.path.getsize(variant_path),
+        "written": not up_to_date,
+    }
+
+
+def _image_sources(data_dir: str, image_dir: str) -> dict:
+    """
+    Resolves the source image of every compound of a dataset.
+
+    Args:
+        data_dir (str): Path to the folder containing mol_image_paths_captioned.json.
+        image_dir (str): Directory containing molecular images, named by compound IDs.
+
+    Returns:
+        dict: Source image path keyed by compound ID, for the images that exist.
+    """
+    image_paths_json = os.path.join(data_dir, "mol_image_paths_captioned.json")
+    if not os.path.exists(image_paths_json):
+        raise FileNotFoundError(f"Required file not found: {image_paths_json}")
+    if not os.path.exists(image_dir):
+        raise FileNotFoundError(f"Image directory not found: {image_dir}")
+
+    with open(image_paths_json, "r") as f:
+        mol_image_paths = json.load(f)
+
+    sources = {}
+    for compound_id, img_path in mol_image_paths.items():
+        base_filename = os.path.basename(img_path.replace("\\", "/"))
+        source_path = os.path.join(image_dir, base_filename)
+        if not os.path.exists(source_path):
+            print(f"Warning: Image file not found for {compound_id} at {source_path}")
+            continue
+        sources[compound_id] = source_path
+    return sources
+
+
+def _supported_formats(formats: tuple) -> list[str]:
+    # Skip formats this Pillow build cannot encode
+    supported_formats = []
+    for image_format in formats:
+        if features.check(image_format):
+            supported_formats.append(image_format)
+        else:
+            print(f"Warning: Pillow has no {image_format} support, skipping it")
+    return supported_formats
+
+
+def _file_url(path: str, url_root: str) -> str:
+    # Percent-encoded: most image names contain spaces, which end a srcset URL
+    return quote(os.path.relpath(path, url_root).replace(os.sep, "/"))
+
+
+def _variant_path(
+    variant_dir: str, source_path: str, size: int, image_format: str
+) -> str:
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(variant_dir, f"{stem}_{size}.{image_format}")
+
+
+def generate_image_variants(
+    output_json_path: str,
+    data_dir: str,
+    image_dir: str,
+    sizes: tuple = THUMBNAIL_SIZES,
+    formats: tuple = VARIANT_FORMATS,
+    jobs: int | None = None,
+):
+    """
+    Generates resized WebP/AVIF variants of a dataset's molecule images in
+    parallel worker processes, and a JSON manifest mapping each compound ID to
+    its variants.
+
+    Variants are written to image_dir/variants and skipped when they are newer
+    than their source image. Variant URLs in the manifest are relative to the
+    parent of image_dir, like the images map written by the generators, and
+    percent-encoded so they can be used in srcset attributes as is. Each
+    compound also lists its original image (format "png") as the largest variant.
+
+    Args:
+        output_json_path (str): Path to save the variant manifest JSON file.
+        data_dir (str): Path to the folder containing mol_image_paths_captioned.json.
+        image_dir (str): Directory containing molecular images, named by compound IDs.
+        sizes (tuple): Bounding box sizes (in pixels) of the thumbnails.
+        formats (tuple): Image formats of the thumbnails ("webp", "avif").
+        jobs (int | None): Number of worker processes (defaults to the CPU count).
+
+    Returns:
+        None
+    """
+    with stage("scan"):
+        sources = _image_sources(data_dir, image_dir)
+    supported_formats = _supported_formats(formats)
+
+    variant_dir = os.path.join(image_dir, VARIANT_DIRNAME)
+    os.makedirs(variant_dir, exist_ok=True)
+    url_root = os.path.dirname(os.path.normpath(image_dir))
+
+    # One task per (source image, size, format); images are shared across compounds
+    tasks = {}
+    for source_path in sources.values():
+        for size in sizes:
+            for image_format in supported_formats:
+                variant_path = _variant_path(
+                    variant_dir, source_path, size, image_format
+                )
+                tasks[variant_path] = (source_path, variant_path, size, image_format)
+
+    with stage("transcode"):
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_transcode, tasks.values(), chunksize=16))
+    variants_by_source = {}
+    for task, result in zip(tasks.values(), results):
+        variants_by_source.setdefault(task[0], []).append(result)
+
+    # Map each compound to its variants, smallest first, ending with the original
+    with stage("manifest"):
+        manifest = {"sizes": list(sizes), "formats": supported_formats, "compounds": {}}
+        for compound_id, source_path in sources.items():
+            with Image.open(source_path) as img:
+                width, height = img.size
+            variants = sorted(
+                variants_by_source.get(source_path, []),
+                key=lambda v: (v["width"] * v["height"], v["bytes"]),
+            )
+            original = {
+                "path": source_path,
+                "format": "png",
+                "width": width,
+                "height": height,
+                "bytes": os.path.getsize(source_path),
+            }
+            manifest["compounds"][compound_id] = [
+                {
+                    "url": _file_url(variant["path"], url_root),
+                    "format": variant["format"],
+                    "width": variant["width"],
+                    "height": variant["height"],
+                    "bytes": variant["bytes"],
+                }
+                for variant in variants + [original]
+            ]
+
+    os.makedirs(os.path.dirname(output_json_path) or ".", exist_ok=True)
+    with stage("write"):
+        write_json(output_json_path, manifest)
+
+    written = sum(result["written"] for result in results)
+    print(f"Image variants: {written} written, {len(results) - written} up to date")
+    print(f"Image variant manifest generated: {output_json_path}")
+
+
+def generate_image_bundle(
+    output_json_path: str,
+    data_dir: str,
+    image_dir: str,
+    sizes: tuple = BUNDLE_SIZES,
+    formats: tuple = BUNDLE_FORMATS,
+    jobs: int | None = None,
+):
+    """
+    Packs a dataset's molecule thumbnails into one binary bundle per format and
+    size, with a JSON index of the byte range of every compound's image in each
+    bundle. Pages fetch single images with HTTP Range requests, or a whole
+    bundle in one transfer, instead of one request per compound (and without
+    the base64 inflation of inlined images).
+
+    The thumbnails are the variants written by generate_image_variants; missing
+    or stale ones are transcoded first. Images shared by several compounds are
+    stored once. Bundles are written to a folder named after the index
+    (<stem>/<format>_<size>.bin), and their URLs in the index are relative to
+    the parent of image_dir and percent-encoded, like the variant URLs.
+
+    Args:
+        output_json_path (str): Path to save the bundle index JSON file.
+        data_dir (str): Path to the folder containing mol_image_paths_captioned.json.
+        image_dir (str): Directory containing molecular images, named by compound IDs.
+        sizes (tuple): Bounding box sizes (in pixels) of the bundled thumbnails.
+        formats (tuple): Image formats of the bundled thumbnails, in order of
+            preference.
+        jobs (int | None): Number of worker processes (defaults to the CPU count).
+
+    Returns:
+        None
+    """
+    with stage("scan"):
+        sources = _image_sources(data_dir, image_dir)
+    supported_formats = _supported_formats(formats)
+
+    variant_dir = os.path.join(image_dir, VARIANT_DIRNAME)
+    os.makedirs(variant_dir, exist_ok=True)
+    url_root = os.path.dirname(os.path.normpath(image_dir))
+    bundle_dir = os.path.splitext(output_json_path)[0]
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    # Smallest bundles first, in order of format preference within a size
+    packs = [
+        (size, image_format)
+        for size in sorted(sizes)
+        for image_format in supported_formats
+    ]
+    unique_sources = list(dict.fromkeys(sources.values()))
+    tasks = [
+        (
+            source_path,
+            _variant_path(variant_dir, source_path, size, image_format),
+            size,
+            image_format,
+        )
+        for size, image_format in packs
+        for source_path in unique_sources
+    ]
+    with stage("transcode"):
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_transcode, tasks, chunksize=16))
+
+    # Concatenate each bundle's images in compound order, so neighbouring
+    # compounds are close together in the bundle
+    index = {"packs": [], "compounds": {compound_id: {} for compound_id in sources}}
+    ranges = {}
+    with stage("pack"):
+        for pack_number, (size, image_format) in enumerate(packs):
+            name = f"{image_format}_{size}"
+            pack_results = results[
+                pack_number
+                * len(unique_sources) : (pack_number + 1)
+                * len(unique_sources)
+            ]
+            chunks = []
+            offset = 0
+            for source_path, result in zip(unique_sources, pack_results):
+                with open(result["path"], "rb") as f:
+                    chunks.append(f.read())
+                ranges[source_path] = [offset, len(chunks[-1])]
+                offset += len(chunks[-1])
+            pack_path = os.path.join(bundle_dir, f"{name}.bin")
+            # Images are already compressed, and Range requests need the raw file
+            write_binary(pack_path, b"".join(chunks), compress=False)
+            index["packs"].append(
+                {
+                    "name": name,
+                    "url": _file_url(pack_path, url_root),
+                    "format": image_format,
+                    "size": size,
+                    "bytes": offset,
+                }
+            )
+            for compound_id, source_path in sources.items():
+                index["compounds"][compound_id][name] = ranges[source_path]
+
+    # Remove the bundles of sizes or formats no longer packed
+    current = {f"{pack['name']}.bin" for pack in index["packs"]}
+    for filename in os.listdir(bundle_dir):
+        if filename not in current:
+            os.remove(os.path.join(bundle_dir, filename))
+
+    with stage("write"):
+        write_json(output_json_path, index)
+
+    written = sum(result["written"] for result in results)
+    print(
+        f"Image bundle: {len(unique_sources)} images in {len(packs)} bundles, "
+        f"{written} thumbnails written"
+    )
+    print(f"Image bundle index generated: {output_json_path}")
+
+
+if __name__ == "__main__":
+    data_dir = "data_252"  # Path to the folder containing data pickle files
+    image_dir = os.path.join("docs", "images")  # Path to the folder containing images
+    output_json_path = "docs/data/images/252_images.json"
+    bundle_json_path = "docs/data/images/252_image_bundle.json"
+
+    generate_image_variants(output_json_path, data_dir, image_dir)
+    generate_image_bundle(bundle_json_path, data_dir, image_dir)
@@ -1,159 +1,360 @@
 import os
-import glob
-import time
+import re
+import json
 from datetime import datetime, timezone
 from collections import defaultdict
 import pytz
+from urllib.parse import quote
+from fingerprint import Fingerprinter
+from generate_dataset_manifest import CHART_PAGES, DATASET_MANIFEST_PATH
+from json_output import write_json
 
 
 tz = pytz.timezone("America/Chicago")  # CST/CDT timezone
-timestamp = int(time.time())  # For cache busting
-
-# Define folder where HTML files are stored
-folder = "docs"
-
-# Get the root directory name
-repo_name = os.path.basename(os.getcwd())
-
-# List all HTML files inside `docs/`, excluding `index.html`
-html_files = [f for f in glob.glob("*.html", root_dir=folder) if f != "index.html"]
-
-# Organize files by prefix
-file_groups = defaultdict(list)
-for filename in sorted(html_files):
-    display_name = filename.replace("_", " ").replace(".html", "")
-    prefix = display_name.split(" ", 1)[0]  # Use the first word as prefix
-    file_groups[prefix].append((filename, display_name))
-
-# write to index.html
-with open(os.path.join(folder, "index.html"), "w") as index_file:
-    header = """<!DOCTYPE html>
+# Search index loaded by the index page, relative to the site folder
+SEARCH_INDEX_PATH = os.path.join("data", "search_index.json")
+INDEX_HEADER = """<!DOCTYPE html>
 <html>
 	<head>
 		<meta charset="UTF-8">
-		<meta http-equiv="cache-control" content="no-cache, must-revalidate, post-check=0, pre-check=0" />
-		<meta http-equiv="cache-control" content="max-age=0" />
-		<meta http-equiv="expires" content="0" />
-		<meta http-equiv="expires" content="Tue, 01 Jan 1980 1:00:00 GMT" />
-		<meta http-equiv="pragma" content="no-cache" />
 		<title>Available Pages for ___repoName___ repo</title>
         <link rel="shortcut icon" type="image/x-icon" href="favicon.ico">
 		<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-QWTKZyjpPEjISv5WaRU9OFeRpok6YctnYmDr5pNlyT2bRjXh0JMhjY6hW+ALEwIH" crossorigin="anonymous">
 		<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js" integrity="sha384-YvpcrYf0tY3lHB60NNkmXc5s9fDVZLESaAA55NDzOxhy9GkcIdslK1eN7N6jIeHz" crossorigin="anonymous"></script>
         <script>
-            function filterList() {
-                let input = document.getElementById('searchInput').value.toLowerCase();
-                let items = document.querySelectorAll('.list-group-item');
-                let tabs = document.querySelectorAll('.nav-link'); // All tab buttons
-                let tabContents = document.querySelectorAll('.tab-pane'); // All tab contents
-                let foundInTabs = {}; // Track if any items are found in each tab
-                let hasGlobalMatch = false; // Track if any item is visible at all
-
-                // Hide all items initially
-                items.forEach(item => {
-                    let text = item.textContent.toLowerCase();
-                    let parentTab = item.closest('.tab-pane').id;
-
-                    if (text.includes(input)) {
-                        item.style.display = '';
-                        foundInTabs[parentTab] = true;
-                        hasGlobalMatch = true;
-                    } else {
-                        item.style.display = 'none'; // Hide non-matching item
-                    }
-                });
+            const SEARCH_INDEX_URL = "data/search_index.json";
+            const PAGE_SIZE = 100; // Links rendered per result page
+
+            let searchIndex = null;
+            let activeGroup = 0;
+            let currentPage = 0;
+
+            // Token ids starting with term, found by binary search in the sorted token list
+            function tokensWithPrefix(term) {
+                const tokens = searchIndex.tokens;
+                let low = 0, high = tokens.length;
+                while (low < high) {
+                    const mid = (low + high) >> 1;
+                    if (tokens[mid] < term) low = mid + 1; else high = mid;
+                }
+                const ids = [];
+                for (let i = low; i < tokens.length && tokens[i].startsWith(term); i++) ids.push(i);
+                return ids;
+            }
 
-                // Hide tabs with no results and activate the first one with results
-                let firstVisibleTab = null;
-                tabs.forEach(tab => {
-                    let targetTab = tab.getAttribute('data-bs-target').substring(1); // Get tab-pane ID
-                    let tabPane = document.getElementById(targetTab); // The tab content
-
-                    if (foundInTabs[targetTab]) {
-                        tab.style.display = ''; // Show tab
-                        tabPane.style.display = ''; // Show tab content
-                        if (!firstVisibleTab) {
-                            firstVisibleTab = tab; // Mark first visible tab
-                        }
-                    } else {
-                        tab.style.display = 'none'; // Hide tab
-                        tabPane.style.display = 'none'; // Hide tab content
-                    }
+            // Ids of the pages matching every search term (as a token prefix) and the facets
+            function matchingPages() {
+                const terms = document.getElementById('searchInput').value.toLowerCase().match(/[a-z0-9]+/g) || [];
+                let matches = null;
+                for (const term of terms) {
+                    const termMatches = new Set();
+                    tokensWithPrefix(term).forEach(id => searchIndex.postings[id].forEach(page => termMatches.add(page)));
+                    matches = matches === null ? termMatches : new Set([...matches].filter(page => termMatches.has(page)));
+                    if (!matches.size) break;
+                }
+                const dataset = document.getElementById('datasetFilter').value;
+                const chart = document.getElementById('chartFilter').value;
+                const ids = matches === null ? searchIndex.pages.map((_, id) => id) : [...matches].sort((a, b) => a - b);
+                return ids.filter(id => {
+                    const page = searchIndex.pages[id];
+                    return (dataset === '' || page[4] === +dataset) && (chart === '' || page[5] === +chart);
                 });
+            }
 
-                // If no matches at all, hide everything
-                if (!hasGlobalMatch) {
-                    tabs.forEach(tab => (tab.style.display = 'none')); // Hide all tabs
-                    tabContents.forEach(tabPane => (tabPane.style.display = 'none')); // Hide all content
-                } else if (firstVisibleTab) { // Activate the first visible tab
-                    let tabInstance = new bootstrap.Tab(firstVisibleTab);
-                    tabInstance.show();
+            function filterList() {
+                currentPage = 0;
+                renderResults();
+            }
+
+            function renderResults() {
+                if (!searchIndex) return;
+                const ids = matchingPages();
+
+                // Count matches per group; hide the tabs without results
+                const counts = searchIndex.groups.map(() => 0);
+                ids.forEach(id => counts[searchIndex.pages[id][3]]++);
+                if (!counts[activeGroup]) {
+                    const firstWithResults = counts.findIndex(count => count > 0);
+                    activeGroup = firstWithResults === -1 ? 0 : firstWithResults;
                 }
+                const tabs = document.getElementById('navTabs');
+                tabs.replaceChildren(...searchIndex.groups.map((group, index) => {
+                    const item = document.createElement('li');
+                    item.className = 'nav-item';
+                    item.style.display = counts[index] ? '' : 'none';
+                    const button = document.createElement('button');
+                    button.className = 'nav-link' + (index === activeGroup ? ' active' : '');
+                    button.type = 'button';
+                    button.textContent = `${group} (${counts[index]})`;
+                    button.onclick = () => { activeGroup = index; currentPage = 0; renderResults(); };
+                    item.appendChild(button);
+                    return item;
+                }));
+
+                // Render only the current page of the active group's links
+                const groupIds = ids.filter(id => searchIndex.pages[id][3] === activeGroup);
+                const pageCount = Math.max(1, Math.ceil(groupIds.length / PAGE_SIZE));
+                currentPage = Math.min(currentPage, pageCount - 1);
+                const list = document.getElementById('pageList');
+                list.replaceChildren(...groupIds.slice(currentPage * PAGE_SIZE, (currentPage + 1) * PAGE_SIZE).map(id => {
+                    const [name, url, created] = searchIndex.pages[id];
+                    const link = document.createElement('a');
+                    link.href = url;
+                    link.className = 'list-group-item list-group-item-action d-flex justify-content-between align-items-center';
+                    link.textContent = name;
+                    const date = document.createElement('small');
+                    date.className = 'text-muted';
+                    date.textContent = created;
+                    link.appendChild(date);
+                    return link;
+                }));
+
+                document.getElementById('resultCount').textContent = ids.length
+                    ? `${ids.length} of ${searchIndex.pages.length} pages`
+                    : 'No pages found';
+                document.getElementById('pageInfo').textContent = `Page ${currentPage + 1} of ${pageCount}`;
+                document.getElementById('previousPage').disabled = currentPage === 0;
+                document.getElementById('nextPage').disabled = currentPage >= pageCount - 1;
+                document.getElementById('pagination').style.display = pageCount > 1 ? '' : 'none';
+            }
+
+            function changePage(step) {
+                currentPage += step;
+                renderResults();
+                window.scrollTo(0, 0);
             }
+
+            function fillFacet(selectId, values) {
+                const select = document.getElementById(selectId);
+                values.forEach((value, index) => {
+                    if (value !== '') select.add(new Option(value, index));
+                });
+            }
+
+            async function loadSearchIndex() {
+                const response = await fetch(SEARCH_INDEX_URL);
+                searchIndex = await response.json();
+                fillFacet('datasetFilter', searchIndex.datasets);
+                fillFacet('chartFilter', searchIndex.charts);
+                renderResults();
+            }
+
+            document.addEventListener('DOMContentLoaded', loadSearchIndex);
         </script>
 	</head>
 	<body>
 		<div class="container mt-5">
 			<h2 class="mb-4">Available Pages for ___repoName___ repo</h2>
 
-			<!-- Search Input -->
-			<input type="text" id="searchInput" class="form-control mb-3" onkeyup="filterList()" placeholder="Search pages...">
+			<!-- Search Input and Facets -->
+			<input type="text" id="searchInput" class="form-control mb-3" oninput="filterList()" placeholder="Search pages...">
+			<div class="row g-2 mb-3">
+				<div class="col"><select id="datasetFilter" class="form-select" onchange="filterList()"><option value="">All datasets</option></select></div>
+				<div class="col"><select id="chartFilter" class="form-select" onchange="filterList()"><option value="">All chart types</option></select></div>
+			</div>
 
-			<!-- Navigation Tabs -->
-			<ul class="nav nav-tabs" id="navTabs" role="tablist">
+			<!-- Navigation Tabs (one per page name prefix) -->
+			<ul class="nav nav-tabs" id="navTabs" role="tablist"></ul>
+			<div class="mt-3">
+				<small class="text-muted" id="resultCount">Loading pages...</small>
+				<div class="list-group mt-2" id="pageList"></div>
+				<div id="pagination" style="display: none;">
+					<div class="d-flex justify-content-center align-items-center gap-3 my-3">
+						<button type="button" class="btn btn-outline-secondary btn-sm" id="previousPage" onclick="changePage(-1)">Previous</button>
+						<span id="pageInfo"></span>
+						<button type="button" class="btn btn-outline-secondary btn-sm" id="nextPage" onclick="changePage(1)">Next</button>
+					</div>
+				</div>
 """
-    index_file.write(header.replace("___repoName___", repo_name))
-
-    # Create tab navigation
-    first = True
-    for prefix in file_groups.keys():
-        active_class = "active" if first else ""
-        aria_selected = "true" if first else "false"
-        index_file.write(
-            f'			<li class="nav-item" role="presentation">\n'
-            f'				<button class="nav-link {active_class}" id="{prefix}-tab" data-bs-toggle="tab" data-bs-target="#{prefix}" type="button" role="tab" aria-controls="{prefix}" aria-selected="{aria_selected}">\n'
-            f"					{prefix}\n"
-            f"				</button>\n"
-            f"			</li>\n"
-        )
-        first = False
-
-    index_file.write(
-        "			</ul>\n			<div class='tab-content mt-3' id='navTabContent'>\n"
-    )
-
-    # Generate content for each tab
-    first = True
-    for prefix, files in file_groups.items():
-        active_class = "show active" if first else ""
-        index_file.write(
-            f"				<div class='tab-pane fade {active_class}' id='{prefix}' role='tabpanel' aria-labelledby='{prefix}-tab'>\n"
-            f"					<div class='list-group'>\n"
-        )
-
-        for filename, display_name in files:
-            created_utc = datetime.fromtimestamp(
-                os.path.getctime(os.path.join(folder, filename)), tz=timezone.utc
-            )
-            created_est = created_utc.astimezone(tz)  # Convert to EST/EDT dynamically
-            created_time = created_est.strftime("%Y-%m-%d %H:%M")  # Removed UTC offset
-
-            index_file.write(
-                f"						<a href='{filename}?v={timestamp}' class='list-group-item list-group-item-action d-flex justify-content-between align-items-center'>\n"
-                f"							{display_name}\n"
-                f"							<small class='text-muted'>{created_time}</small>\n"
-                f"						</a>\n"
-            )
-
-        index_file.write("					</div>\n				</div>\n")
-        first = False
 
-    index_file.write(
-        """			</div>
+INDEX_FOOTER = """			</div>
 		</div>
 	</body>
 </html>
 """
-    )
 
-print("Index page successfully generated!")
+
+def page_facets(filename: str) -> tuple[str, str]:
+    """
+    Splits a page file name into its chart type and dataset.
+
+    Args:
+        filename (str): Page file name, e.g. "Yield Heatmap_252.html".
+
+    Returns:
+        tuple[str, str]: Chart type and dataset, e.g. ("Yield Heatmap", "252").
+            The dataset is empty for names without an underscore.
+    """
+    chart, _, dataset = filename.removesuffix(".html").rpartition("_")
+    if not chart:
+        return dataset.replace("_", " "), ""
+    return chart.replace("_", " "), dataset
+
+
+def format_created(timestamp: float) -> str:
+    """
+    Formats a file creation time for the page listing.
+
+    Args:
+        timestamp (float): POSIX timestamp.
+
+    Returns:
+        str: Local (America/Chicago) time, e.g. "2025-01-31 09:30".
+    """
+    created_utc = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    # Convert to EST/EDT dynamically, without the UTC offset
+    return created_utc.astimezone(tz).strftime("%Y-%m-%d %H:%M")
+
+
+def chart_app_pages(folder: str, fingerprinter: Fingerprinter) -> list[dict]:
+    """
+    Lists one page per dataset and chart in the dataset manifest, linking to
+    the chart app with the dataset selected (e.g. "barchart.html?dataset=252").
+
+    Args:
+        folder (str): Site folder.
+        fingerprinter (Fingerprinter): Fingerprints the app page links.
+
+    Returns:
+        list[dict]: Pages with the keys expected by build_search_index, named
+            like the per-dataset pages they replace ("Barchart 252"), or an
+            empty list when there is no dataset manifest.
+    """
+    manifest_path = os.path.join(folder, DATASET_MANIFEST_PATH)
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+
+    pages = []
+    for dataset in manifest["datasets"]:
+        for chart, entry in dataset["charts"].items():
+            app_page, label = CHART_PAGES[chart]
+            url = fingerprinter.fingerprint_url(app_page)
+            url += ("&" if "?" in url else "?") + f"dataset={quote(dataset['name'])}"
+            # The chart data was created with the dataset's page
+            data_path = os.path.join(folder, entry["data_path"].split("?", 1)[0])
+            name = f"{label} {dataset['name']}"
+            pages.append(
+                {
+                    "name": name,
+                    "url": url,
+                    "created": format_created(os.stat(data_path).st_ctime),
+                    "group": name.split(" ", 1)[0],
+                    "dataset": dataset["name"],
+                    "chart": label,
+                }
+            )
+    return pages
+
+
+def build_search_index(pages: list[dict]) -> dict:
+    """
+    Builds the search index loaded by the index page.
+
+    Pages are stored as rows of [name, url, created, group, dataset, chart],
+    where the last three are positions in the "groups", "datasets" and
+    "charts" lists. Names are split into lowercase alphanumeric tokens; the
+    tokens are sorted, so the page finds every token starting with a search
+    term by binary search, and "postings" lists the pages of each token.
+
+    Args:
+        pages (list[dict]): Pages with "name", "url", "created", "group",
+            "dataset" and "chart" keys, in display order.
+
+    Returns:
+        dict: The search index.
+    """
+    facets = {"groups": {}, "datasets": {}, "charts": {}}
+    rows = []
+    token_pages = defaultdict(list)
+    for page_id, page in enumerate(pages):
+        row = [page["name"], page["url"], page["created"]]
+        for key, facet in zip(("group", "dataset", "chart"), facets.values()):
+            row.append(facet.setdefault(page[key], len(facet)))
+        rows.append(row)
+        for token in sorted(set(re.findall(r"[a-z0-9]+", page["name"].lower()))):
+            token_pages[token].append(page_id)
+
+    tokens = sorted(token_pages)
+    return {
+        "fields": ["name", "url", "created", "group", "dataset", "chart"],
+        "pages": rows,
+        **{key: list(facet) for key, facet in facets.items()},
+        "tokens": tokens,
+        "postings": [token_pages[token] for token in tokens],
+    }
+
+
+def generate_index_page(folder: str = "docs", file_cache: dict | None = None):
+    """
+    Generates index.html and the search index it loads, listing every HTML
+    page in the folder, and every dataset of the chart apps, grouped into tabs
+    by the first word of the page name.
+    The page searches and paginates the listing in the browser, so it stays
+    responsive with thousands of pages. Links carry a content hash of the
+    page ("?v=<hash>"), so browsers only refetch pages that changed.
+
+    Args:
+        folder (str): Folder where the HTML files are stored.
+        file_cache (dict | None): Cached file digests (see file_digest), so
+            unchanged pages are not hashed again.
+
+    Returns:
+        None
+    """
+    fingerprinter = Fingerprinter(folder, file_cache)  # For cache busting
+
+    # Get the root directory name
+    repo_name = os.path.basename(os.getcwd())
+
+    # List all HTML files inside `docs/`, excluding `index.html`, with their
+    # creation times from the directory scan
+    with os.scandir(folder) as entries:
+        html_files = {
+            entry.name: entry.stat().st_ctime
+            for entry in entries
+            if entry.name.endswith(".html") and entry.name != "index.html"
+        }
+
+    app_pages = chart_app_pages(folder, fingerprinter)
+    app_names = {page["name"].casefold() for page in app_pages}
+    app_files = {app_page for app_page, _ in CHART_PAGES.values()}
+
+    pages = []
+    for filename in sorted(html_files):
+        display_name = filename.replace("_", " ").replace(".html", "")
+        # The apps are listed per dataset, replacing the old per-dataset pages
+        if filename in app_files or display_name.casefold() in app_names:
+            continue
+        chart, dataset = page_facets(filename)
+        pages.append(
+            {
+                "name": display_name,
+                "url": fingerprinter.fingerprint_url(filename),
+                "created": format_created(html_files[filename]),
+                "group": display_name.split(" ", 1)[0],  # First word as prefix
+                "dataset": dataset,
+                "chart": chart,
+            }
+        )
+
+    pages = sorted(pages + app_pages, key=lambda page: page["name"])
+
+    search_index_path = os.path.join(folder, SEARCH_INDEX_PATH)
+    os.makedirs(os.path.dirname(search_index_path), exist_ok=True)
+    write_json(search_index_path, build_search_index(pages))
+
+    # write to index.html
+    with open(os.path.join(folder, "index.html"), "w") as index_file:
+        index_file.write(INDEX_HEADER.replace("___repoName___", repo_name))
+        index_file.write(INDEX_FOOTER)
+
+    # Fingerprint the assets referenced by the template (favicon, search index)
+    fingerprinter.rewrite_page(os.path.join(folder, "index.html"))
+
+    print("Index page successfully generated!")
+
+
+if __name__ == "__main__":
+    generate_index_page()
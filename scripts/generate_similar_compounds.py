@@ -0,0 +1,160 @@
+import os
+import numpy as np
+from data_io import TableReader, resolve_table
+from json_output import write_binary, write_json
+from profiling import stage
+
+# Analogues listed per compound
+SIMILAR_COUNT = 5
+# Distances computed at once (rows x compounds), bounding the memory per block
+MAX_BLOCK_CELLS = 1 << 22
+
+
+def standardize(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scales every column to zero mean and unit standard deviation, so that each
+    descriptor weighs the same in distances whatever its unit. Missing values
+    become 0 (the column mean), and constant columns become 0.
+
+    Args:
+        matrix (numpy.ndarray): Rows x columns matrix, NaN for missing values.
+
+    Returns:
+        numpy.ndarray: The standardized matrix.
+    """
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=0)
+    safe_counts = np.maximum(counts, 1)
+    mean = np.where(present, matrix, 0.0).sum(axis=0) / safe_counts
+    centered = np.where(present, matrix - mean, 0.0)
+    std = np.sqrt((centered**2).sum(axis=0) / safe_counts)
+    return centered / np.where(std > 0, std, 1.0)
+
+
+def nearest_neighbors(
+    points: np.ndarray, k: int, max_block_cells: int = MAX_BLOCK_CELLS
+) -> tuple:
+    """
+    Finds the k nearest rows of every row by Euclidean distance. Distances are
+    computed for a block of rows against all rows at a time, with one matrix
+    product (|a - b|^2 = |a|^2 + |b|^2 - 2 a.b), so memory grows with the block
+    size rather than with the square of the row count.
+
+    Args:
+        points (numpy.ndarray): Rows x features matrix, without NaN.
+        k (int): Neighbours per row (at most the row count - 1).
+        max_block_cells (int): Distances held at once.
+
+    Returns:
+        tuple: (indices, distances), rows x k arrays of the neighbour row
+            indices (int32) and distances (float32), nearest first. A row is
+            not its own neighbour.
+    """
+    n = len(points)
+    k = min(k, n - 1)
+    indices = np.empty((n, max(k, 0)), dtype=np.int32)
+    distances = np.empty((n, max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, distances
+
+    squared_norms = np.einsum("ij,ij->i", points, points)
+    block_rows = max(1, max_block_cells // n)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        # In place, so a block needs one distance matrix (plus the partition indices)
+        block = points[start:stop] @ points.T
+        block *= -2.0
+        block += squared_norms[start:stop, None]
+        block += squared_norms[None, :]
+        rows = np.arange(stop - start)
+        block[rows, start + rows] = np.inf  # Exclude the compound itself
+        # Unordered k smallest per row, then sorted among themselves
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        nearest_distances = np.take_along_axis(block, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1, kind="stable")
+        indices[start:stop] = np.take_along_axis(nearest, order, axis=1)
+        distances[start:stop] = np.sqrt(
+            np.maximum(np.take_along_axis(nearest_distances, order, axis=1), 0.0)
+        )
+    return indices, distances
+
+
+def generate_similar_compounds(
+    similar_path: str,
+    properties_pkl: str,
+    data_dir: str,
+    k: int = SIMILAR_COUNT,
+):
+    """
+    Generates the similar compounds index: the k nearest compounds of every
+    compound over the standardized DFT properties, so pages look up analogues
+    without computing distances.
+
+    The neighbour table is stored as a binary buffer with a small JSON header,
+    like the yield matrix (see generate_heatmap_json.generate_yield_binary): the
+    rows x k neighbour indices into the header's compound list as little-endian
+    int32, followed by the rows x k distances as little-endian float32, nearest
+    first. The binary buffer is written next to the header with a ".bin"
+    extension.
+
+    Args:
+        similar_path (str): Path to save the header JSON file, relative to docs.
+        properties_pkl (str): Properties data file (pickle). A Parquet or Arrow
+            file with the same name is read instead when present.
+        data_dir (str): Path to the folder containing data pickle files.
+        k (int): Analogues listed per compound.
+
+    Returns:
+        None
+    """
+    properties_path = resolve_table(os.path.join(data_dir, properties_pkl))
+    if not os.path.exists(properties_path):
+        raise FileNotFoundError(f"Required file not found: {properties_path}")
+
+    with stage("load"):
+        properties = TableReader(properties_path)
+        property_columns = properties.numeric_columns()
+        property_df = properties.read(
+            ["Compound_Name"] + property_columns
+        ).drop_duplicates("Compound_Name")
+        compounds = property_df["Compound_Name"].tolist()
+        matrix = property_df[property_columns].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+
+    with stage("neighbors"):
+        indices, distances = nearest_neighbors(standardize(matrix), k)
+
+    rows, columns = indices.shape
+    header = {
+        "compounds": compounds,
+        "properties": property_columns,
+        "metric": "euclidean",
+        "standardized": True,
+        "k": columns,
+        "shape": [rows, columns],
+        "index_dtype": "int32",
+        "distance_dtype": "float32",
+        "distance_offset": indices.nbytes,
+        "byte_order": "little",
+        "data_path": os.path.splitext(os.path.basename(similar_path))[0] + ".bin",
+    }
+    buffer = indices.astype("<i4").tobytes() + distances.astype("<f4").tobytes()
+
+    # Save header and binary buffer
+    output_path = os.path.join("docs", similar_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with stage("write"):
+        write_binary(
+            os.path.join(os.path.dirname(output_path), header["data_path"]), buffer
+        )
+        write_json(output_path, header)
+
+    print(f"Similar compounds index generated: {similar_path} ({columns} per compound)")
+
+
+if __name__ == "__main__":
+    similar_path = "data/similar/252_similar.json"
+    data_dir = "data_252"  # Path to the folder containing data pickle files
+
+    generate_similar_compounds(similar_path, "Select_properties.pkl", data_dir)
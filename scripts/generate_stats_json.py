@@ -0,0 +1,235 @@
+import os
+import numpy as np
+import pandas as pd
+from data_io import TableReader, resolve_table
+from generate_heatmap_json import load_yield_matrix
+from json_output import write_json
+from numeric_engine import encode_array, encode_matrix
+from profiling import stage
+
+# Compounds listed per method, highest yield first
+TOP_K = 10
+# Yield quantiles summarized per method
+SUMMARY_QUANTILES = {"min": 0.0, "q25": 0.25, "median": 0.5, "q75": 0.75, "max": 1.0}
+# Correlations are rounded to this many decimals to keep the file compact
+CORRELATION_DECIMALS = 4
+# Pairs with fewer compounds than this get no correlation
+MIN_PAIR_COUNT = 3
+
+
+def _column_means(matrix: np.ndarray, present: np.ndarray) -> np.ndarray:
+    # Like np.nanmean, but without warnings for empty columns (NaN means)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(present, matrix, 0.0).sum(axis=0) / present.sum(axis=0)
+
+
+def pairwise_correlation(x: np.ndarray, y: np.ndarray) -> tuple:
+    """
+    Computes the Pearson correlation of every column of x with every column of
+    y, each pair over the rows where both values are present.
+
+    The sums for all pairs come from a few matrix products over the zero-filled
+    columns and their presence masks, instead of one pass per pair.
+
+    Args:
+        x (numpy.ndarray): Rows x p matrix, NaN for missing values.
+        y (numpy.ndarray): Rows x k matrix, NaN for missing values.
+
+    Returns:
+        tuple: (correlations, counts), p x k matrices. Correlations are NaN
+            for pairs with fewer than MIN_PAIR_COUNT rows or no variance.
+    """
+    x_present = ~np.isnan(x)
+    y_present = ~np.isnan(y)
+    # Centering first keeps the sums of squares from cancelling out
+    x = np.where(x_present, x - _column_means(x, x_present), 0.0)
+    y = np.where(y_present, y - _column_means(y, y_present), 0.0)
+    x_mask = x_present.astype(np.float64)
+    y_mask = y_present.astype(np.float64)
+
+    counts = x_mask.T @ y_mask
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_sum = x.T @ y_mask
+        y_sum = x_mask.T @ y
+        covariance = x.T @ y - x_sum * y_sum / counts
+        x_variance = (x**2).T @ y_mask - x_sum**2 / counts
+        y_variance = x_mask.T @ (y**2) - y_sum**2 / counts
+        correlations = covariance / np.sqrt(x_variance * y_variance)
+    invalid = (counts < MIN_PAIR_COUNT) | ~(x_variance > 0) | ~(y_variance > 0)
+    correlations[invalid] = np.nan
+    return np.clip(correlations, -1.0, 1.0), counts.astype(np.int64)
+
+
+def column_ranks(matrix: np.ndarray) -> np.ndarray:
+    """
+    Ranks every column (average ranks for ties), leaving missing values NaN.
+
+    Args:
+        matrix (numpy.ndarray): Rows x columns matrix, NaN for missing values.
+
+    Returns:
+        numpy.ndarray: The ranks, as floats.
+    """
+    return pd.DataFrame(matrix).rank(method="average").to_numpy(dtype=np.float64)
+
+
+def spearman_correlation(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Computes the Spearman correlation of every column of x with every column of
+    y, like DataFrame.corr(method="spearman"): each pair is ranked over the rows
+    where both values are present.
+
+    Pairs over the same rows share their ranks, so for every column of y the
+    columns of x without missing values on its rows are ranked and correlated
+    at once; only the others are ranked pair by pair.
+
+    Args:
+        x (numpy.ndarray): Rows x p matrix, NaN for missing values.
+        y (numpy.ndarray): Rows x k matrix, NaN for missing values.
+
+    Returns:
+        numpy.ndarray: p x k correlations, NaN for pairs with fewer than
+            MIN_PAIR_COUNT rows or no variance.
+    """
+    correlations = np.full((x.shape[1], y.shape[1]), np.nan)
+    for j in range(y.shape[1]):
+        rows = ~np.isnan(y[:, j])
+        x_rows = x[rows]
+        y_rows = y[rows, j : j + 1]
+        complete = ~np.isnan(x_rows).any(axis=0)
+        if complete.any():
+            correlations[complete, j] = pairwise_correlation(
+                column_ranks(x_rows[:, complete]), column_ranks(y_rows)
+            )[0][:, 0]
+        for i in np.flatnonzero(~complete).tolist():
+            both = ~np.isnan(x_rows[:, i])
+            correlations[i, j] = pairwise_correlation(
+                column_ranks(x_rows[both, i : i + 1]), column_ranks(y_rows[both])
+            )[0][0, 0]
+    return correlations
+
+
+def top_compounds(matrix: np.ndarray, compounds: list, k: int) -> tuple:
+    """
+    Finds the k compounds with the highest yield for every method.
+
+    Args:
+        matrix (numpy.ndarray): Compounds x methods yields, NaN for missing yields.
+        compounds (list): Compound IDs, in matrix row order.
+        k (int): Compounds per method.
+
+    Returns:
+        tuple: (ids, values), one list per method, highest yield first.
+    """
+    # Stable descending order with missing yields last
+    order = np.argsort(
+        np.where(np.isnan(matrix), np.inf, -matrix), axis=0, kind="stable"
+    )
+    ids, values = [], []
+    for j in range(matrix.shape[1]):
+        rows = order[:k, j]
+        rows = rows[~np.isnan(matrix[rows, j])]
+        ids.append([compounds[row] for row in rows.tolist()])
+        values.append(matrix[rows, j].tolist())
+    return ids, values
+
+
+def generate_stats_json(
+    output_json_path: str,
+    properties_pkl: str,
+    data_dir: str,
+    top_k: int = TOP_K,
+):
+    """
+    Generates a JSON file with precomputed statistics relating the DFT
+    properties to the yields:
+    - per-method yield summaries (count, mean, standard deviation, quantiles);
+    - Pearson and Spearman correlations of every property with every method,
+      as properties x methods matrices, with the number of compounds each
+      correlation was computed over;
+    - the top_k compounds with the highest yield for every method.
+
+    Correlations use the compounds that have both the property and the yield,
+    as DataFrame.corr does; Spearman correlations rank each pair over those
+    compounds.
+
+    Args:
+        output_json_path (str): Path to save the statistics JSON file.
+        properties_pkl (str): Properties data file (pickle). A Parquet or Arrow
+            file with the same name is read instead when present.
+        data_dir (str): Path to the folder containing data pickle files.
+        top_k (int): Compounds listed per method.
+
+    Returns:
+        None
+    """
+    properties_path = resolve_table(os.path.join(data_dir, properties_pkl))
+    if not os.path.exists(properties_path):
+        raise FileNotFoundError(f"Required file not found: {properties_path}")
+
+    compounds, methods, yields = load_yield_matrix(data_dir)
+    with stage("load"):
+        properties = TableReader(properties_path)
+        property_columns = properties.numeric_columns()
+        # Align the property rows with the yield matrix rows
+        property_df = (
+            properties.read(["Compound_Name"] + property_columns)
+            .drop_duplicates("Compound_Name")
+            .set_index("Compound_Name")
+            .reindex(compounds)
+        )
+        property_matrix = property_df.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    with stage("summaries"):
+        # All methods at once; methods without yields get NaN (null) summaries
+        present = ~np.isnan(yields)
+        counts = present.sum(axis=0)
+        mean = _column_means(yields, present)
+        squares = (np.where(present, yields - mean, 0.0) ** 2).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.where(counts > 1, np.sqrt(squares / (counts - 1)), np.nan)
+        quantiles = np.full((len(SUMMARY_QUANTILES), len(methods)), np.nan)
+        if (counts > 0).any():
+            quantiles[:, counts > 0] = np.nanquantile(
+                yields[:, counts > 0], list(SUMMARY_QUANTILES.values()), axis=0
+            )
+        summaries = {
+            "count": encode_array(counts),
+            "mean": encode_array(mean),
+            "std": encode_array(std),
+        }
+        for name, values in zip(SUMMARY_QUANTILES, quantiles):
+            summaries[name] = encode_array(values)
+
+    with stage("correlations"):
+        pearson, pair_counts = pairwise_correlation(property_matrix, yields)
+        spearman = spearman_correlation(property_matrix, yields)
+
+    with stage("top_k"):
+        top_ids, top_values = top_compounds(yields, compounds, top_k)
+
+    stats_data = {
+        "properties": property_columns,
+        "methods": methods,
+        "compound_count": len(compounds),
+        "summaries": summaries,
+        "pearson": encode_matrix(np.round(pearson, CORRELATION_DECIMALS)),
+        "spearman": encode_matrix(np.round(spearman, CORRELATION_DECIMALS)),
+        "pair_counts": encode_matrix(pair_counts),
+        "top_k": {"k": top_k, "ids": top_ids, "values": top_values},
+    }
+
+    # Save JSON output
+    with stage("write"):
+        os.makedirs(os.path.dirname(output_json_path) or ".", exist_ok=True)
+        write_json(output_json_path, stats_data)
+
+    print(f"Statistics JSON data file generated: {output_json_path}")
+
+
+if __name__ == "__main__":
+    output_json_path = "docs/data/stats/252_stats.json"
+    properties_pkl = "Select_properties.pkl"
+    data_dir = "data_252"  # Path to the folder containing data pickle files
+
+    generate_stats_json(output_json_path, properties_pkl, data_dir)
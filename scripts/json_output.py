@@ -0,0 +1,255 @@
+import os
+import gzip
+import json
+from profiling import record_bytes
+
+try:
+    import brotli
+except ImportError:  # Optional: .br siblings are skipped without it
+    brotli = None
+
+# Encoded text is buffered up to this many characters before it is written
+CHUNK_SIZE = 1 << 16
+
+
+class StreamedObject:
+    """
+    A JSON object whose (key, value) pairs are produced lazily while it is
+    written, so large payloads can be streamed column by column without first
+    building the whole dict in memory. Values may be StreamedObjects too.
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+
+class RawJSON:
+    """
+    Already-encoded JSON text (e.g. a number array encoded straight from a
+    NumPy array), written verbatim in place of a value.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _CompressedWriter:
+    """
+    Writes a file and its precompressed .gz/.br siblings in a single pass.
+    Everything is written to temporary files next to the targets, which
+    replace them only in commit(), so a failed write leaves the previous files
+    (or none) rather than truncated or mismatched ones.
+    """
+
+    def __init__(self, path: str, compress: bool):
+        self.path = path
+        self.raw_bytes = 0
+        self.gzip_file = None
+        self.brotli = None
+        self.brotli_file = None
+        # Final path -> temporary path, for every file being written
+        self.temp_paths = {}
+        self.file = self._open(path)
+        try:
+            if compress:
+                # mtime=0 keeps the .gz output reproducible across builds
+                self.gzip_file = gzip.GzipFile(
+                    filename="", mode="wb", fileobj=self._open(f"{path}.gz"), mtime=0
+                )
+                if brotli is not None:
+                    self.brotli_file = self._open(f"{path}.br")
+                    self.brotli = brotli.Compressor(quality=11)
+        except BaseException:
+            self.abort()
+            raise
+
+    def _open(self, path: str):
+        # Per-process name: parallel workers never write the same target
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        self.temp_paths[path] = temp_path
+        return open(temp_path, "wb")
+
+    def _close_files(self):
+        self.file.close()
+        if self.gzip_file:
+            gzip_fileobj = self.gzip_file.fileobj
+            self.gzip_file.close()
+            gzip_fileobj.close()
+        if self.brotli_file:
+            self.brotli_file.close()
+
+    def write(self, data: bytes):
+        self.raw_bytes += len(data)
+        self.file.write(data)
+        if self.gzip_file:
+            self.gzip_file.write(data)
+        if self.brotli:
+            self.brotli_file.write(self.brotli.process(data))
+
+    def commit(self) -> dict:
+        """
+        Finishes the files and moves them into place.
+
+        Returns:
+            dict: Raw, gzip and brotli byte sizes of the written file.
+        """
+        try:
+            if self.brotli:
+                self.brotli_file.write(self.brotli.finish())
+            self._close_files()
+        except BaseException:
+            self.abort()
+            raise
+        sizes = {"path": self.path, "raw": self.raw_bytes, "gzip": None, "brotli": None}
+        for kind, suffix in (("gzip", ".gz"), ("brotli", ".br")):
+            sibling = f"{self.path}{suffix}"
+            if sibling in self.temp_paths:
+                sizes[kind] = os.path.getsize(self.temp_paths[sibling])
+            elif os.path.exists(sibling):
+                # Remove siblings that would otherwise be served stale
+                os.remove(sibling)
+        for path, temp_path in self.temp_paths.items():
+            os.replace(temp_path, path)
+        record_bytes(sum(size for key, size in sizes.items() if key != "path" and size))
+        return sizes
+
+    def abort(self):
+        """Discards the temporary files, keeping the previous files as they were."""
+        for file in (
+            getattr(self, "file", None),
+            self.gzip_file and self.gzip_file.fileobj,
+            self.brotli_file,
+        ):
+            if file:
+                file.close()
+        for temp_path in self.temp_paths.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def _iterencode(value, encoder: json.JSONEncoder):
+    # Objects are walked here so StreamedObjects can be nested in plain dicts;
+    # everything else is left to the standard encoder
+    if isinstance(value, (StreamedObject, dict)):
+        items = value.items if isinstance(value, StreamedObject) else value.items()
+        yield "{"
+        for index, (key, item) in enumerate(items):
+            yield ("," if index else "") + encoder.encode(str(key)) + ":"
+            yield from _iterencode(item, encoder)
+        yield "}"
+    elif isinstance(value, RawJSON):
+        yield value.text
+    else:
+        yield from encoder.iterencode(value)
+
+
+def encode_json(data) -> str:
+    """
+    Encodes JSON in compact form in memory, like write_json does on disk.
+
+    Args:
+        data: JSON-serializable data; StreamedObjects and RawJSON values are
+            supported.
+
+    Returns:
+        str: The encoded JSON.
+    """
+    encoder = json.JSONEncoder(separators=(",", ":"), allow_nan=False)
+    return "".join(_iterencode(data, encoder))
+
+
+def report_sizes(sizes: dict):
+    """
+    Prints the raw and compressed byte sizes of a written artifact.
+
+    Args:
+        sizes (dict): Sizes returned by write_json or write_binary.
+
+    Returns:
+        None
+    """
+    compressed = ", ".join(
+        f"{sizes[kind]:,} B {kind}" for kind in ("gzip", "brotli") if sizes[kind]
+    )
+    print(
+        f"Wrote {sizes['path']}: {sizes['raw']:,} B raw"
+        + (f", {compressed}" if compressed else "")
+    )
+
+
+def write_json(
+    path: str, data, indent: int | None = None, compress: bool = True
+) -> dict:
+    """
+    Writes JSON in compact form, streaming the encoder output to disk together
+    with precompressed .gz and .br (when brotli is installed) siblings. The
+    files are replaced only once the whole document is encoded, so an error
+    in a StreamedObject leaves the previous files in place.
+
+    Args:
+        path (str): Path to save the JSON file.
+        data: JSON-serializable data; StreamedObjects are encoded lazily and
+            RawJSON values are written as is.
+        indent (int | None): Pretty-print indentation, for files meant to be
+            read by people (StreamedObjects and RawJSON are not supported).
+            Compact separators are used when None.
+        compress (bool): Whether to write the .gz/.br siblings.
+
+    Returns:
+        dict: Raw, gzip and brotli byte sizes of the written file.
+    """
+    if indent is None:
+        encoder = json.JSONEncoder(separators=(",", ":"), allow_nan=False)
+    else:
+        encoder = json.JSONEncoder(indent=indent, allow_nan=False)
+
+    writer = _CompressedWriter(path, compress)
+    try:
+        buffer = []
+        buffered = 0
+        chunks = (
+            encoder.iterencode(data)
+            if indent is not None
+            else _iterencode(data, encoder)
+        )
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= CHUNK_SIZE:
+                writer.write("".join(buffer).encode("utf-8"))
+                buffer, buffered = [], 0
+        writer.write("".join(buffer).encode("utf-8"))
+    except BaseException:
+        writer.abort()
+        raise
+    sizes = writer.commit()
+    report_sizes(sizes)
+    return sizes
+
+
+def write_binary(
+    path: str, data: bytes, compress: bool = True, report: bool = True
+) -> dict:
+    """
+    Writes a binary buffer together with its precompressed .gz/.br siblings.
+
+    Args:
+        path (str): Path to save the binary file.
+        data (bytes): Buffer to write.
+        compress (bool): Whether to write the .gz/.br siblings.
+        report (bool): Whether to print the sizes (off for many small files).
+
+    Returns:
+        dict: Raw, gzip and brotli byte sizes of the written file.
+    """
+    writer = _CompressedWriter(path, compress)
+    try:
+        for start in range(0, len(data), CHUNK_SIZE):
+            writer.write(data[start : start + CHUNK_SIZE])
+    except BaseException:
+        writer.abort()
+        raise
+    sizes = writer.commit()
+    if report:
+        report_sizes(sizes)
+    return sizes
@@ -0,0 +1,237 @@
+import json
+import numpy as np
+import pandas as pd
+from json_output import RawJSON, StreamedObject
+
+# Property columns read, sorted and encoded together as one matrix
+COLUMN_BATCH_SIZE = 64
+# Largest magnitude of a scaled integer that JavaScript numbers hold exactly
+MAX_SAFE_INTEGER = 2**53 - 1
+
+
+def validate_precision(precision: dict | None):
+    """
+    Checks a precision spec. A spec rounds floats to a number of significant
+    digits ({"significant": 6}) or of decimals ({"decimals": 2}), and with
+    {"decimals": 2, "scaled": true} stores them as integers in units of
+    10**-decimals (fixed point).
+
+    Args:
+        precision (dict | None): Precision spec, or None for full precision.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the spec is malformed.
+    """
+    if precision is None:
+        return
+    if not isinstance(precision, dict) or set(precision) - {
+        "significant",
+        "decimals",
+        "scaled",
+    }:
+        raise ValueError(f"Invalid precision spec: {precision}")
+    if ("significant" in precision) == ("decimals" in precision):
+        raise ValueError(
+            f"Precision spec needs one of 'significant' or 'decimals': {precision}"
+        )
+    digits = precision.get("significant", precision.get("decimals"))
+    if not isinstance(digits, int) or digits < ("significant" in precision):
+        raise ValueError(f"Invalid precision digits: {precision}")
+    if precision.get("scaled") and "decimals" not in precision:
+        raise ValueError(f"Scaled values need 'decimals': {precision}")
+
+
+def column_precision(config: dict | None, column: str) -> dict | None:
+    """
+    Looks up the precision spec of a column in a precision config, which maps
+    column names to specs with a "default" spec for the other columns.
+
+    Args:
+        config (dict | None): Precision config, or None for full precision.
+        column (str): Column name.
+
+    Returns:
+        dict | None: The column's precision spec, or None for full precision.
+    """
+    if not config:
+        return None
+    return config.get(column, config.get("default"))
+
+
+def fixed_point(values: np.ndarray, precision: dict | None) -> int | None:
+    """
+    Tells whether a column is encoded as fixed-point integers.
+
+    Args:
+        values (numpy.ndarray): Integer or floating point values.
+        precision (dict | None): Precision spec of the column.
+
+    Returns:
+        int | None: Number of decimals the integers are scaled by (value =
+            integer / 10**decimals), or None when values are written as is.
+    """
+    if precision and precision.get("scaled") and values.dtype.kind not in "iu":
+        return precision["decimals"]
+    return None
+
+
+def json_tokens(values: np.ndarray, precision: dict | None = None) -> list[str]:
+    """
+    Encodes a numeric array as JSON number tokens. At full precision the tokens
+    are exactly those json.dumps would write for the equivalent Python values;
+    otherwise floats are rounded (or scaled) as the precision spec says.
+    Integer columns are always written exactly.
+
+    Args:
+        values (numpy.ndarray): Integer or floating point values.
+        precision (dict | None): Precision spec (see validate_precision).
+
+    Returns:
+        list[str]: One token per value, with "null" for NaN.
+    """
+    if values.dtype.kind in "iu":
+        return list(map(int.__repr__, values.tolist()))
+    values = values.astype(np.float64, copy=False)
+    missing = np.isnan(values)
+    if np.isinf(values).any():
+        raise ValueError("Out of range float values are not JSON compliant")
+    if precision is None:
+        tokens = list(map(float.__repr__, values.tolist()))
+    elif "significant" in precision:
+        # %g keeps the shortest form: no trailing zeros, exponents when shorter
+        significant_format = f"{{:.{precision['significant']}g}}".format
+        tokens = list(map(significant_format, values.tolist()))
+    elif precision.get("scaled"):
+        decimals = precision["decimals"]
+        scaled = np.rint(np.where(missing, 0.0, values) * 10.0**decimals)
+        if np.abs(scaled).max(initial=0.0) > MAX_SAFE_INTEGER:
+            raise ValueError(f"Values do not fit in integers scaled by 10**{decimals}")
+        tokens = list(map(int.__repr__, scaled.astype(np.int64).tolist()))
+    else:
+        rounded = np.round(values, precision["decimals"]) + 0.0  # No -0.0
+        tokens = list(map(float.__repr__, rounded.tolist()))
+    for index in np.flatnonzero(missing).tolist():
+        tokens[index] = "null"
+    return tokens
+
+
+def encode_array(values: np.ndarray, precision: dict | None = None) -> RawJSON:
+    """
+    Encodes a numeric array as a JSON array.
+
+    Args:
+        values (numpy.ndarray): Integer or floating point values.
+        precision (dict | None): Precision spec (see validate_precision).
+
+    Returns:
+        RawJSON: The encoded array, with null for NaN.
+    """
+    return RawJSON("[" + ",".join(json_tokens(values, precision)) + "]")
+
+
+def encode_matrix(matrix: np.ndarray) -> RawJSON:
+    """
+    Encodes a 2-D numeric array as a JSON array of row arrays.
+
+    Args:
+        matrix (numpy.ndarray): Integer or floating point values.
+
+    Returns:
+        RawJSON: The encoded rows, with null for NaN.
+    """
+    return RawJSON("[" + ",".join(encode_array(row).text for row in matrix) + "]")
+
+
+def sort_orders(block: np.ndarray) -> np.ndarray:
+    """
+    Computes the ascending sort permutation of every column in one pass.
+
+    Args:
+        block (numpy.ndarray): Rows x columns matrix, NaN for missing values.
+
+    Returns:
+        numpy.ndarray: Matrix of row indices, one stable permutation per column
+            with missing values last (the order of sort_values).
+    """
+    return np.argsort(block, axis=0, kind="stable")
+
+
+def column_batches(reader, columns: list[str], batch_size: int = COLUMN_BATCH_SIZE):
+    """
+    Reads numeric columns as float matrices, batch_size columns at a time, so
+    that each batch is sorted and masked at once while memory stays bounded.
+
+    Args:
+        reader (data_io.TableReader): Table to read.
+        columns (list[str]): Numeric columns to read.
+        batch_size (int): Columns per batch.
+
+    Yields:
+        tuple: (names, block, integer), where block is a rows x columns float64
+            matrix with NaN for missing values and integer flags the columns
+            stored as integers.
+    """
+    for start in range(0, len(columns), batch_size):
+        names = columns[start : start + batch_size]
+        frame = reader.read(names)
+        integer = [frame[name].dtype.kind in "iu" for name in names]
+        block = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+        yield names, np.asfortranarray(block), integer
+
+
+def record_texts(
+    keys: list, frame: pd.DataFrame, precision: dict | None = None
+) -> list[str]:
+    """
+    Encodes every row of a numeric DataFrame as a JSON object, exactly as
+    json.dumps(row, separators=(",", ":")) would encode the row dict (after
+    rounding the columns that have a precision).
+
+    Args:
+        keys (list): Row keys (e.g. compound IDs), which must be unique.
+        frame (pd.DataFrame): Numeric columns, in output order.
+        precision (dict | None): Precision config (see column_precision).
+            Records hold plain numbers, so scaled specs are not supported.
+
+    Returns:
+        list[str]: One encoded {column: value} object per row.
+    """
+    if len(set(keys)) != len(keys):
+        raise ValueError("Record keys must be unique")
+    specs = [column_precision(precision, str(column)) for column in frame.columns]
+    for spec in specs:
+        validate_precision(spec)
+        if spec and spec.get("scaled"):
+            raise ValueError(f"Scaled precision is not supported for records: {spec}")
+    prefixes = [json.dumps(str(column)) + ":" for column in frame.columns]
+    columns = [
+        (
+            json_tokens(values.to_numpy(dtype=np.float64, na_value=np.nan), spec)
+            if values.dtype.kind not in "iu"
+            else json_tokens(values.to_numpy())
+        )
+        for (_, values), spec in zip(frame.items(), specs)
+    ]
+    rows = zip(*columns) if columns else ((),) * len(keys)
+    return ["{" + ",".join(map(str.__add__, prefixes, row)) + "}" for row in rows]
+
+
+def record_object(
+    keys: list, frame: pd.DataFrame, precision: dict | None = None
+) -> StreamedObject:
+    """
+    Encodes the rows of a numeric DataFrame as an object of row objects, like
+    frame.set_index(keys).to_dict("index") but without building the dicts.
+
+    Args:
+        keys (list): Row keys (e.g. compound IDs), which must be unique.
+        frame (pd.DataFrame): Numeric columns, in output order.
+        precision (dict | None): Precision config (see record_texts).
+
+    Returns:
+        StreamedObject: {key: {column: value}} for every row.
+    """
+    return StreamedObject(zip(keys, map(RawJSON, record_texts(keys, frame, precision))))
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import tempfile
+import contextlib
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows: the process peak RSS is not reported
+    resource = None
+
+# Default path of the machine-readable profile report written by the build
+PROFILE_REPORT = "build_profile.json"
+
+# Profiler of the current process while profiling is enabled (see enable)
+_profiler = None
+
+
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # KiB on Linux
+
+
+class Profiler:
+    """
+    Records the wall time, CPU time, peak traced memory and bytes written of
+    named stages. Nested stages are recorded under their parent's name
+    ("252:heatmap/load"), and repeated stages are accumulated.
+    """
+
+    def __init__(self, trace_memory: bool = True, cprofile: bool = False):
+        self.trace_memory = trace_memory
+        self.records = {}
+        self._stack = []
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Measures the enclosed block as a stage.
+
+        Args:
+            name (str): Stage name, unique among its siblings.
+        """
+        path = "/".join([frame["name"] for frame in self._stack] + [name])
+        # Records are listed in the order stages start, so parents precede children
+        self.records.setdefault(
+            path,
+            {
+                "calls": 0,
+                "wall_s": 0.0,
+                "cpu_s": 0.0,
+                "peak_alloc_bytes": None,
+                "max_rss_bytes": None,
+                "bytes_written": 0,
+            },
+        )
+        frame = {"name": name, "bytes_written": 0, "start_memory": 0, "peak": 0}
+        if self.trace_memory and tracemalloc.is_tracing():
+            # tracemalloc keeps a single peak, so fold it into the parent first
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            tracemalloc.reset_peak()
+            frame["start_memory"] = frame["peak"] = current
+        self._stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_s = time.perf_counter() - wall_start
+            cpu_s = time.process_time() - cpu_start
+            self._stack.pop()
+            peak_alloc = None
+            if self.trace_memory and tracemalloc.is_tracing():
+                frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1]["peak"] = max(
+                        self._stack[-1]["peak"], frame["peak"]
+                    )
+                peak_alloc = frame["peak"] - frame["start_memory"]
+
+            record = self.records[path]
+            record["calls"] += 1
+            record["wall_s"] += wall_s
+            record["cpu_s"] += cpu_s
+            record["bytes_written"] += frame["bytes_written"]
+            if peak_alloc is not None:
+                record["peak_alloc_bytes"] = max(
+                    record["peak_alloc_bytes"] or 0, peak_alloc
+                )
+            record["max_rss_bytes"] = _max_rss_bytes()
+
+    def record_bytes(self, count: int):
+        # Bytes written count towards the current stage and all of its parents
+        for frame in self._stack:
+            frame["bytes_written"] += count
+
+    def dump_cprofile(self, path: str | None = None) -> str | None:
+        """
+        Writes the cProfile statistics, if cProfile was enabled.
+
+        Args:
+            path (str | None): Output path (a temporary file if None).
+
+        Returns:
+            str | None: Path of the dump.
+        """
+        if not self._cprofile:
+            return None
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix="profile-", suffix=".prof")
+            os.close(handle)
+        self._cprofile.dump_stats(path)
+        return path
+
+
+def enable(trace_memory: bool = True, cprofile: bool = False) -> Profiler:
+    """
+    Starts profiling the current process. Until disable() is called, stage()
+    blocks are measured instead of being no-ops.
+
+    Args:
+        trace_memory (bool): Track peak allocations with tracemalloc (slower).
+        cprofile (bool): Also run cProfile over the whole process.
+
+    Returns:
+        Profiler: The active profiler.
+    """
+    global _profiler
+    _profiler = Profiler(trace_memory, cprofile)
+    _profiler.start()
+    return _profiler
+
+
+def disable() -> Profiler | None:
+    """
+    Stops profiling the current process.
+
+    Returns:
+        Profiler | None: The profiler that was active, with its records.
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler:
+        profiler.stop()
+    return profiler
+
+
+def stage(name: str):
+    """
+    Context manager measuring a named stage when profiling is enabled.
+
+    Args:
+        name (str): Stage name, e.g. "load" or "write".
+
+    Returns:
+        A context manager (a no-op when profiling is disabled).
+    """
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.stage(name)
+
+
+def record_bytes(count: int):
+    """
+    Adds written bytes to the current stage, when profiling is enabled.
+
+    Args:
+        count (int): Number of bytes written.
+
+    Returns:
+        None
+    """
+    if _profiler is not None:
+        _profiler.record_bytes(count)
+
+
+def merge_records(records: dict, other: dict):
+    """
+    Merges stage records from another process into records, in place.
+
+    Args:
+        records (dict): Stage records, keyed by stage path.
+        other (dict): Stage records to add.
+
+    Returns:
+        None
+    """
+    for path, record in other.items():
+        if path not in records:
+            records[path] = dict(record)
+            continue
+        merged = records[path]
+        for key in ("calls", "wall_s", "cpu_s", "bytes_written"):
+            merged[key] += record[key]
+        for key in ("peak_alloc_bytes", "max_rss_bytes"):
+            if record[key] is not None:
+                merged[key] = max(merged[key] or 0, record[key])
+
+
+def merge_cprofile(paths: list[str], output_path: str, remove: bool = True):
+    """
+    Combines cProfile dumps (e.g. from worker processes) into one file.
+
+    Args:
+        paths (list[str]): Dumps to combine.
+        output_path (str): Path of the combined dump.
+        remove (bool): Delete the input dumps afterwards.
+
+    Returns:
+        None
+    """
+    paths = [path for path in paths if path]
+    if not paths:
+        return
+    pstats.Stats(*paths).dump_stats(output_path)
+    if remove:
+        for path in paths:
+            if path != output_path:
+                os.remove(path)
+    print(f"cProfile statistics saved: {output_path}")
+
+
+def format_report(records: dict) -> str:
+    """
+    Formats stage records as a table, in stage order.
+
+    Args:
+        records (dict): Stage records, keyed by stage path.
+
+    Returns:
+        str: The table.
+    """
+
+    def megabytes(value):
+        return "-" if value is None else f"{value / 1e6:.1f}"
+
+    width = max([len(path) for path in records] + [5])
+    lines = [
+        f"{'Stage':<{width}} {'Calls':>5} {'Wall s':>8} {'CPU s':>8} "
+        f"{'Peak MB':>8} {'Written MB':>10}"
+    ]
+    for path, record in records.items():
+        lines.append(
+            f"{path:<{width}} {record['calls']:>5} {record['wall_s']:>8.3f} "
+            f"{record['cpu_s']:>8.3f} {megabytes(record['peak_alloc_bytes']):>8} "
+            f"{megabytes(record['bytes_written']):>10}"
+        )
+    return "\n".join(lines)
+
+
+def write_report(path: str, records: dict, wall_s: float, **details):
+    """
+    Writes the stage records as a JSON report.
+
+    Args:
+        path (str): Report path.
+        records (dict): Stage records, keyed by stage path.
+        wall_s (float): Total wall time of the profiled run.
+        **details: Extra top-level fields (e.g. the cProfile dump path).
+
+    Returns:
+        None
+    """
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "command": sys.argv,
+        "wall_s": wall_s,
+        **details,
+        "stages": [{"name": name, **record} for name, record in records.items()],
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Profile report saved: {path}")
@@ -0,0 +1,557 @@
+import os
+import sys
+import gzip
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import numpy as np
+import pandas as pd
+from build import DATASET_CONFIG, discover_datasets
+from data_io import TableReader, resolve_table, table_exists
+from generate_heatmap_json import load_yield_matrix
+from json_output import encode_json
+from numeric_engine import (
+    column_batches,
+    column_precision,
+    encode_array,
+    encode_matrix,
+    fixed_point,
+    record_object,
+    sort_orders,
+)
+
+# Default memory budget of the dataset cache, in megabytes
+MEMORY_BUDGET_MB = 512
+# Largest heatmap block served by one request, in cells
+MAX_BLOCK_CELLS = 4_000_000
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+# Source tables whose changes make a cached dataset stale
+SOURCE_TABLES = ("yields.pkl", "yield_data_df.pkl", "Select_properties.pkl")
+
+
+def source_version(dataset: dict) -> str:
+    """
+    Identifies the current version of a dataset's source files from their
+    modification times and sizes, without reading them.
+
+    Args:
+        dataset (dict): Dataset configuration (see build.discover_datasets).
+
+    Returns:
+        str: A short hash that changes whenever a source file changes.
+    """
+    data_dir = dataset["data_dir"]
+    paths = [resolve_table(os.path.join(data_dir, table)) for table in SOURCE_TABLES]
+    signature = []
+    for path in paths + [os.path.join(data_dir, DATASET_CONFIG)]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+    return hashlib.sha256("\n".join(signature).encode()).hexdigest()[:16]
+
+
+def parse_range(text: str | None, size: int) -> tuple[int, int]:
+    """
+    Parses a "start:end" index range (either bound may be omitted), clamped to
+    the axis size.
+
+    Args:
+        text (str | None): Range text, or None for the whole axis.
+        size (int): Axis length.
+
+    Returns:
+        tuple[int, int]: (start, end), end exclusive.
+
+    Raises:
+        ValueError: If the range is malformed.
+    """
+    if text is None:
+        return 0, size
+    first, separator, last = text.partition(":")
+    if not separator:
+        raise ValueError(f"Range must be 'start:end': {text}")
+    start = min(max(int(first or 0), 0), size)
+    end = min(max(int(last) if last else size, start), size)
+    return start, end
+
+
+class LoadedDataset:
+    """
+    A dataset held in memory: the yield matrix (loaded like the yield JSON), and
+    the sorted property columns, loaded on first use.
+    """
+
+    def __init__(self, dataset: dict, version: str):
+        self.name = dataset["name"]
+        self.version = version
+        precision = dataset.get("precision", {})
+        self.yield_precision = precision.get("yields")
+        self.property_precision = precision.get("properties")
+
+        self.compounds, self.methods, self.matrix = load_yield_matrix(
+            dataset["data_dir"]
+        )
+        self.compound_index = {compound: i for i, compound in enumerate(self.compounds)}
+        properties_path = os.path.join(dataset["data_dir"], "Select_properties.pkl")
+        self.properties = None
+        self.property_names = []
+        self.property_compounds = []
+        if table_exists(properties_path):
+            self.properties = TableReader(properties_path)
+            self.property_names = self.properties.numeric_columns()
+            self.property_compounds = self.properties.read(["Compound_Name"])[
+                "Compound_Name"
+            ].tolist()
+        self.columns = {}  # Property name -> (values, order)
+        self._lock = threading.Lock()
+        # Size of everything but the property columns, counted once (a pickled
+        # properties table stays loaded whole in the reader)
+        self._base_nbytes = (
+            self.matrix.nbytes
+            + (self.properties.nbytes if self.properties else 0)
+            + sum(map(sys.getsizeof, self.compounds))
+            + sum(map(sys.getsizeof, self.property_compounds))
+            + sys.getsizeof(self.compound_index)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the dataset's arrays, compound lists and
+        properties table.
+        """
+        return self._base_nbytes + sum(
+            values.nbytes + order.nbytes for values, order in self.columns.values()
+        )
+
+    def property_column(self, name: str) -> tuple:
+        """
+        Reads and sorts a property column, once.
+
+        Args:
+            name (str): Property name.
+
+        Returns:
+            tuple: (values, order), aligned with property_compounds, with order
+                the stable ascending sort permutation (missing values last).
+
+        Raises:
+            KeyError: If the dataset has no such numeric property.
+        """
+        if name not in self.property_names:
+            raise KeyError(f"Unknown property: {name}")
+        with self._lock:
+            if name not in self.columns:
+                _, block, integer = next(column_batches(self.properties, [name]))
+                values = block[:, 0]
+                # Nullable integer columns with missing values stay float (NaN)
+                if integer[0] and not np.isnan(values).any():
+                    values = values.astype(np.int64)
+                self.columns[name] = (values, sort_orders(block)[:, 0])
+        return self.columns[name]
+
+
+class DatasetCache:
+    """
+    Keeps recently used datasets in memory. The least recently used datasets
+    are evicted once the cache holds more than max_bytes, and a dataset is
+    reloaded when its source files change. Datasets load outside the cache
+    lock, so a slow load only holds up the requests for the same dataset.
+    """
+
+    def __init__(self, datasets: list[dict], max_bytes: int):
+        # Prebuilt datasets have no source tables to query
+        self.datasets = {
+            dataset["name"]: dataset
+            for dataset in datasets
+            if not dataset.get("prebuilt")
+        }
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}  # Dataset name -> lock held while it loads
+
+    def get(self, name: str) -> LoadedDataset:
+        """
+        Returns a dataset, loading it if it is not cached or is out of date.
+
+        Args:
+            name (str): Dataset name.
+
+        Returns:
+            LoadedDataset: The loaded dataset.
+
+        Raises:
+            KeyError: If there is no such dataset.
+        """
+        if name not in self.datasets:
+            raise KeyError(f"Unknown dataset: {name}")
+        version = source_version(self.datasets[name])
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(name)
+                return entry
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        # Concurrent requests for the dataset wait for one load, then reuse it
+        with loading:
+            with self._lock:
+                entry = self._entries.get(name)
+            if entry is None or entry.version != version:
+                entry = LoadedDataset(self.datasets[name], version)
+                print(f"Loaded dataset {name} ({entry.nbytes / 1e6:.1f} MB)")
+            with self._lock:
+                self._entries[name] = entry
+                self._entries.move_to_end(name)
+                self._evict()
+        return entry
+
+    def evict(self):
+        """Evicts datasets until the cache fits its budget again."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        # The most recently used dataset stays, even if it alone exceeds the budget
+        total = sum(entry.nbytes for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            name, entry = self._entries.popitem(last=False)
+            total -= entry.nbytes
+            print(f"Evicted dataset {name} ({entry.nbytes / 1e6:.1f} MB)")
+
+
+def dataset_info(dataset: LoadedDataset) -> dict:
+    """
+    Describes a dataset. The compound lists, which can be long, are served
+    separately (see dataset_compounds).
+
+    Args:
+        dataset (LoadedDataset): Loaded dataset.
+
+    Returns:
+        dict: Version, compound count and methods (the heatmap rows and
+            columns), property names and the number of compounds the property
+            columns refer to.
+    """
+    return {
+        "name": dataset.name,
+        "version": dataset.version,
+        "compound_count": len(dataset.compounds),
+        "methods": dataset.methods,
+        "properties": dataset.property_names,
+        "property_compound_count": len(dataset.property_compounds),
+    }
+
+
+def dataset_compounds(dataset: LoadedDataset) -> dict:
+    """
+    Lists the compounds the slice queries index into.
+
+    Args:
+        dataset (LoadedDataset): Loaded dataset.
+
+    Returns:
+        dict: The heatmap row compounds (in yield JSON order) and the compounds
+            the property columns refer to (in bar chart order).
+    """
+    return {
+        "compounds": dataset.compounds,
+        "property_compounds": dataset.property_compounds,
+    }
+
+
+def yield_slice(dataset: LoadedDataset, query: dict) -> tuple:
+    """
+    Selects the yields of a set of compounds.
+
+    Args:
+        dataset (LoadedDataset): Loaded dataset.
+        query (dict): "compounds" (comma-separated IDs) and an optional
+            "format" ("json" or "binary").
+
+    Returns:
+        tuple: (payload, shape). The JSON payload has the yield JSON layout
+            ({"methods": [...], "yields": {compound: {method: value}}}) and
+            lists unknown compounds under "missing"; the binary payload is
+            the compounds x methods little-endian float32 matrix, in request
+            order, with NaN for missing yields and unknown compounds.
+
+    Raises:
+        ValueError: If no compounds are given.
+    """
+    compounds = list(
+        dict.fromkeys(c for c in query.get("compounds", "").split(",") if c)
+    )
+    if not compounds:
+        raise ValueError("Query needs 'compounds'")
+    rows = [dataset.compound_index.get(compound) for compound in compounds]
+    if query.get("format") == "binary":
+        block = np.full((len(rows), len(dataset.methods)), np.nan)
+        known = [i for i, row in enumerate(rows) if row is not None]
+        block[known] = dataset.matrix[[rows[i] for i in known]]
+        return block.astype("<f4").tobytes(), block.shape
+    found = [(c, row) for c, row in zip(compounds, rows) if row is not None]
+    frame = pd.DataFrame(
+        dataset.matrix[[row for _, row in found]], columns=dataset.methods
+    )
+    payload = {
+        "methods": dataset.methods,
+        "yields": record_object([c for c, _ in found], frame, dataset.yield_precision),
+        "missing": [c for c, row in zip(compounds, rows) if row is None],
+    }
+    return payload, None
+
+
+def property_slice(dataset: LoadedDataset, name: str) -> dict:
+    """
+    Encodes one property's sorted column, in the layout of the bar chart
+    property shards.
+
+    Args:
+        dataset (LoadedDataset): Loaded dataset.
+        name (str): Property name.
+
+    Returns:
+        dict: Values aligned with property_compounds (null when missing), the
+            ascending sort permutation, and "fixed_point" decimals when the
+            values are scaled integers.
+    """
+    values, order = dataset.property_column(name)
+    precision = column_precision(dataset.property_precision, name)
+    column = {
+        "name": name,
+        "values": encode_array(values, precision),
+        "order": encode_array(order),
+    }
+    decimals = fixed_point(values, precision)
+    if decimals is not None:
+        column["fixed_point"] = decimals
+    return column
+
+
+def heatmap_slice(dataset: LoadedDataset, query: dict) -> tuple:
+    """
+    Selects a block of the compounds x methods yield matrix.
+
+    Args:
+        dataset (LoadedDataset): Loaded dataset.
+        query (dict): "rows" and "cols" index ranges ("start:end", whole axis
+            when omitted) and an optional "format" ("json" or "binary").
+
+    Returns:
+        tuple: (payload, shape). The JSON payload holds the ranges and the
+            block rows (null for missing yields); the binary payload is the
+            block as row-major little-endian float32 values (NaN for missing).
+
+    Raises:
+        ValueError: If a range is malformed or the block is too large.
+    """
+    row_start, row_end = parse_range(query.get("rows"), len(dataset.compounds))
+    col_start, col_end = parse_range(query.get("cols"), len(dataset.methods))
+    block = dataset.matrix[row_start:row_end, col_start:col_end]
+    if block.size > MAX_BLOCK_CELLS:
+        raise ValueError(f"Block of {block.size} cells exceeds {MAX_BLOCK_CELLS}")
+    if query.get("format") == "binary":
+        return block.astype("<f4").tobytes(), block.shape
+    payload = {
+        "rows": [row_start, row_end],
+        "cols": [col_start, col_end],
+        "values": encode_matrix(block),
+    }
+    return payload, None
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers slice queries on the cached datasets:
+
+    - /datasets: the dataset names
+    - /datasets/<name>: the dataset's methods, properties and compound counts
+    - /datasets/<name>/compounds: the compounds the slices index into
+    - /datasets/<name>/yields?compounds=A,B: yields of some compounds
+    - /datasets/<name>/properties/<property>: one sorted property column
+    - /datasets/<name>/heatmap?rows=0:50&cols=0:8: a block of the yield matrix
+
+    Yield and heatmap slices are binary float32 matrices with "format=binary"
+    (their shape in the X-Shape header). Responses carry an ETag derived from
+    the dataset version and the query, so repeated requests get 304 responses,
+    and are gzip-compressed when the client accepts it.
+    """
+
+    cache = None  # Set on the subclass created by serve
+
+    def log_message(self, format, *args):
+        pass  # Cache loads and evictions are logged instead
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if query.get("format", "json") not in ("json", "binary"):
+            self.send_json_error(HTTPStatus.BAD_REQUEST, "Unknown format")
+            return
+        try:
+            if parts == ["datasets"]:
+                names = sorted(self.cache.datasets)
+                version = hashlib.sha256("\n".join(names).encode()).hexdigest()[:16]
+                self.send_payload({"datasets": names}, None, version)
+                return
+            if len(parts) < 2 or parts[0] != "datasets":
+                raise KeyError(f"Unknown path: {url.path}")
+            dataset = self.cache.get(parts[1])
+            if self.not_modified(dataset.version):
+                return
+            route = parts[2:]
+            if route == []:
+                payload, shape = dataset_info(dataset), None
+            elif route == ["compounds"]:
+                payload, shape = dataset_compounds(dataset), None
+            elif route == ["yields"]:
+                payload, shape = yield_slice(dataset, query)
+            elif len(route) == 2 and route[0] == "properties":
+                payload, shape = property_slice(dataset, route[1]), None
+                self.cache.evict()  # The column counts towards the budget
+            elif route == ["heatmap"]:
+                payload, shape = heatmap_slice(dataset, query)
+            else:
+                raise KeyError(f"Unknown path: {url.path}")
+        except (KeyError, FileNotFoundError) as e:
+            self.send_json_error(HTTPStatus.NOT_FOUND, str(e.args[0]))
+            return
+        except ValueError as e:
+            self.send_json_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except Exception as e:
+            # Unexpected failures (unreadable tables, bugs) still get a JSON reply
+            print(f"Error serving {self.path}: {type(e).__name__}: {e}")
+            self.send_json_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal error")
+            return
+        self.send_payload(payload, shape, dataset.version)
+
+    def etag(self, version: str, encoding: str | None = None) -> str:
+        # The same query on the same data version always gets the same response;
+        # the gzip representation has different bytes, so its own tag
+        digest = hashlib.sha256(self.path.encode()).hexdigest()[:16]
+        suffix = "-gz" if encoding == "gzip" else ""
+        return f'"{version}-{digest}{suffix}"'
+
+    def accepts_gzip(self) -> bool:
+        return "gzip" in self.headers.get("Accept-Encoding", "")
+
+    def not_modified(self, version: str) -> bool:
+        # Whether the response would be compressed depends on its size, so
+        # either representation the client holds is still valid
+        etags = [self.etag(version)]
+        if self.accepts_gzip():
+            etags.append(self.etag(version, "gzip"))
+        requested = [
+            tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")
+        ]
+        etag = next((tag for tag in etags if tag in requested), None)
+        if etag is None:
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.end_headers()
+        return True
+
+    def send_payload(self, payload, shape: tuple | None, version: str):
+        if self.not_modified(version):
+            return
+        if isinstance(payload, bytes):
+            body, content_type = payload, "application/octet-stream"
+        else:
+            body, content_type = encode_json(payload).encode(), "application/json"
+        encoding = None
+        if len(body) >= MIN_COMPRESS_BYTES and self.accepts_gzip():
+            body, encoding = gzip.compress(body, compresslevel=6, mtime=0), "gzip"
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag(version, encoding))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if shape is not None:
+            self.send_header("X-Shape", ",".join(map(str, shape)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json_error(self, status: HTTPStatus, message: str):
+        body = encode_json({"error": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def end_headers(self):
+        # Pages are served from another origin (the static site)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag, X-Shape")
+        # Revalidate with the ETag, so changed data shows up on reload
+        self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+
+def serve(host: str, port: int, cache: DatasetCache) -> ThreadingHTTPServer:
+    """
+    Serves slice queries on a background thread.
+
+    Args:
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        cache (DatasetCache): Datasets to query.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class Handler(QueryRequestHandler):
+        pass
+
+    Handler.cache = cache
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(
+        f"Serving {len(cache.datasets)} datasets at http://{host}:{port}/datasets "
+        f"(cache budget {cache.max_bytes / 1e6:.0f} MB)"
+    )
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve slices of the datasets (yields, property columns and "
+        "heatmap blocks) from an in-memory cache."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8100, help="Port to listen on")
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        default=MEMORY_BUDGET_MB,
+        help=f"Dataset cache size in MB (default: {MEMORY_BUDGET_MB})",
+    )
+    args = parser.parse_args()
+
+    cache = DatasetCache(discover_datasets(), int(args.memory_budget * 1e6))
+    serve(args.host, args.port, cache)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+import io
+import os
+import sys
+import glob
+import time
+import argparse
+import threading
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from build import (
+    ASSETS_DIR,
+    BUILD_MANIFEST,
+    DOCS_DIR,
+    IMAGE_DIR,
+    SCRIPTS_DIR,
+    discover_datasets,
+    run_build,
+)
+
+# Seconds between two scans of the watched files
+POLL_INTERVAL = 0.2
+# Server-sent events endpoint that tells open pages to reload after a build
+LIVE_RELOAD_PATH = "/__livereload"
+# Seconds between keep-alive comments on idle live reload connections
+LIVE_RELOAD_KEEPALIVE = 15
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}")'
+    '.addEventListener("reload", () => location.reload());</script>'
+)
+# Precompressed siblings written by json_output, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def watched_files(root: str = ".") -> dict:
+    """
+    Lists the build inputs to watch: the dataset folders, the source images
+    (not their generated variants), the chart app assets and the scripts.
+
+    Args:
+        root (str): Directory containing the data_* folders, docs and scripts.
+
+    Returns:
+        dict: (modification time, size) of every watched file, keyed by path.
+    """
+    patterns = [
+        os.path.join(root, "data_*", "**", "*"),
+        os.path.join(root, IMAGE_DIR, "*"),
+        os.path.join(root, ASSETS_DIR, "*"),
+        os.path.join(root, SCRIPTS_DIR, "*.py"),
+    ]
+    snapshot = {}
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # Deleted while scanning
+                continue
+            if not os.path.isdir(path):
+                snapshot[os.path.relpath(path, root)] = (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                )
+    return snapshot
+
+
+def byte_range(header: str, size: int) -> tuple | None:
+    """
+    Parses a single-range Range header ("bytes=0-99", "bytes=100-", "bytes=-50").
+
+    Args:
+        header (str): Value of the Range header.
+        size (int): Size of the requested file.
+
+    Returns:
+        tuple | None: (start, end) with end inclusive, or None when the header
+            is not a single byte range (the whole file is served).
+
+    Raises:
+        ValueError: If the range lies outside the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    if not (first.isdigit() or last.isdigit()):
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1  # Suffix range
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last.isdigit() else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, end
+
+
+def changed_targets(changed: set, datasets: list[dict]) -> list[str]:
+    """
+    Maps changed files to the build targets they affect.
+
+    Args:
+        changed (set): Paths of the added, modified or deleted files.
+        datasets (list[dict]): Dataset configurations (see discover_datasets).
+
+    Returns:
+        list[str]: Names of the datasets to rebuild, followed by the dataset
+            manifest ("datasets") and the index page ("index"), which list
+            every dataset. An empty list (build every target) when a script,
+            a source image or an asset changed.
+    """
+    targets = set()
+    for path in changed:
+        owner = next(
+            (
+                dataset["name"]
+                for dataset in datasets
+                if os.path.commonpath([path, dataset["data_dir"]])
+                == dataset["data_dir"]
+            ),
+            None,
+        )
+        if owner is None:
+            return []
+        targets.add(owner)
+    # A dataset.json edit (titles, colorscale, charts) or a new data_* folder
+    # changes the dataset manifest and the index page, not only the dataset
+    return sorted(targets) + ["datasets", "index"]
+
+
+class LiveReload:
+    """Counts completed builds so live reload connections can wait for the next one."""
+
+    def __init__(self):
+        self.build_count = 0
+        self._condition = threading.Condition()
+
+    def notify(self):
+        with self._condition:
+            self.build_count += 1
+            self._condition.notify_all()
+
+    def wait(self, build_count: int, timeout: float) -> int:
+        """
+        Waits until a build completes after build_count, or until the timeout.
+
+        Args:
+            build_count (int): Last build count the caller has seen.
+            timeout (float): Seconds to wait at most.
+
+        Returns:
+            int: The current build count.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.build_count != build_count, timeout=timeout
+            )
+            return self.build_count
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the site like the production host would, with development extras:
+    precompressed .br/.gz siblings when the client accepts them, ETags with
+    304 responses, single byte range (206) responses for the image bundles,
+    and a live reload script injected into HTML pages.
+    """
+
+    live_reload = None  # Set on the subclass created by serve
+
+    def end_headers(self):
+        # Pages must revalidate so rebuilt data shows up on reload
+        self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for build logs
+
+    def do_GET(self):
+        if (
+            self.live_reload is not None
+            and self.path.split("?", 1)[0] == LIVE_RELOAD_PATH
+        ):
+            self.send_live_reload()
+            return
+        super().do_GET()
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            # Directory redirects and listings are left to the base class
+            return super().send_head()
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        # Prefer a precompressed sibling the client accepts, unless it is stale;
+        # byte ranges always refer to the file itself
+        encoding, served_path = None, path
+        range_header = self.headers.get("Range")
+        accepted = "" if range_header else self.headers.get("Accept-Encoding", "")
+        for name, suffix in ENCODINGS:
+            sibling = path + suffix
+            if (
+                name in accepted
+                and os.path.exists(sibling)
+                and os.path.getmtime(sibling) >= os.path.getmtime(path)
+            ):
+                encoding, served_path = name, sibling
+                break
+
+        stat = os.stat(served_path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if etag in [
+            tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")
+        ]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        with open(served_path, "rb") as f:
+            body = f.read()
+        content_type = self.guess_type(path)
+        if content_type == "text/html" and self.live_reload is not None:
+            body = body.replace(b"</body>", LIVE_RELOAD_SCRIPT.encode() + b"</body>", 1)
+
+        content_range = None
+        if range_header and encoding is None:
+            try:
+                requested = byte_range(range_header, len(body))
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            if requested:
+                start, end = requested
+                content_range = f"bytes {start}-{end}/{len(body)}"
+                body = body[start : end + 1]
+
+        if content_range:
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", content_range)
+        else:
+            self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_live_reload(self):
+        # Server-sent events: one "reload" event per completed build
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        build_count = self.live_reload.build_count
+        try:
+            while True:
+                current = self.live_reload.wait(build_count, LIVE_RELOAD_KEEPALIVE)
+                if current != build_count:
+                    build_count = current
+                    self.wfile.write(b"event: reload\ndata: {}\n\n")
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The page was closed or reloaded
+
+
+def serve(host: str, port: int, live_reload: LiveReload | None = None):
+    """
+    Serves the docs folder on a background thread.
+
+    Args:
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        live_reload (LiveReload | None): Build notifications for live reload,
+            or None to serve the pages unchanged.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class Handler(DevRequestHandler):
+        pass
+
+    Handler.live_reload = live_reload
+
+    def handler(*args, **kwargs):
+        return Handler(*args, directory=DOCS_DIR, **kwargs)
+
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {DOCS_DIR} at http://{host}:{port}/")
+    return server
+
+
+def watch(
+    live_reload: LiveReload,
+    manifest_path: str = BUILD_MANIFEST,
+    jobs: int | None = None,
+    interval: float = POLL_INTERVAL,
+):
+    """
+    Rebuilds the artifacts affected by every change to the watched files, and
+    notifies live reload clients after each build. Runs until interrupted.
+
+    Args:
+        live_reload (LiveReload): Build notifications for the open pages.
+        manifest_path (str): Path to the build manifest.
+        jobs (int | None): Number of build worker processes.
+        interval (float): Seconds between two scans of the watched files.
+
+    Returns:
+        None
+    """
+    snapshot = watched_files()
+    print(f"Watching {len(snapshot)} files for changes (Ctrl+C to stop)")
+    while True:
+        time.sleep(interval)
+        current = watched_files()
+        if current == snapshot:
+            continue
+
+        # Wait for the files to settle, so half-written pickles are not read
+        while True:
+            time.sleep(interval)
+            settled = watched_files()
+            if settled == current:
+                break
+            current = settled
+
+        changed = {
+            path
+            for path in set(snapshot) | set(current)
+            if snapshot.get(path) != current.get(path)
+        }
+        snapshot = current
+        datasets = discover_datasets()
+        targets = changed_targets(changed, datasets)
+        print(
+            f"== Change detected: {', '.join(sorted(changed)[:5])}"
+            + (f" (+{len(changed) - 5} more)" if len(changed) > 5 else "")
+            + f" -> rebuilding {', '.join(targets) or 'all'} =="
+        )
+        start = time.perf_counter()
+        success = run_build(datasets, targets, manifest_path, jobs=jobs)
+        print(
+            f"== Build {'succeeded' if success else 'failed'} "
+            f"in {time.perf_counter() - start:.2f} s =="
+        )
+        # The build writes no watched files, so inputs saved while it ran are
+        # picked up by the next scan
+        if success:
+            live_reload.notify()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve the site locally and rebuild it when its inputs change."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--manifest", default=BUILD_MANIFEST, help="Build manifest path"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of build worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=POLL_INTERVAL,
+        help="Seconds between scans of the watched files",
+    )
+    parser.add_argument(
+        "--no-watch",
+        action="store_true",
+        help="Only serve the site, without building or live reload",
+    )
+    args = parser.parse_args()
+
+    if args.no_watch:
+        serve(args.host, args.port)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Bring the site up to date before serving it
+    if not run_build(discover_datasets(), manifest_path=args.manifest, jobs=args.jobs):
+        print("Initial build failed; serving the existing site")
+    live_reload = LiveReload()
+    serve(args.host, args.port, live_reload)
+    try:
+        watch(live_reload, args.manifest, args.jobs, args.interval)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
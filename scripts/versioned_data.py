@@ -0,0 +1,224 @@
+import os
+import json
+from json_output import RawJSON, StreamedObject, write_json
+
+# Deltas kept before they are compacted into a new base snapshot
+MAX_DELTAS = 10
+# Deltas are also compacted once they add up to this fraction of the base size
+MAX_DELTA_RATIO = 0.5
+
+
+def _encode_record(record: dict) -> str:
+    # Canonical text of a parsed record. Records are compared in this form:
+    # record_texts can write the same number differently (1e+02 for 100.0
+    # with significant precision).
+    return json.dumps(record, separators=(",", ":"), allow_nan=False)
+
+
+def _load_json(path: str) -> dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_versioned_records(manifest_path: str) -> tuple:
+    """
+    Loads the published state of a versioned record set, by applying its
+    deltas to its base snapshot (as pages do).
+
+    Args:
+        manifest_path (str): Path to the version manifest JSON.
+
+    Returns:
+        tuple: (manifest, state), or (None, None) if nothing was published.
+            state holds the "compounds" order, the "fields" and the encoded
+            "records" keyed by compound ID.
+    """
+    if not os.path.exists(manifest_path):
+        return None, None
+    manifest = _load_json(manifest_path)
+    version_dir = os.path.dirname(manifest_path)
+
+    base = _load_json(os.path.join(version_dir, _strip_query(manifest["base"]["url"])))
+    state = {
+        "compounds": base["compounds"],
+        "fields": base["methods"],
+        "records": {key: _encode_record(row) for key, row in base["yields"].items()},
+    }
+    for entry in manifest["deltas"]:
+        delta = _load_json(os.path.join(version_dir, _strip_query(entry["url"])))
+        apply_delta(state, delta)
+    return manifest, state
+
+
+def _strip_query(url: str) -> str:
+    # Published URLs carry a "?v=<hash>" fingerprint
+    return url.split("?", 1)[0]
+
+
+def expected_order(compounds: list, deletes: list, appended: list) -> list:
+    """
+    Computes the compound order a delta implies when it carries no explicit
+    order: deleted compounds are dropped and new compounds appended.
+
+    Args:
+        compounds (list): Compound order before the delta.
+        deletes (list): Deleted compound IDs.
+        appended (list): New compound IDs, in order.
+
+    Returns:
+        list: Compound order after the delta.
+    """
+    deleted = set(deletes)
+    return [key for key in compounds if key not in deleted] + appended
+
+
+def apply_delta(state: dict, delta: dict):
+    """
+    Applies a delta to a record set state, in place.
+
+    Args:
+        state (dict): State as returned by load_versioned_records.
+        delta (dict): Delta file contents.
+
+    Returns:
+        None
+    """
+    for key in delta["deletes"]:
+        state["records"].pop(key, None)
+    for key, row in delta["upserts"].items():
+        state["records"][key] = _encode_record(row)
+    state["compounds"] = delta.get("compounds") or expected_order(
+        state["compounds"], delta["deletes"], delta["appended"]
+    )
+
+
+def write_versioned_records(
+    manifest_path: str,
+    compounds: list,
+    fields: list,
+    records: dict,
+    max_deltas: int = MAX_DELTAS,
+    max_delta_ratio: float = MAX_DELTA_RATIO,
+) -> dict:
+    """
+    Publishes a new version of a record set (e.g. the yields of every compound)
+    as an append-only delta against the previous version.
+
+    The manifest lists the data version, a base snapshot and the deltas that
+    follow it, so a page holding version N only downloads the deltas after N.
+    A delta holds the added or changed records, the deleted and the appended
+    keys, and the full compound order only when it is not the previous order
+    with deleted compounds dropped and new ones appended. The deltas are
+    compacted into a new base snapshot when there are more than max_deltas of
+    them, when they grow past max_delta_ratio of the base size, or when the
+    fields change.
+    Nothing is written when the records are unchanged.
+
+    Files are written next to the manifest, in a folder named after it:
+    base_<version>.json (in the yield JSON layout) and delta_<version>.json.
+
+    Args:
+        manifest_path (str): Path to the version manifest JSON.
+        compounds (list): Compound IDs, in display order.
+        fields (list): Field names of the records (the methods).
+        records (dict): Encoded record objects (see numeric_engine.record_texts),
+            keyed by compound ID.
+        max_deltas (int): Deltas kept before compacting.
+        max_delta_ratio (float): Total delta size, relative to the base, that
+            triggers compaction.
+
+    Returns:
+        dict: The current manifest.
+    """
+    try:
+        manifest, previous = load_versioned_records(manifest_path)
+    except (OSError, ValueError, KeyError) as e:
+        # Start over from a new base snapshot, keeping the version increasing
+        print(f"Warning: cannot load the published versions ({e}), compacting")
+        manifest, previous = _load_json(manifest_path), None
+    version_dir = os.path.splitext(manifest_path)[0]
+    version_dir_name = os.path.basename(version_dir)
+    os.makedirs(version_dir, exist_ok=True)
+
+    if previous is None or previous["fields"] != fields:
+        delta = None
+    else:
+        previous_records = previous["records"]
+        upserts = [
+            key
+            for key in compounds
+            if previous_records.get(key) != _encode_record(json.loads(records[key]))
+        ]
+        deletes = [key for key in previous["compounds"] if key not in records]
+        if not upserts and not deletes and previous["compounds"] == compounds:
+            print(f"Version {manifest['version']} is up to date: {manifest_path}")
+            return manifest
+        # Explicit lists keep the order independent of JSON object key order
+        appended = [key for key in upserts if key not in previous_records]
+        delta = {
+            "version": manifest["version"] + 1,
+            "upserts": StreamedObject((key, RawJSON(records[key])) for key in upserts),
+            "deletes": deletes,
+            "appended": appended,
+        }
+        if expected_order(previous["compounds"], deletes, appended) != compounds:
+            delta["compounds"] = compounds
+
+    version = manifest["version"] + 1 if manifest else 1
+    if delta is not None:
+        delta_file = f"delta_{version}.json"
+        sizes = write_json(os.path.join(version_dir, delta_file), delta)
+        manifest["version"] = version
+        manifest["deltas"].append(
+            {
+                "version": version,
+                "url": f"{version_dir_name}/{delta_file}",
+                "bytes": sizes["raw"],
+                "upserts": len(upserts),
+                "deletes": len(deletes),
+            }
+        )
+        delta_bytes = sum(entry["bytes"] for entry in manifest["deltas"])
+        compact = (
+            len(manifest["deltas"]) > max_deltas
+            or delta_bytes > max_delta_ratio * manifest["base"]["bytes"]
+        )
+    else:
+        compact = True
+
+    if compact:
+        # A new base snapshot replaces the previous base and all deltas
+        base_file = f"base_{version}.json"
+        base = {
+            "version": version,
+            "compounds": compounds,
+            "methods": fields,
+            "yields": StreamedObject((key, RawJSON(records[key])) for key in compounds),
+        }
+        sizes = write_json(os.path.join(version_dir, base_file), base)
+        manifest = {
+            "version": version,
+            "base": {
+                "version": version,
+                "url": f"{version_dir_name}/{base_file}",
+                "bytes": sizes["raw"],
+            },
+            "deltas": [],
+        }
+
+    # Remove the files (and compressed siblings) no longer in the manifest
+    current = {
+        os.path.basename(_strip_query(entry["url"]))
+        for entry in manifest["deltas"] + [manifest["base"]]
+    }
+    for filename in os.listdir(version_dir):
+        if filename.removesuffix(".gz").removesuffix(".br") not in current:
+            os.remove(os.path.join(version_dir, filename))
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(
+        f"Published version {version} "
+        f"({'base snapshot' if compact else 'delta'}): {manifest_path}"
+    )
+    return manifest
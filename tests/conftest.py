@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The scripts import each other as top-level modules, as when run from scripts/
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """
+    An empty site to build in: the working directory is a temporary folder
+    with a docs folder and the scripts linked in, as the build hashes them.
+    """
+    os.makedirs(tmp_path / "docs" / "images")
+    os.symlink(SCRIPTS_DIR, tmp_path / "scripts")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def write_yields():
+    """
+    Writes yields.pkl and yield_data_df.pkl for a compounds x methods matrix
+    (NaN for missing yields), the layout the yield generators read.
+    """
+
+    def write(data_dir, compounds, methods, matrix):
+        os.makedirs(data_dir, exist_ok=True)
+        yields = pd.DataFrame(matrix, columns=methods)
+        yields.insert(0, "id", compounds)
+        yields.to_pickle(os.path.join(data_dir, "yields.pkl"))
+        yields[methods].to_pickle(os.path.join(data_dir, "yield_data_df.pkl"))
+
+    return write
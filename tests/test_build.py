@@ -0,0 +1,93 @@
+import json
+
+from benchmark import generate_synthetic_dataset
+from build import (
+    BUILD_MANIFEST,
+    Artifact,
+    discover_datasets,
+    run_build,
+    select_artifacts,
+)
+
+
+def _artifact(name):
+    return Artifact(name, [], [], lambda: None)
+
+
+def _write_chart_app(site):
+    # The chart apps load the dataset manifest, so fingerprinting rewrites the
+    # chart data it lists
+    (site / "docs" / "heatmap.html").write_text(
+        '<script>const MANIFEST_URL = "data/datasets.json";</script>'
+    )
+
+
+def _build_log(capsys, datasets):
+    assert run_build(datasets, jobs=1)
+    return capsys.readouterr().out
+
+
+def test_select_artifacts():
+    artifacts = [
+        _artifact(name) for name in ("252:yields", "252:heatmap", "35:yields", "index")
+    ]
+
+    assert select_artifacts(artifacts, []) == artifacts
+    assert [a.name for a in select_artifacts(artifacts, ["252"])] == [
+        "252:yields",
+        "252:heatmap",
+    ]
+    assert [a.name for a in select_artifacts(artifacts, ["35:yields", "index"])] == [
+        "35:yields",
+        "index",
+    ]
+    # Prefixes only match whole dataset names
+    assert select_artifacts(artifacts, ["25"]) == []
+
+
+def test_discover_datasets(site):
+    generate_synthetic_dataset("data_small", None, 20, 4, 3)
+    (site / "data_prebuilt").mkdir()
+    (site / "data_prebuilt" / "dataset.json").write_text('{"prebuilt": true}')
+    (site / "data_empty").mkdir()
+
+    datasets = discover_datasets()
+
+    assert [dataset["name"] for dataset in datasets] == ["prebuilt", "small"]
+    assert datasets[0]["prebuilt"] is True
+    assert datasets[1]["data_dir"] == "data_small"
+    assert datasets[1]["bar_chart_title"] == (
+        "Bar Chart of small Compounds with DFT Properties"
+    )
+
+
+def test_rebuild_is_a_no_op(site, capsys):
+    generate_synthetic_dataset("data_small", "docs/images", 30, 5, 4)
+    _write_chart_app(site)
+    datasets = discover_datasets()
+
+    first = _build_log(capsys, datasets)
+    assert "[build] datasets" in first
+    assert "[build] index" in first
+    manifest = json.loads((site / BUILD_MANIFEST).read_text())
+
+    # Fingerprinting rewrites the chart data after the dataset manifest is
+    # built; the next build must not see that as a change
+    second = _build_log(capsys, datasets)
+    assert "?v=" in (site / "docs" / "data" / "datasets.json").read_text()
+    assert "[build]" not in second
+    assert json.loads((site / BUILD_MANIFEST).read_text())["artifacts"] == (
+        manifest["artifacts"]
+    )
+
+
+def test_config_change_rebuilds_the_dataset_manifest(site, capsys):
+    generate_synthetic_dataset("data_small", "docs/images", 30, 5, 4)
+    _build_log(capsys, discover_datasets())
+
+    (site / "data_small" / "dataset.json").write_text('{"heatmap_title": "Renamed"}')
+    log = _build_log(capsys, discover_datasets())
+
+    assert "[build] datasets" in log
+    manifest = json.loads((site / "docs" / "data" / "datasets.json").read_text())
+    assert manifest["datasets"][0]["charts"]["heatmap"]["title"] == "Renamed"
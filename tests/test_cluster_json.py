@@ -0,0 +1,108 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from generate_cluster_json import (
+    cached_clusters,
+    condensed_distances,
+    generate_cluster_json,
+    matrix_hash,
+)
+
+pytest.importorskip("scipy")
+from scipy.spatial.distance import pdist  # noqa: E402
+
+
+def _matrix(rows=12, cols=5, seed=0):
+    matrix = np.random.default_rng(seed).random((rows, cols)) * 100
+    matrix[1, 2] = np.nan
+    return matrix
+
+
+def test_condensed_distances_match_pdist():
+    points = np.random.default_rng(0).normal(size=(50, 4))
+
+    np.testing.assert_allclose(
+        condensed_distances(points, block_rows=7), pdist(points), atol=1e-10
+    )
+    assert condensed_distances(points[:1]).shape == (0,)
+
+
+def test_matrix_hash():
+    matrix = _matrix()
+
+    assert matrix_hash(matrix, "average") == matrix_hash(matrix.copy(), "average")
+    assert matrix_hash(matrix, "average") != matrix_hash(matrix, "complete")
+    changed = matrix.copy()
+    changed[0, 0] += 1
+    assert matrix_hash(changed, "average") != matrix_hash(matrix, "average")
+    # Same values, another shape
+    assert matrix_hash(matrix.reshape(5, 12), "average") != matrix_hash(
+        matrix, "average"
+    )
+
+
+def test_cached_clusters(tmp_path, monkeypatch):
+    matrix = _matrix()
+
+    result = cached_clusters(matrix, cache_dir=str(tmp_path))
+
+    assert sorted(result["row_order"]) == list(range(12))
+    assert sorted(result["column_order"]) == list(range(5))
+    assert result["row_linkage"].shape == (11, 4)
+    assert os.listdir(tmp_path) == [f"{result['key']}.npz"]
+
+    # A hit loads the cached result instead of clustering again
+    monkeypatch.setattr("generate_cluster_json.cluster_order", None)
+    cached = cached_clusters(matrix, cache_dir=str(tmp_path))
+    for name in ("row_order", "row_linkage", "column_order", "column_linkage"):
+        np.testing.assert_array_equal(cached[name], result[name])
+
+
+def test_cache_keeps_recently_used_results(tmp_path, monkeypatch):
+    monkeypatch.setattr("generate_cluster_json.MAX_CACHE_ENTRIES", 2)
+    keys = [
+        cached_clusters(_matrix(seed=seed), cache_dir=str(tmp_path))["key"]
+        for seed in range(2)
+    ]
+    # The oldest result is used again, so the other one is pruned next
+    os.utime(tmp_path / f"{keys[0]}.npz", (0, 0))
+    os.utime(tmp_path / f"{keys[1]}.npz", (1, 1))
+    cached_clusters(_matrix(seed=0), cache_dir=str(tmp_path))
+
+    key = cached_clusters(_matrix(seed=2), cache_dir=str(tmp_path))["key"]
+
+    assert sorted(os.listdir(tmp_path)) == sorted([f"{keys[0]}.npz", f"{key}.npz"])
+
+
+def test_generate_cluster_json(site, write_yields):
+    compounds = [f"C{i}" for i in range(12)]
+    methods = [f"m{i}" for i in range(5)]
+    write_yields("data_t", compounds, methods, _matrix())
+
+    generate_cluster_json(
+        "docs/data/clusters/t_clusters.json", "data_t", cache_dir=".cluster_cache"
+    )
+
+    with open(site / "docs" / "data" / "clusters" / "t_clusters.json") as f:
+        clusters = json.load(f)
+    assert clusters["clustered"] is True
+    assert sorted(clusters["rows"]["order"]) == sorted(compounds)
+    assert sorted(clusters["columns"]["order"]) == methods
+    assert len(clusters["rows"]["linkage"]) == 11
+    assert clusters["matrix_hash"] is not None
+
+
+def test_generate_cluster_json_without_scipy(site, write_yields, monkeypatch):
+    monkeypatch.setattr("generate_cluster_json.hierarchy", None)
+    write_yields("data_t", ["a", "b"], ["m1", "m2"], np.array([[1.0, 2.0], [3, 4]]))
+
+    generate_cluster_json("docs/data/clusters/t_clusters.json", "data_t")
+
+    with open(site / "docs" / "data" / "clusters" / "t_clusters.json") as f:
+        clusters = json.load(f)
+    assert clusters["clustered"] is False
+    assert clusters["rows"] == {"order": ["a", "b"], "linkage": []}
+    assert not os.path.exists(".cluster_cache")
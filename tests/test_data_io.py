@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import (
+    TableReader,
+    convert_pickles,
+    read_table,
+    resolve_table,
+    table_exists,
+)
+
+FORMATS = ["pkl", "parquet", "arrow"]
+
+
+def _frame():
+    return pd.DataFrame(
+        {
+            "Compound_Name": ["a", "b", "c", "d"],
+            "count": [1, 2, 3, 4],
+            "energy": [0.5, np.nan, -1.25, 2.0],
+            "charge": pd.array([1, None, 3, 4], dtype="Int64"),
+        },
+        index=[10, 11, 12, 13],  # Stored as an extra column in Parquet
+    )
+
+
+@pytest.fixture(params=FORMATS)
+def table(request, tmp_path):
+    path = str(tmp_path / "table.pkl")
+    _frame().to_pickle(path)
+    if request.param != "pkl":
+        pytest.importorskip("pyarrow")
+        convert_pickles(str(tmp_path), request.param)
+    return path, request.param
+
+
+def test_resolve_table_prefers_columnar_files(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "table.pkl")
+    _frame().to_pickle(path)
+    assert resolve_table(path) == path
+
+    convert_pickles(str(tmp_path), "arrow")
+    assert resolve_table(path) == str(tmp_path / "table.arrow")
+    convert_pickles(str(tmp_path), "parquet")
+    assert resolve_table(path) == str(tmp_path / "table.parquet")
+
+
+def test_table_exists(tmp_path):
+    assert not table_exists(str(tmp_path / "table.pkl"))
+    _frame().to_pickle(tmp_path / "table.pkl")
+    assert table_exists(str(tmp_path / "table.pkl"))
+
+
+def test_missing_table(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        TableReader(str(tmp_path / "table.pkl"))
+
+
+def test_columns(table):
+    path, file_format = table
+    reader = TableReader(path)
+
+    assert reader.format == file_format
+    assert reader.columns == ["Compound_Name", "count", "energy", "charge"]
+    assert reader.numeric_columns() == ["count", "energy", "charge"]
+
+
+def test_read_projects_columns(table):
+    path, _ = table
+
+    frame = read_table(path, ["energy", "Compound_Name"])
+
+    assert frame.columns.tolist() == ["energy", "Compound_Name"]
+    assert frame["Compound_Name"].tolist() == ["a", "b", "c", "d"]
+    np.testing.assert_array_equal(frame["energy"], [0.5, np.nan, -1.25, 2.0])
+    assert frame.index.tolist() == [10, 11, 12, 13]
+
+
+def test_read_all_columns(table):
+    path, _ = table
+
+    frame = read_table(path)
+
+    pd.testing.assert_frame_equal(frame, _frame())
+
+
+def test_column(table):
+    path, _ = table
+    reader = TableReader(path)
+
+    np.testing.assert_array_equal(reader.column("count"), [1, 2, 3, 4])
+    np.testing.assert_array_equal(reader.column("energy"), [0.5, np.nan, -1.25, 2.0])
+
+
+def test_nbytes_counts_pickles_only(table):
+    path, file_format = table
+    reader = TableReader(path)
+    reader.columns  # Loads a pickle whole
+
+    if file_format == "pkl":
+        assert reader.nbytes >= _frame().memory_usage(deep=True).sum()
+    else:
+        assert reader.nbytes == 0
+
+
+def test_convert_pickles_rejects_unknown_formats(tmp_path):
+    pytest.importorskip("pyarrow")
+    with pytest.raises(ValueError):
+        convert_pickles(str(tmp_path), "csv")
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+
+from fingerprint import (
+    ASSET_MANIFEST,
+    FINGERPRINT_LENGTH,
+    Fingerprinter,
+    file_digest,
+    fingerprint_site,
+)
+
+
+def _hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="") as f:
+        f.write(text)
+
+
+def test_file_digest(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"abc")
+    cache = {}
+
+    assert file_digest(str(path), cache) == hashlib.sha256(b"abc").hexdigest()
+    assert cache[str(path)]["size"] == 3
+    assert file_digest(str(tmp_path / "missing.txt"), cache) is None
+
+
+def test_file_digest_reuses_unchanged_entries(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"abc")
+    cache = {}
+    file_digest(str(path), cache)
+
+    # Same size and modification time: the cached digest is trusted
+    cache[str(path)]["sha256"] = "cached"
+    assert file_digest(str(path), cache) == "cached"
+
+    path.write_bytes(b"abcd")
+    assert file_digest(str(path), cache) == hashlib.sha256(b"abcd").hexdigest()
+
+
+def test_fingerprint_url(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, "data", "a.json"), "{}")
+    fingerprinter = Fingerprinter(root)
+    digest = _hash(os.path.join(root, "data", "a.json"))
+
+    assert fingerprinter.fingerprint_url("data/a.json") == f"data/a.json?v={digest}"
+    # An existing fingerprint is replaced
+    assert fingerprinter.fingerprint_url("data/a.json?v=0123") == (
+        f"data/a.json?v={digest}"
+    )
+    # Missing and external assets are left alone
+    assert fingerprinter.fingerprint_url("data/b.json") == "data/b.json"
+    assert fingerprinter.fingerprint_url("https://x.org/a.js") == "https://x.org/a.js"
+
+
+def test_fingerprint_site(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, "data", "yields.json"), '{"a": 1}')
+    _write(
+        os.path.join(root, "data", "heatmap.json"),
+        json.dumps({"yield_data_path": "data/yields.json", "title": "data/x.json"}),
+    )
+    _write(
+        os.path.join(root, "page.html"),
+        "<script>fetch('data/heatmap.json?v=0123abcd');</script>\r\n",
+    )
+    _write(os.path.join(root, "index.html"), "<a href='data/heatmap.json'></a>")
+
+    manifest = fingerprint_site(root)
+
+    heatmap = json.loads(open(os.path.join(root, "data", "heatmap.json")).read())
+    yields_hash = _hash(os.path.join(root, "data", "yields.json"))
+    assert heatmap == {
+        "yield_data_path": f"data/yields.json?v={yields_hash}",
+        "title": "data/x.json",  # Not a URL key
+    }
+    # References are rewritten before the referencing file is hashed
+    heatmap_hash = _hash(os.path.join(root, "data", "heatmap.json"))
+    with open(os.path.join(root, "page.html"), newline="") as f:
+        assert f.read() == (
+            f"<script>fetch('data/heatmap.json?v={heatmap_hash}');</script>\r\n"
+        )
+    # index.html is left to generate_index_page
+    with open(os.path.join(root, "index.html")) as f:
+        assert f.read() == "<a href='data/heatmap.json'></a>"
+    assert manifest["data/yields.json"] == yields_hash
+    assert manifest["data/heatmap.json"] == heatmap_hash
+    with open(os.path.join(root, ASSET_MANIFEST)) as f:
+        assert json.load(f) == manifest
+
+
+def test_fingerprint_site_is_stable(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, "data", "yields.json"), '{"a": 1}')
+    _write(
+        os.path.join(root, "data", "heatmap.json"),
+        json.dumps({"yield_data_path": "data/yields.json"}),
+    )
+    _write(os.path.join(root, "page.html"), '<a href="data/heatmap.json"></a>')
+
+    first = fingerprint_site(root)
+    with open(os.path.join(root, "page.html")) as f:
+        page = f.read()
+
+    assert fingerprint_site(root) == first
+    with open(os.path.join(root, "page.html")) as f:
+        assert f.read() == page
@@ -0,0 +1,101 @@
+import json
+import os
+
+import numpy as np
+
+from generate_heatmap_json import generate_heatmap_tiles, load_yield_matrix
+
+COMPOUNDS = [f"C{i}" for i in range(5)]
+METHODS = ["m0", "m1", "m2"]
+MATRIX = np.array(
+    [
+        [1.0, 2.0, 3.0],
+        [4.0, np.nan, 6.0],
+        [7.0, 8.0, 9.0],
+        [np.nan, np.nan, 12.0],
+        [13.0, 14.0, 15.0],
+    ]
+)
+
+
+def _read_tile(site, level, row, col, planes, shape):
+    path = site / "docs" / "data" / "tiles" / "t" / str(level) / f"{row}_{col}.bin"
+    return np.fromfile(path, dtype="<f4").reshape((planes,) + shape)
+
+
+def test_load_yield_matrix(site, write_yields):
+    write_yields("data_t", COMPOUNDS, METHODS, MATRIX)
+
+    compounds, methods, matrix = load_yield_matrix("data_t")
+
+    assert compounds == COMPOUNDS
+    assert methods == METHODS
+    np.testing.assert_array_equal(matrix, MATRIX)
+
+
+def test_tile_pyramid(site, write_yields):
+    write_yields("data_t", COMPOUNDS, METHODS, MATRIX)
+
+    generate_heatmap_tiles("data/tiles/t.json", "data_t", tile_size=2)
+
+    with open(site / "docs" / "data" / "tiles" / "t.json") as f:
+        index = json.load(f)
+    assert index["shape"] == [5, 3]
+    assert index["url_template"] == "t/{level}/{row}_{col}.bin"
+    # 5 x 3 cells, then 3 x 2 blocks of 2 x 2 cells, then 2 x 2 blocks of 4 x 2
+    assert [
+        (level["rows"], level["cols"], level["row_factor"], level["col_factor"])
+        for level in index["levels"]
+    ] == [(5, 3, 1, 1), (3, 2, 2, 2), (2, 2, 4, 2)]
+    assert [(level["tile_rows"], level["tile_cols"]) for level in index["levels"]] == [
+        (3, 2),
+        (2, 1),
+        (1, 1),
+    ]
+    assert index["levels"][0]["planes"] == ["mean"]
+    assert index["levels"][1]["planes"] == ["mean", "min", "max"]
+
+    # Level 0 holds the cells themselves, edge tiles are cut short
+    np.testing.assert_array_equal(
+        _read_tile(site, 0, 0, 0, 1, (2, 2))[0], MATRIX[:2, :2]
+    )
+    np.testing.assert_array_equal(_read_tile(site, 0, 2, 1, 1, (1, 1))[0], [[15.0]])
+
+    # Coarser levels aggregate the cells, ignoring missing yields
+    level1 = _read_tile(site, 1, 0, 0, 3, (2, 2))
+    block = MATRIX[:2, :2]
+    assert level1[0, 0, 0] == np.float32(np.nanmean(block))
+    assert level1[1, 0, 0] == np.nanmin(block)
+    assert level1[2, 0, 0] == np.nanmax(block)
+    level2 = _read_tile(site, 2, 0, 0, 3, (2, 2))
+    np.testing.assert_allclose(
+        level2[0],
+        [
+            [np.nanmean(MATRIX[:4, :2]), np.nanmean(MATRIX[:4, 2:])],
+            [np.nanmean(MATRIX[4:, :2]), 15.0],
+        ],
+        rtol=1e-6,
+    )
+
+
+def test_missing_blocks_stay_missing(site, write_yields):
+    matrix = MATRIX.copy()
+    matrix[3:, :2] = np.nan
+    write_yields("data_t", COMPOUNDS, METHODS, matrix)
+
+    generate_heatmap_tiles("data/tiles/t.json", "data_t", tile_size=2)
+
+    level1 = _read_tile(site, 1, 1, 0, 3, (1, 2))
+    assert np.isnan(level1[:, 0, 0]).all()
+    assert level1[0, 0, 1] == 15.0
+
+
+def test_tiles_are_regenerated(site, write_yields):
+    write_yields("data_t", COMPOUNDS, METHODS, MATRIX)
+    generate_heatmap_tiles("data/tiles/t.json", "data_t", tile_size=2)
+
+    generate_heatmap_tiles("data/tiles/t.json", "data_t", tile_size=8)
+
+    tile_dir = site / "docs" / "data" / "tiles" / "t"
+    assert sorted(os.listdir(tile_dir)) == ["0"]
+    assert [f for f in os.listdir(tile_dir / "0") if f.endswith(".bin")] == ["0_0.bin"]
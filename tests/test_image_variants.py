@@ -0,0 +1,67 @@
+import json
+import os
+from urllib.parse import unquote
+
+import pytest
+from PIL import Image
+
+from fingerprint import Fingerprinter
+from generate_image_variants import generate_image_bundle, generate_image_variants
+
+# Most real image names contain spaces and parentheses
+IMAGE_NAMES = {"C1": "Het001 (pyridine)_captioned.png", "C2": "Het002_captioned.png"}
+
+
+@pytest.fixture
+def images(site):
+    os.makedirs("data_t")
+    for i, name in enumerate(IMAGE_NAMES.values()):
+        Image.new("RGB", (400, 200), (i * 100, 0, 0)).save(
+            os.path.join("docs", "images", name)
+        )
+    with open(os.path.join("data_t", "mol_image_paths_captioned.json"), "w") as f:
+        json.dump(
+            {compound: f"images\\{name}" for compound, name in IMAGE_NAMES.items()}, f
+        )
+    return site
+
+
+def test_variant_urls_are_percent_encoded(images):
+    generate_image_variants(
+        "docs/data/images/t_images.json", "data_t", "docs/images", jobs=1
+    )
+
+    with open("docs/data/images/t_images.json") as f:
+        manifest = json.load(f)
+    variants = manifest["compounds"]["C1"]
+    assert variants[-1]["format"] == "png"
+    assert variants[-1]["url"] == "images/Het001%20%28pyridine%29_captioned.png"
+    for variant in variants:
+        # No whitespace, so each URL is a single srcset candidate
+        assert not any(c.isspace() for c in variant["url"])
+        assert os.path.isfile(os.path.join("docs", unquote(variant["url"])))
+    assert {v["format"] for v in variants[:-1]} == set(manifest["formats"])
+
+
+def test_encoded_urls_are_fingerprinted(images):
+    generate_image_variants(
+        "docs/data/images/t_images.json", "data_t", "docs/images", jobs=1
+    )
+
+    url = "images/Het001%20%28pyridine%29_captioned.png"
+    fingerprinted = Fingerprinter("docs").fingerprint_url(url)
+
+    assert fingerprinted.startswith(f"{url}?v=")
+
+
+def test_bundle_urls_are_percent_encoded(images):
+    generate_image_bundle(
+        "docs/data/images/t bundle.json", "data_t", "docs/images", jobs=1
+    )
+
+    with open("docs/data/images/t bundle.json") as f:
+        index = json.load(f)
+    for pack in index["packs"]:
+        assert pack["url"].startswith("data/images/t%20bundle/")
+        assert os.path.isfile(os.path.join("docs", unquote(pack["url"])))
+    assert set(index["compounds"]) == {"C1", "C2"}
@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import json_output
+from json_output import RawJSON, StreamedObject, encode_json, write_binary, write_json
+
+
+def _generated_rows(count):
+    for i in range(count):
+        yield f"row{i}", {"value": i / 3, "raw": RawJSON(f"[{i},null]")}
+
+
+def test_encode_json_streams_objects():
+    data = {
+        "compounds": ["a", "b"],
+        "rows": StreamedObject(_generated_rows(2)),
+        "nested": StreamedObject(iter([(1, StreamedObject(iter([("x", None)])))])),
+    }
+
+    assert encode_json(data) == (
+        '{"compounds":["a","b"],'
+        '"rows":{"row0":{"value":0.0,"raw":[0,null]},'
+        '"row1":{"value":0.3333333333333333,"raw":[1,null]}},'
+        '"nested":{"1":{"x":null}}}'
+    )
+
+
+def test_encode_json_matches_json_dumps():
+    data = {"a": [1, 2.5, None, True], "b": {"c": "é\n"}, "d": []}
+
+    assert encode_json(data) == json.dumps(data, separators=(",", ":"))
+
+
+def test_encode_json_rejects_nan():
+    with pytest.raises(ValueError):
+        encode_json({"a": float("nan")})
+
+
+def test_write_json_compressed_siblings(tmp_path):
+    path = str(tmp_path / "data.json")
+    # Larger than a chunk, so the output is written in several pieces
+    data = {"rows": StreamedObject(_generated_rows(5000))}
+
+    sizes = write_json(path, data)
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    assert json.loads(raw) == {
+        "rows": {f"row{i}": {"value": i / 3, "raw": [i, None]} for i in range(5000)}
+    }
+    assert sizes["raw"] == len(raw) > json_output.CHUNK_SIZE
+    with gzip.open(f"{path}.gz", "rb") as f:
+        assert f.read() == raw
+    assert sizes["gzip"] == os.path.getsize(f"{path}.gz")
+    if json_output.brotli is None:
+        assert not os.path.exists(f"{path}.br")
+    else:
+        with open(f"{path}.br", "rb") as f:
+            assert json_output.brotli.decompress(f.read()) == raw
+        assert sizes["brotli"] == os.path.getsize(f"{path}.br")
+
+
+def test_write_json_gzip_is_reproducible(tmp_path):
+    path = str(tmp_path / "data.json")
+    write_json(path, {"a": 1})
+    with open(f"{path}.gz", "rb") as f:
+        first = f.read()
+    write_json(path, {"a": 1})
+    with open(f"{path}.gz", "rb") as f:
+        assert f.read() == first
+
+
+def test_write_json_indent(tmp_path):
+    path = str(tmp_path / "data.json")
+
+    write_json(path, {"a": [1]}, indent=2, compress=False)
+
+    with open(path) as f:
+        assert f.read() == '{\n  "a": [\n    1\n  ]\n}'
+
+
+def test_write_json_without_compression_removes_stale_siblings(tmp_path):
+    path = str(tmp_path / "data.json")
+    write_json(path, {"a": 1})
+
+    sizes = write_json(path, {"a": 2}, compress=False)
+
+    assert sizes["gzip"] is None and sizes["brotli"] is None
+    assert sorted(os.listdir(tmp_path)) == ["data.json"]
+
+
+def test_write_json_failure_keeps_previous_files(tmp_path):
+    path = str(tmp_path / "data.json")
+    write_json(path, {"a": 1})
+    previous = {name: (tmp_path / name).read_bytes() for name in os.listdir(tmp_path)}
+
+    def failing_rows():
+        yield "a", 2
+        raise RuntimeError("encoding failed")
+
+    with pytest.raises(RuntimeError):
+        write_json(path, StreamedObject(failing_rows()))
+
+    # No truncated files and no temporary files left behind
+    assert {name: (tmp_path / name).read_bytes() for name in os.listdir(tmp_path)} == (
+        previous
+    )
+
+
+def test_write_binary(tmp_path):
+    path = str(tmp_path / "data.bin")
+    data = bytes(range(256)) * 1000
+
+    sizes = write_binary(path, data, report=False)
+
+    with open(path, "rb") as f:
+        assert f.read() == data
+    with gzip.open(f"{path}.gz", "rb") as f:
+        assert f.read() == data
+    assert sizes["raw"] == len(data)
@@ -0,0 +1,242 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import TableReader
+from generate_barchart_json import _property_columns
+from json_output import encode_json
+from numeric_engine import (
+    column_batches,
+    column_precision,
+    encode_array,
+    encode_matrix,
+    fixed_point,
+    json_tokens,
+    record_object,
+    record_texts,
+    sort_orders,
+    validate_precision,
+)
+
+
+def _float_values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=200) * 10.0 ** rng.integers(-8, 8, 200)
+    values[::7] = np.nan
+    values[::11] = 1.5  # Ties
+    return values
+
+
+def _properties(tmp_path, frame):
+    path = str(tmp_path / "Select_properties.pkl")
+    frame.to_pickle(path)
+    return TableReader(path)
+
+
+def test_sort_orders_match_sort_values():
+    block = np.column_stack([_float_values(), _float_values()[::-1]])
+
+    orders = sort_orders(block)
+
+    for j in range(block.shape[1]):
+        expected = pd.Series(block[:, j]).sort_values(kind="stable").index
+        np.testing.assert_array_equal(orders[:, j], expected)
+
+
+def test_json_tokens_match_json_dumps():
+    values = _float_values()
+
+    tokens = json_tokens(values)
+
+    expected = [json.dumps(None if np.isnan(v) else v) for v in values.tolist()]
+    assert tokens == expected
+
+
+def test_json_tokens_integers():
+    assert json_tokens(np.array([-3, 0, 2**60])) == ["-3", "0", str(2**60)]
+
+
+def test_json_tokens_reject_infinity():
+    with pytest.raises(ValueError):
+        json_tokens(np.array([1.0, np.inf]))
+
+
+def test_encode_array_and_matrix():
+    assert encode_array(np.array([1.5, np.nan])).text == "[1.5,null]"
+    assert encode_array(np.array([], dtype=np.float64)).text == "[]"
+    assert encode_matrix(np.array([[1.0, np.nan], [0.1, 2.0]])).text == (
+        "[[1.0,null],[0.1,2.0]]"
+    )
+
+
+def test_record_texts_match_json_dumps():
+    frame = pd.DataFrame(
+        {
+            "m1": _float_values()[:5],
+            "m2": [1, 2, 3, 4, 5],
+            "m3": pd.array([1.0, None, 2.5, None, 0.0], dtype="Float64"),
+        }
+    )
+    keys = ["a", "b", "c", "d", "e"]
+
+    texts = record_texts(keys, frame)
+
+    # What the generators wrote before: json.dumps of the row dicts
+    rows = frame.astype(object).where(frame.notna(), None).set_axis(keys)
+    for key, row in rows.to_dict("index").items():
+        assert texts[keys.index(key)] == json.dumps(row, separators=(",", ":"))
+    assert json.loads(encode_json(record_object(keys, frame))) == {
+        key: json.loads(text) for key, text in zip(keys, texts)
+    }
+
+
+def test_record_texts_require_unique_keys():
+    with pytest.raises(ValueError):
+        record_texts(["a", "a"], pd.DataFrame({"m": [1.0, 2.0]}))
+
+
+def test_record_texts_without_columns():
+    assert record_texts(["a", "b"], pd.DataFrame(index=[0, 1])) == ["{}", "{}"]
+
+
+def test_column_batches(tmp_path):
+    frame = pd.DataFrame(
+        {
+            "a": [1.0, np.nan, 3.0],
+            "b": [3, 2, 1],
+            "c": pd.array([1, None, 2], dtype="Int64"),
+        }
+    )
+    properties = _properties(tmp_path, frame)
+
+    batches = list(column_batches(properties, ["a", "b", "c"], batch_size=2))
+
+    assert [(names, integer) for names, _, integer in batches] == [
+        (["a", "b"], [False, True]),
+        (["c"], [True]),
+    ]
+    np.testing.assert_array_equal(batches[0][1], [[1, 3], [np.nan, 2], [3, 1]])
+    np.testing.assert_array_equal(batches[1][1], [[1], [np.nan], [2]])
+
+
+def test_property_columns_keep_missing_integers(tmp_path):
+    frame = pd.DataFrame(
+        {
+            "Compound_Name": ["a", "b", "c"],
+            "charge": pd.array([2, None, 1], dtype="Int64"),
+            "count": pd.array([5, 4, 6], dtype="Int64"),
+        }
+    )
+    properties = _properties(tmp_path, frame)
+
+    columns = {
+        name: (values, order)
+        for name, values, order in _property_columns(properties, ["charge", "count"])
+    }
+
+    # Missing values stay NaN (null in JSON) rather than becoming int64 minimums
+    values, order = columns["charge"]
+    assert values.dtype == np.float64
+    assert encode_array(values).text == "[2.0,null,1.0]"
+    np.testing.assert_array_equal(order, [2, 0, 1])
+    # Complete integer columns are written as integers
+    values, order = columns["count"]
+    assert values.dtype == np.int64
+    assert encode_array(values).text == "[5,4,6]"
+    np.testing.assert_array_equal(order, [1, 0, 2])
+
+
+@pytest.mark.parametrize(
+    "precision",
+    [None, {"significant": 3}, {"decimals": 0}, {"decimals": 2, "scaled": True}],
+)
+def test_validate_precision(precision):
+    validate_precision(precision)
+
+
+@pytest.mark.parametrize(
+    "precision",
+    [
+        {},
+        {"significant": 3, "decimals": 2},
+        {"significant": 0},
+        {"decimals": -1},
+        {"decimals": 1.5},
+        {"significant": 3, "scaled": True},
+        {"decimals": 2, "round": True},
+        [2],
+    ],
+)
+def test_validate_precision_rejects_malformed_specs(precision):
+    with pytest.raises(ValueError):
+        validate_precision(precision)
+
+
+def test_column_precision():
+    config = {"default": {"significant": 6}, "BDE": {"decimals": 1}}
+
+    assert column_precision(config, "BDE") == {"decimals": 1}
+    assert column_precision(config, "other") == {"significant": 6}
+    assert column_precision({"BDE": {"decimals": 1}}, "other") is None
+    assert column_precision(None, "BDE") is None
+
+
+def test_json_tokens_significant_digits():
+    values = np.array([123456.789, 0.000123456, -1.0, 1e-20, np.nan])
+
+    assert json_tokens(values, {"significant": 3}) == [
+        "1.23e+05",
+        "0.000123",
+        "-1",
+        "1e-20",
+        "null",
+    ]
+
+
+def test_json_tokens_decimals():
+    values = np.array([1.234, 5.678, -0.001, 10.0, np.nan])
+
+    # Values rounding to zero are written as 0.0, never -0.0
+    assert json_tokens(values, {"decimals": 2}) == [
+        "1.23",
+        "5.68",
+        "0.0",
+        "10.0",
+        "null",
+    ]
+
+
+def test_json_tokens_scaled_integers():
+    values = np.array([1.234, -0.005, 12.0, np.nan])
+    precision = {"decimals": 2, "scaled": True}
+
+    assert json_tokens(values, precision) == ["123", "0", "1200", "null"]
+    assert fixed_point(values, precision) == 2
+    # Integer columns are written exactly, never scaled
+    assert json_tokens(np.array([7, 8]), precision) == ["7", "8"]
+    assert fixed_point(np.array([7, 8]), precision) is None
+    assert fixed_point(values, {"decimals": 2}) is None
+
+
+def test_json_tokens_scaled_overflow():
+    with pytest.raises(ValueError):
+        json_tokens(np.array([1e15]), {"decimals": 2, "scaled": True})
+
+
+def test_record_texts_precision():
+    frame = pd.DataFrame({"m1": [1.2345, np.nan], "m2": [0.5, 2.0], "n": [3, 4]})
+    precision = {"default": {"decimals": 1}, "m2": None, "n": {"decimals": 0}}
+
+    assert record_texts(["a", "b"], frame, precision) == [
+        '{"m1":1.2,"m2":0.5,"n":3}',
+        '{"m1":null,"m2":2.0,"n":4}',
+    ]
+
+
+def test_record_texts_reject_scaled_precision():
+    frame = pd.DataFrame({"m1": [1.0]})
+
+    with pytest.raises(ValueError):
+        record_texts(["a"], frame, {"default": {"decimals": 1, "scaled": True}})
@@ -0,0 +1,297 @@
+import gzip
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import query_server
+from query_server import (
+    DatasetCache,
+    LoadedDataset,
+    heatmap_slice,
+    parse_range,
+    property_slice,
+    serve,
+    source_version,
+    yield_slice,
+)
+
+COMPOUNDS = ["C1", "C2", "C3"]
+METHODS = ["m1", "m2"]
+MATRIX = np.array([[1.0, 2.0], [np.nan, 4.5], [5.0, 6.0]])
+
+
+def _dataset(write_yields, name="t"):
+    data_dir = f"data_{name}"
+    write_yields(data_dir, COMPOUNDS, METHODS, MATRIX)
+    pd.DataFrame(
+        {
+            "Compound_Name": ["C3", "C1", "C2"],
+            "energy": [0.5, np.nan, -1.0],
+            "charge": pd.array([2, None, 1], dtype="Int64"),
+        }
+    ).to_pickle(os.path.join(data_dir, "Select_properties.pkl"))
+    return {"name": name, "data_dir": data_dir}
+
+
+@pytest.fixture
+def loaded(site, write_yields):
+    dataset = _dataset(write_yields)
+    return LoadedDataset(dataset, source_version(dataset))
+
+
+def test_parse_range():
+    assert parse_range(None, 10) == (0, 10)
+    assert parse_range("2:5", 10) == (2, 5)
+    assert parse_range(":3", 10) == (0, 3)
+    assert parse_range("4:", 10) == (4, 10)
+    # Clamped to the axis
+    assert parse_range("-5:50", 10) == (0, 10)
+    assert parse_range("8:2", 10) == (8, 8)
+    for text in ("3", "a:b"):
+        with pytest.raises(ValueError):
+            parse_range(text, 10)
+
+
+def test_yield_slice(loaded):
+    payload, shape = yield_slice(loaded, {"compounds": "C3,X,C2,C3"})
+
+    assert shape is None
+    assert json.loads(query_server.encode_json(payload)) == {
+        "methods": METHODS,
+        "yields": {"C3": {"m1": 5.0, "m2": 6.0}, "C2": {"m1": None, "m2": 4.5}},
+        "missing": ["X"],
+    }
+
+
+def test_yield_slice_binary(loaded):
+    payload, shape = yield_slice(loaded, {"compounds": "X,C1", "format": "binary"})
+
+    assert shape == (2, 2)
+    np.testing.assert_array_equal(
+        np.frombuffer(payload, dtype="<f4").reshape(shape), [[np.nan, np.nan], [1, 2]]
+    )
+
+
+def test_yield_slice_needs_compounds(loaded):
+    with pytest.raises(ValueError):
+        yield_slice(loaded, {"compounds": ""})
+
+
+def test_heatmap_slice(loaded):
+    payload, _ = heatmap_slice(loaded, {"rows": "1:3", "cols": "1:"})
+
+    assert json.loads(query_server.encode_json(payload)) == {
+        "rows": [1, 3],
+        "cols": [1, 2],
+        "values": [[4.5], [6.0]],
+    }
+
+    payload, shape = heatmap_slice(loaded, {"rows": ":2", "format": "binary"})
+    assert shape == (2, 2)
+    np.testing.assert_array_equal(
+        np.frombuffer(payload, dtype="<f4").reshape(shape), MATRIX[:2]
+    )
+
+
+def test_heatmap_slice_limits_the_block_size(loaded, monkeypatch):
+    monkeypatch.setattr(query_server, "MAX_BLOCK_CELLS", 4)
+
+    heatmap_slice(loaded, {"rows": ":2"})
+    with pytest.raises(ValueError):
+        heatmap_slice(loaded, {})
+
+
+def test_property_slice(loaded):
+    assert loaded.property_compounds == ["C3", "C1", "C2"]
+    assert loaded.property_names == ["energy", "charge"]
+
+    energy = json.loads(query_server.encode_json(property_slice(loaded, "energy")))
+    assert energy == {"name": "energy", "values": [0.5, None, -1.0], "order": [2, 0, 1]}
+    # Missing values of nullable integers stay null
+    charge = json.loads(query_server.encode_json(property_slice(loaded, "charge")))
+    assert charge["values"] == [2.0, None, 1.0]
+    with pytest.raises(KeyError):
+        property_slice(loaded, "Compound_Name")
+
+
+def test_nbytes_counts_the_pickled_properties(loaded):
+    before = loaded.nbytes
+
+    assert before > loaded.matrix.nbytes + loaded.properties.nbytes
+    property_slice(loaded, "energy")
+    assert loaded.nbytes > before
+
+
+def test_cache_reuses_and_reloads_datasets(site, write_yields):
+    dataset = _dataset(write_yields)
+    cache = DatasetCache(
+        [dataset, {"name": "p", "data_dir": "data_p", "prebuilt": True}], 10**9
+    )
+
+    assert sorted(cache.datasets) == ["t"]
+    first = cache.get("t")
+    assert cache.get("t") is first
+    with pytest.raises(KeyError):
+        cache.get("p")
+
+    path = os.path.join(dataset["data_dir"], "yields.pkl")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    reloaded = cache.get("t")
+    assert reloaded is not first
+    assert reloaded.version != first.version
+
+
+def test_cache_evicts_least_recently_used(site, write_yields):
+    datasets = [_dataset(write_yields, name) for name in ("a", "b", "c")]
+    size = LoadedDataset(datasets[0], "").nbytes
+    cache = DatasetCache(datasets, int(size * 2.5))
+
+    a = cache.get("a")
+    cache.get("b")
+    assert cache.get("a") is a  # Now more recently used than b
+    cache.get("c")
+
+    assert list(cache._entries) == ["a", "c"]
+
+
+def test_cache_loads_a_dataset_once(site, write_yields, monkeypatch):
+    cache = DatasetCache([_dataset(write_yields)], 10**9)
+    loads = []
+
+    class SlowDataset(LoadedDataset):
+        def __init__(self, *args):
+            loads.append(args)
+            time.sleep(0.2)
+            super().__init__(*args)
+
+    monkeypatch.setattr(query_server, "LoadedDataset", SlowDataset)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("t")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_cache_loads_other_datasets_meanwhile(site, write_yields, monkeypatch):
+    cache = DatasetCache(
+        [_dataset(write_yields, "a"), _dataset(write_yields, "b")], 10**9
+    )
+    loading = threading.Event()
+    release = threading.Event()
+
+    class BlockingDataset(LoadedDataset):
+        def __init__(self, dataset, version):
+            if dataset["name"] == "a":
+                loading.set()
+                release.wait(5)
+            super().__init__(dataset, version)
+
+    monkeypatch.setattr(query_server, "LoadedDataset", BlockingDataset)
+    thread = threading.Thread(target=cache.get, args=("a",))
+    thread.start()
+    loading.wait(5)
+
+    try:
+        # Not held up by the load of a
+        assert cache.get("b").name == "b"
+        assert thread.is_alive()
+    finally:
+        release.set()
+        thread.join()
+    assert sorted(cache._entries) == ["a", "b"]
+
+
+@pytest.fixture
+def server(site, write_yields):
+    cache = DatasetCache([_dataset(write_yields)], 10**9)
+    server = serve("127.0.0.1", 0, cache)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url, **headers):
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_server_routes(server):
+    status, _, body = _get(f"{server}/datasets")
+    assert status == 200 and json.loads(body) == {"datasets": ["t"]}
+
+    status, headers, body = _get(f"{server}/datasets/t/heatmap?format=binary")
+    assert status == 200
+    assert headers["X-Shape"] == "3,2"
+    assert len(body) == MATRIX.size * 4
+
+    status, _, _ = _get(
+        f"{server}/datasets/t/heatmap", **{"If-None-Match": headers["ETag"]}
+    )
+    assert status == 200  # Another query, another ETag
+    status, _, _ = _get(
+        f"{server}/datasets/t/heatmap?format=binary",
+        **{"If-None-Match": headers["ETag"]},
+    )
+    assert status == 304
+
+
+def test_gzip_responses_have_their_own_etag(server, monkeypatch):
+    monkeypatch.setattr(query_server, "MIN_COMPRESS_BYTES", 0)
+    url = f"{server}/datasets/t/heatmap?format=binary"
+
+    _, identity, _ = _get(url)
+    status, headers, body = _get(url, **{"Accept-Encoding": "gzip"})
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) and headers["ETag"].endswith('-gz"')
+    assert headers["ETag"] != identity["ETag"]
+
+    # Either representation revalidates for a client that accepts gzip
+    for etag in (headers["ETag"], identity["ETag"]):
+        status, revalidated, _ = _get(
+            url, **{"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert status == 304 and revalidated["ETag"] == etag
+    # The gzip tag does not match for a client that does not
+    status, _, _ = _get(url, **{"If-None-Match": headers["ETag"]})
+    assert status == 200
+
+
+def test_server_errors(server, monkeypatch):
+    for path, expected in [
+        ("/datasets/x", 404),
+        ("/datasets/t/nothing", 404),
+        ("/datasets/t/properties/x", 404),
+        ("/datasets/t/heatmap?rows=1", 400),
+        ("/datasets/t/yields", 400),
+        ("/datasets/t?format=csv", 400),
+    ]:
+        status, headers, body = _get(server + path)
+        assert status == expected, path
+        assert headers["Content-Type"] == "application/json"
+        assert "error" in json.loads(body)
+
+    def fail(dataset):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(query_server, "dataset_info", fail)
+    status, _, body = _get(f"{server}/datasets/t")
+    assert status == 500
+    assert json.loads(body) == {"error": "Internal error"}
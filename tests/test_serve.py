@@ -0,0 +1,118 @@
+import gzip
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+from serve import byte_range, changed_targets, serve, watched_files
+
+DATASETS = [
+    {"name": "252", "data_dir": "data_252"},
+    {"name": "35", "data_dir": "data_35"},
+]
+
+
+def test_changed_targets_rebuild_the_datasets_and_index():
+    changed = {os.path.join("data_35", "yields.pkl")}
+
+    assert changed_targets(changed, DATASETS) == ["35", "datasets", "index"]
+
+
+def test_changed_targets_dataset_config():
+    # Titles and styles live in dataset.json, which the manifest lists
+    changed = {
+        os.path.join("data_252", "dataset.json"),
+        os.path.join("data_35", "yields.pkl"),
+    }
+
+    assert changed_targets(changed, DATASETS) == ["252", "35", "datasets", "index"]
+
+
+def test_changed_targets_outside_the_datasets_rebuild_everything():
+    assert changed_targets({os.path.join("scripts", "build.py")}, DATASETS) == []
+    # A new dataset folder belongs to no known dataset
+    assert changed_targets({os.path.join("data_new", "yields.pkl")}, DATASETS) == []
+    # Folder names sharing a prefix are different datasets
+    assert changed_targets({os.path.join("data_2520", "yields.pkl")}, DATASETS) == []
+
+
+def test_byte_range():
+    assert byte_range("bytes=0-99", 1000) == (0, 99)
+    assert byte_range("bytes=900-", 1000) == (900, 999)
+    assert byte_range("bytes=-50", 1000) == (950, 999)
+    assert byte_range("bytes=990-2000", 1000) == (990, 999)
+    # Not a single byte range: the whole file is served
+    assert byte_range("bytes=0-1,5-6", 1000) is None
+    assert byte_range("items=0-1", 1000) is None
+    with pytest.raises(ValueError):
+        byte_range("bytes=1000-", 1000)
+
+
+def test_watched_files(site):
+    os.makedirs("data_x/images")
+    for path in ("data_x/yields.pkl", "data_x/images/a.png", "docs/images/b.png"):
+        with open(path, "wb") as f:
+            f.write(b"x")
+    os.makedirs("docs/data")
+    with open("docs/data/generated.json", "w") as f:
+        f.write("{}")
+
+    snapshot = watched_files()
+
+    assert os.path.join("data_x", "yields.pkl") in snapshot
+    assert os.path.join("data_x", "images", "a.png") in snapshot
+    assert os.path.join("docs", "images", "b.png") in snapshot
+    assert os.path.join("scripts", "serve.py") in snapshot
+    # Generated files are not build inputs
+    assert os.path.join("docs", "data", "generated.json") not in snapshot
+
+
+@pytest.fixture
+def server(site):
+    server = serve("127.0.0.1", 0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url, **headers):
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_serves_precompressed_siblings(server):
+    with open("docs/a.json", "w") as f:
+        f.write('{"a": 1}')
+    with gzip.open("docs/a.json.gz", "wt") as f:
+        f.write('{"a": 1}')
+
+    status, headers, body = _get(f"{server}/a.json", **{"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == b'{"a": 1}'
+
+    status, headers, body = _get(f"{server}/a.json")
+    assert headers["Content-Encoding"] is None
+    assert body == b'{"a": 1}'
+
+    # Revalidation with the ETag
+    status, _, _ = _get(f"{server}/a.json", **{"If-None-Match": headers["ETag"]})
+    assert status == 304
+
+
+def test_serves_byte_ranges(server):
+    with open("docs/bundle.bin", "wb") as f:
+        f.write(bytes(range(100)))
+
+    status, headers, body = _get(f"{server}/bundle.bin", Range="bytes=10-19")
+    assert status == 206
+    assert headers["Content-Range"] == "bytes 10-19/100"
+    assert body == bytes(range(10, 20))
+
+    status, _, _ = _get(f"{server}/bundle.bin", Range="bytes=100-")
+    assert status == 416
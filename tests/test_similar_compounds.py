@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from generate_similar_compounds import (
+    generate_similar_compounds,
+    nearest_neighbors,
+    standardize,
+)
+
+
+def _brute_force(points, k):
+    distances = np.linalg.norm(points[:, None] - points[None, :], axis=2)
+    np.fill_diagonal(distances, np.inf)
+    indices = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    return indices, np.take_along_axis(distances, indices, axis=1)
+
+
+def test_standardize():
+    matrix = np.array([[1.0, 5.0, 100.0], [3.0, 5.0, np.nan], [5.0, 5.0, 300.0]])
+
+    standardized = standardize(matrix)
+
+    np.testing.assert_allclose(standardized[:, 0], [-1.2247449, 0, 1.2247449])
+    # Constant columns and missing values become 0
+    np.testing.assert_array_equal(standardized[:, 1], [0, 0, 0])
+    np.testing.assert_allclose(standardized[:, 2], [-1, 0, 1])
+
+
+def test_nearest_neighbors_match_brute_force():
+    points = np.random.default_rng(0).normal(size=(40, 3))
+
+    # Small blocks, so several blocks are computed
+    indices, distances = nearest_neighbors(points, 5, max_block_cells=100)
+
+    expected_indices, expected_distances = _brute_force(points, 5)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+    assert indices.dtype == np.int32 and distances.dtype == np.float32
+
+
+def test_nearest_neighbors_few_rows():
+    indices, distances = nearest_neighbors(np.array([[0.0], [2.0]]), 5)
+    assert indices.tolist() == [[1], [0]]
+    assert distances.tolist() == [[2.0], [2.0]]
+
+    indices, _ = nearest_neighbors(np.array([[0.0]]), 5)
+    assert indices.shape == (1, 0)
+
+
+def test_generate_similar_compounds(site):
+    (site / "data_t").mkdir()
+    pd.DataFrame(
+        {
+            "Compound_Name": ["a", "b", "c", "d", "a"],
+            "Class": ["x", "y", "x", "y", "x"],
+            "p1": [0.0, 1.0, 10.0, 11.0, 0.0],
+            "p2": [0.0, 0.0, 0.0, 0.0, 0.0],
+        }
+    ).to_pickle(site / "data_t" / "Select_properties.pkl")
+
+    generate_similar_compounds(
+        "data/similar/t_similar.json", "Select_properties.pkl", "data_t", k=2
+    )
+
+    with open(site / "docs" / "data" / "similar" / "t_similar.json") as f:
+        header = json.load(f)
+    assert header["compounds"] == ["a", "b", "c", "d"]  # Duplicates dropped
+    assert header["properties"] == ["p1", "p2"]
+    assert header["shape"] == [4, 2]
+    buffer = (site / "docs" / "data" / "similar" / header["data_path"]).read_bytes()
+    indices = np.frombuffer(buffer[: header["distance_offset"]], dtype="<i4")
+    distances = np.frombuffer(buffer[header["distance_offset"] :], dtype="<f4")
+    assert indices.reshape(4, 2).tolist() == [[1, 2], [0, 2], [3, 1], [2, 1]]
+    assert distances.reshape(4, 2)[0, 0] < distances.reshape(4, 2)[0, 1]
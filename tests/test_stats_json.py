@@ -0,0 +1,127 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from generate_stats_json import (
+    MIN_PAIR_COUNT,
+    generate_stats_json,
+    pairwise_correlation,
+    spearman_correlation,
+    top_compounds,
+)
+
+
+def _with_missing(rows, columns, seed):
+    rng = np.random.default_rng(seed)
+    # Rounded, so the ranks have ties
+    matrix = np.round(rng.normal(size=(rows, columns)), 1)
+    matrix[rng.random((rows, columns)) < 0.3] = np.nan
+    return matrix
+
+
+def _pandas_corr(x, y, method):
+    # The properties x methods block of DataFrame.corr over all the columns
+    frame = pd.DataFrame(np.hstack([x, y]))
+    corr = frame.corr(method=method, min_periods=MIN_PAIR_COUNT).to_numpy()
+    return corr[: x.shape[1], x.shape[1] :]
+
+
+def _x_y():
+    x = _with_missing(30, 5, seed=1)
+    y = _with_missing(30, 3, seed=2)
+    x[:, 1] = 2.0  # Constant: no variance
+    x[3:, 2] = np.nan  # Fewer than MIN_PAIR_COUNT compounds with any yield
+    y[:, 0] = _with_missing(30, 1, seed=3)[:, 0] + x[:, 0]  # Correlated
+    x[:, 4] = np.round(np.arange(30) / 3)  # No missing values, so ranked at once
+    return x, y
+
+
+def test_pairwise_correlation_matches_pandas():
+    x, y = _x_y()
+
+    correlations, counts = pairwise_correlation(x, y)
+
+    expected = _pandas_corr(x, y, "pearson")
+    np.testing.assert_allclose(correlations, expected, rtol=1e-10, atol=1e-12)
+    expected_counts = (~np.isnan(x)).astype(int).T @ (~np.isnan(y)).astype(int)
+    np.testing.assert_array_equal(counts, expected_counts)
+    assert np.isnan(correlations[1]).all() and np.isnan(correlations[2]).all()
+    assert correlations[0, 0] > 0.5
+
+
+def test_spearman_correlation_matches_pandas():
+    x, y = _x_y()
+
+    correlations = spearman_correlation(x, y)
+
+    expected = _pandas_corr(x, y, "spearman")
+    np.testing.assert_allclose(correlations, expected, rtol=1e-10, atol=1e-12)
+    assert not np.isnan(correlations[[0, 3, 4]]).any()
+
+
+def test_correlations_without_missing_values():
+    x = _with_missing(20, 4, seed=4)
+    y = _with_missing(20, 2, seed=5)
+    x, y = np.nan_to_num(x), np.nan_to_num(y)
+
+    np.testing.assert_allclose(
+        pairwise_correlation(x, y)[0], _pandas_corr(x, y, "pearson"), rtol=1e-10
+    )
+    np.testing.assert_allclose(
+        spearman_correlation(x, y), _pandas_corr(x, y, "spearman"), rtol=1e-10
+    )
+
+
+def test_top_compounds():
+    matrix = np.array(
+        [[1.0, np.nan], [3.0, np.nan], [np.nan, np.nan], [3.0, 2.0], [2.0, np.nan]]
+    )
+
+    ids, values = top_compounds(matrix, ["a", "b", "c", "d", "e"], 3)
+
+    # Highest first, ties in compound order, missing yields dropped
+    assert ids == [["b", "d", "e"], ["d"]]
+    assert values == [[3.0, 3.0, 2.0], [2.0]]
+
+
+def test_generate_stats_json(site, write_yields):
+    x, y = _x_y()
+    compounds = [f"c{i:02d}" for i in range(len(x))]
+    write_yields("data_t", compounds, ["m1", "m2", "m3"], y)
+    properties = pd.DataFrame(x, columns=[f"p{i}" for i in range(x.shape[1])])
+    properties.insert(0, "Compound_Name", compounds)
+    # Reversed, with a duplicate: rows are matched to the yields by name
+    properties = pd.concat([properties.iloc[::-1], properties.iloc[:1]])
+    properties.to_pickle(site / "data_t" / "Select_properties.pkl")
+
+    generate_stats_json("out/stats.json", "Select_properties.pkl", "data_t", top_k=2)
+
+    with open(site / "out" / "stats.json") as f:
+        stats = json.load(f)
+    assert stats["properties"] == ["p0", "p1", "p2", "p3", "p4"]
+    assert stats["methods"] == ["m1", "m2", "m3"]
+    assert stats["compound_count"] == 30
+
+    described = pd.DataFrame(y).describe()
+    summaries = stats["summaries"]
+    assert summaries["count"] == described.loc["count"].astype(int).tolist()
+    np.testing.assert_allclose(summaries["mean"], described.loc["mean"])
+    np.testing.assert_allclose(summaries["std"], described.loc["std"])
+    np.testing.assert_allclose(summaries["median"], described.loc["50%"])
+    np.testing.assert_allclose(summaries["max"], described.loc["max"])
+
+    for method in ("pearson", "spearman"):
+        expected = np.round(_pandas_corr(x, y, method), 4)
+        actual = np.array(stats[method], dtype=np.float64)  # null -> NaN
+        np.testing.assert_allclose(actual, expected, atol=1e-12)
+    assert stats["pair_counts"] == pairwise_correlation(x, y)[1].tolist()
+
+    assert stats["top_k"]["k"] == 2
+    for j, (ids, values) in enumerate(
+        zip(stats["top_k"]["ids"], stats["top_k"]["values"])
+    ):
+        column = pd.Series(y[:, j], index=compounds).dropna()
+        expected = column.sort_values(ascending=False, kind="stable")[:2]
+        assert ids == expected.index.tolist()
+        assert values == expected.tolist()
@@ -0,0 +1,160 @@
+import json
+import os
+
+import pandas as pd
+
+from numeric_engine import record_texts
+from versioned_data import (
+    apply_delta,
+    expected_order,
+    load_versioned_records,
+    write_versioned_records,
+)
+
+FIELDS = ["m1", "m2"]
+
+
+def _records(values):
+    return {
+        key: json.dumps({"m1": m1, "m2": m2}, separators=(",", ":"))
+        for key, (m1, m2) in values.items()
+    }
+
+
+def _publish(path, values, **kwargs):
+    return write_versioned_records(
+        path, list(values), FIELDS, _records(values), **kwargs
+    )
+
+
+def _published(path):
+    _, state = load_versioned_records(path)
+    return state["compounds"], state["records"]
+
+
+def test_expected_order():
+    assert expected_order(["a", "b", "c"], ["b"], ["d"]) == ["a", "c", "d"]
+
+
+def test_apply_delta():
+    state = {
+        "compounds": ["a", "b"],
+        "fields": FIELDS,
+        "records": {"a": "{}", "b": "{}"},
+    }
+
+    apply_delta(
+        state,
+        {"upserts": {"c": {"m1": 1}}, "deletes": ["a"], "appended": ["c"]},
+    )
+
+    assert state["compounds"] == ["b", "c"]
+    assert state["records"] == {"b": "{}", "c": '{"m1":1}'}
+
+
+def test_first_version_is_a_base_snapshot(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    values = {"a": (1.0, None), "b": (2.5, 3)}
+
+    manifest = _publish(path, values)
+
+    assert manifest["version"] == 1
+    assert manifest["base"]["url"] == "yields_versions/base_1.json"
+    assert manifest["deltas"] == []
+    assert _published(path) == (["a", "b"], _records(values))
+
+
+def test_changes_are_published_as_deltas(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    _publish(path, {"a": (1.0, None), "b": (2.5, 3), "c": (0.0, 0.0)})
+
+    values = {"a": (1.0, None), "c": (0.5, 0.0), "d": (4.0, 4.0)}
+    manifest = _publish(path, values, max_delta_ratio=10)
+
+    assert manifest["version"] == 2
+    assert manifest["base"]["version"] == 1
+    assert [
+        (entry["version"], entry["upserts"], entry["deletes"])
+        for entry in manifest["deltas"]
+    ] == [(2, 2, 1)]
+    with open(tmp_path / "yields_versions" / "delta_2.json") as f:
+        delta = json.load(f)
+    assert sorted(delta["upserts"]) == ["c", "d"]
+    assert delta["deletes"] == ["b"]
+    assert delta["appended"] == ["d"]
+    assert "compounds" not in delta  # Implied by the previous order
+    assert _published(path) == (["a", "c", "d"], _records(values))
+
+
+def test_reordering_is_recorded(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    _publish(path, {"a": (1, 1), "b": (2, 2)})
+
+    _publish(path, {"b": (2, 2), "a": (1, 1)}, max_delta_ratio=10)
+
+    assert _published(path)[0] == ["b", "a"]
+
+
+def test_unchanged_records_are_not_republished(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    values = {"a": (1, 1)}
+    first = _publish(path, values)
+
+    assert _publish(path, values) == first
+    files = os.listdir(tmp_path / "yields_versions")
+    assert {name.split(".")[0] for name in files} == {"base_1"}
+
+
+def test_unchanged_rounded_records_are_not_republished(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    frame = pd.DataFrame({"m1": [100.0, 0.123456], "m2": [None, 12345.0]})
+    # Written as 1e+02 and 1.2e+04, which read back as 100.0 and 12000.0
+    texts = record_texts(["a", "b"], frame, {"default": {"significant": 2}})
+    records = dict(zip(["a", "b"], texts))
+    first = write_versioned_records(path, ["a", "b"], FIELDS, records)
+
+    assert write_versioned_records(path, ["a", "b"], FIELDS, records) == first
+    files = os.listdir(tmp_path / "yields_versions")
+    assert {name.split(".")[0] for name in files} == {"base_1"}
+
+
+def test_deltas_are_compacted(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    values = {key: (i, i) for i, key in enumerate("abcdef")}
+    _publish(path, values)
+
+    for version in range(2, 5):
+        values["a"] = (version, version)
+        manifest = _publish(path, values, max_deltas=2, max_delta_ratio=10)
+
+    # The third delta exceeds max_deltas: version 4 is a new base snapshot
+    assert manifest["version"] == 4
+    assert manifest["base"]["version"] == 4
+    assert manifest["deltas"] == []
+    files = os.listdir(tmp_path / "yields_versions")
+    assert {name.split(".")[0] for name in files} == {"base_4"}
+    assert _published(path) == (list("abcdef"), _records(values))
+
+
+def test_field_changes_start_a_new_base(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    _publish(path, {"a": (1, 1)})
+
+    manifest = write_versioned_records(path, ["a"], ["m1"], {"a": '{"m1":1}'})
+
+    assert manifest["version"] == 2
+    assert manifest["deltas"] == []
+    _, state = load_versioned_records(path)
+    assert state["fields"] == ["m1"]
+
+
+def test_unreadable_versions_are_compacted(tmp_path):
+    path = str(tmp_path / "yields_versions.json")
+    _publish(path, {"a": (1, 1)})
+    os.remove(tmp_path / "yields_versions" / "base_1.json")
+
+    manifest = _publish(path, {"a": (2, 2)})
+
+    # The version keeps increasing, so pages holding version 1 refetch
+    assert manifest["version"] == 2
+    assert _published(path) == (["a"], _records({"a": (2, 2)}))